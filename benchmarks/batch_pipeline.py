@@ -0,0 +1,154 @@
+"""批量安装流程端到端基准（Linux，合成安装包）
+
+用法：python benchmarks/batch_pipeline.py [--count 60] [--runtime 0.2] [--concurrency 4] [--hang 1] [--idle-window 0.5]
+                                          [--json out.json] [--compare base.json] [--trace trace.jsonl]
+
+生成一批假安装包，扫描后用与命令行模式相同的引擎和调度器执行，报告：
+扫描耗时、总耗时、每个安装包的额外开销（耗时减去假安装程序自身的运行时间）、浪费的参数尝试次数、
+日志吞吐、峰值内存（本进程与子进程）。--json 输出机器可读结果；
+--compare 与之前保存的结果对比，耗时类指标变差超过 --tolerance 时以退出码 1 结束。
+--trace 开启耗时追踪（与生产环境相同），可用 python -m flyinstaller --export-trace 导出查看。
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flyinstaller.engine import InstallEngine  # noqa: E402
+from flyinstaller.logpipe import LogPipeline  # noqa: E402
+from flyinstaller.proctree import ProcessTracker  # noqa: E402
+from flyinstaller.scanner import find_packages  # noqa: E402
+from flyinstaller.scheduler import InstallScheduler  # noqa: E402
+from flyinstaller.tracing import Tracer  # noqa: E402
+from synthetic import ExitCodeLauncher, default_mix, generate, install_fake_msiexec  # noqa: E402
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="批量安装流程基准")
+    parser.add_argument("--count", type=int, default=60, help="安装包数量")
+    parser.add_argument("--runtime", type=float, default=0.2, help="假安装程序的平均运行时间（秒）")
+    parser.add_argument("--concurrency", type=int, default=4, help="EXE 并发数")
+    parser.add_argument("--timeout", type=float, default=2.0, help="单次尝试超时（秒）")
+    parser.add_argument("--lines", type=int, default=2000, help="输出量大的安装包的输出行数")
+    parser.add_argument("--hang", type=int, default=0, help="挂起的安装包数量")
+    parser.add_argument("--idle-window", type=float, default=0, help="挂起检测的空闲窗口（秒，0 关闭，只靠超时）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="结果写入 JSON 文件")
+    parser.add_argument("--compare", help="与之前 --json 保存的结果对比")
+    parser.add_argument("--trace", help="耗时追踪写入该文件")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的变差比例（默认 20%%）")
+    return parser.parse_args(argv)
+
+
+# 越小越好、参与回归对比的指标
+REGRESSION_KEYS = ("scan_ms", "wall_seconds", "overhead_ms_mean", "wasted_attempts", "peak_rss_kb")
+
+
+def compare(summary, baseline_path, tolerance):
+    """与基线对比，返回变差的指标列表"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = []
+    for key in REGRESSION_KEYS:
+        old, new = baseline.get(key), summary.get(key)
+        if old is None or new is None:
+            continue
+        # 绝对值很小的指标只在超过 1 个单位时才算变差
+        if new > old * (1 + tolerance) and new - old > 1:
+            regressions.append(f"{key}: {old} → {new}")
+    return regressions
+
+
+async def run_batch(engine, files, lanes):
+    scheduler = InstallScheduler(engine.install_file, lanes=lanes, cancel_event=engine.cancel_event,
+                                 tracer=engine.tracer)
+    return await scheduler.run(files)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ["PATH"] = install_fake_msiexec(os.path.join(workdir, "bin")) + os.pathsep + os.environ["PATH"]
+        profiles = default_mix(args.count, args.runtime, args.lines, args.hang, args.seed)
+        packages = generate(os.path.join(workdir, "package"), profiles)
+        scan_start = time.perf_counter()
+        scanned = set(find_packages(os.path.join(workdir, "package")))
+        scan_ms = (time.perf_counter() - scan_start) * 1000
+        files = [path for path, _ in packages if path in scanned]
+
+        tracer = Tracer(args.trace)
+        pipeline = LogPipeline(os.path.join(workdir, "bench.log"))
+        tracker = ProcessTracker()
+        launcher = ExitCodeLauncher(tracker, sample_interval=0.1)
+        engine = InstallEngine(
+            os.path.join(workdir, "target"),
+            log=pipeline.put,
+            launcher=launcher,
+            tracker=tracker,
+            timeout=args.timeout,
+            admin_check=lambda: True,
+            tracer=tracer,
+            idle_window=args.idle_window
+        )
+        start = time.perf_counter()
+        results = asyncio.run(run_batch(engine, files, {"exe": args.concurrency, "msi": 1}))
+        wall = time.perf_counter() - start
+        pipeline.close(timeout=30)
+        tracer.close(timeout=30)
+
+    overheads = []
+    wasted = 0
+    for path, profile in packages:
+        outcome = engine.outcomes[path]
+        wasted += max(0, outcome.attempts - 1)
+        if not profile.hang:
+            # 被拒绝的参数立即退出，只有被接受的那次会完整运行
+            busy = profile.runtime if profile.accept else outcome.attempts * profile.runtime
+            overheads.append(outcome.duration - busy)
+    serial = sum(engine.outcomes[path].duration for path in files)
+    rss_self = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    summary = {
+        "packages": len(files),
+        "scan_ms": round(scan_ms, 2),
+        "succeeded": sum(1 for result in results if result),
+        "wall_seconds": round(wall, 3),
+        "sum_package_seconds": round(serial, 3),
+        "speedup_vs_serial": round(serial / wall, 2) if wall else None,
+        "overhead_ms_mean": round(statistics.mean(overheads) * 1000, 1) if overheads else None,
+        "overhead_ms_p95": round(sorted(overheads)[int(len(overheads) * 0.95) - 1] * 1000, 1) if overheads else None,
+        "wasted_attempts": wasted,
+        "log_lines": pipeline.total,
+        "installer_output_lines": launcher.output_lines,
+        "log_lines_per_second": round(pipeline.total / wall) if wall else None,
+        "peak_rss_kb": rss_self,
+        "peak_child_rss_kb": rss_children,
+    }
+
+    print(f"安装包：{summary['packages']}（成功 {summary['succeeded']}），扫描 {summary['scan_ms']} ms")
+    print(f"总耗时：{summary['wall_seconds']} 秒（各包耗时合计 {summary['sum_package_seconds']} 秒，"
+          f"加速比 {summary['speedup_vs_serial']}）")
+    print(f"每包额外开销：平均 {summary['overhead_ms_mean']} ms，p95 {summary['overhead_ms_p95']} ms")
+    print(f"浪费的参数尝试：{summary['wasted_attempts']} 次")
+    print(f"日志：{summary['log_lines']} 行，{summary['log_lines_per_second']} 行/秒")
+    print(f"峰值内存：本进程 {summary['peak_rss_kb']} KB，子进程 {summary['peak_child_rss_kb']} KB")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        regressions = compare(summary, args.compare, args.tolerance)
+        for item in regressions:
+            print(f"⚠️ 变差：{item}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""命令行模式启动耗时测量
+
+用法：python benchmarks/cli_startup.py [次数]
+
+测量 ``python installer.py --packages <空目录>`` 从进程启动到退出的耗时（含解释器启动），
+与 flyinstaller.cli.STARTUP_BUDGET_MS 比较，并检查没有导入 tkinter/customtkinter。
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from flyinstaller.cli import STARTUP_BUDGET_MS  # noqa: E402
+
+CHECK_IMPORTS = (
+    "import runpy, sys\n"
+    "sys.argv = ['installer.py', '--quiet', '--packages', sys.argv[1]]\n"
+    "try:\n"
+    "    runpy.run_path('installer.py', run_name='__main__')\n"
+    "except SystemExit:\n"
+    "    pass\n"
+    "print(sorted(m for m in ('tkinter', 'customtkinter') if m in sys.modules))\n"
+)
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    with tempfile.TemporaryDirectory() as empty:
+        cmd = [sys.executable, os.path.join(ROOT, "installer.py"), "--quiet", "--packages", empty]
+        subprocess.run(cmd, check=True)  # 预热文件缓存
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run(cmd, check=True)
+            samples.append((time.perf_counter() - start) * 1000)
+        baseline = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", "pass"], check=True)
+            baseline.append((time.perf_counter() - start) * 1000)
+        loaded = subprocess.run([sys.executable, "-c", CHECK_IMPORTS, empty], cwd=ROOT,
+                                stdout=subprocess.PIPE, text=True, check=True).stdout.strip()
+
+    median = statistics.median(samples)
+    print(f"命令行启动：中位数 {median:.0f} ms，最小 {min(samples):.0f} ms（{runs} 次）")
+    print(f"空解释器：中位数 {statistics.median(baseline):.0f} ms")
+    print(f"已导入的界面模块：{loaded}")
+    ok = median <= STARTUP_BUDGET_MS and loaded == "[]"
+    print(f"目标 {STARTUP_BUDGET_MS} ms：{'达标' if ok else '未达标'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
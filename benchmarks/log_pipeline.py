@@ -0,0 +1,174 @@
+"""日志管道微基准：对比旧的逐条 root.after + root.update() 与批量管道
+
+用法：python benchmarks/log_pipeline.py [消息条数]
+
+有图形环境时对比两种方式的吞吐（条/秒）与界面延迟（入队到显示）；
+无图形环境（无 $DISPLAY）时只测量管道本身的入队、取出和写盘速度。
+"""
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flyinstaller.logpipe import LogPipeline, MAX_UI_LINES  # noqa: E402
+
+UI_TICK_MS = 50
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def report(name, count, elapsed, latencies, ui_block):
+    print(f"[{name}]")
+    print(f"  吞吐：{count / elapsed:,.0f} 条/秒（{count} 条，{elapsed:.2f} 秒）")
+    if latencies:
+        print(f"  显示延迟：p50 {percentile(latencies, 50) * 1000:.1f} ms，"
+              f"p95 {percentile(latencies, 95) * 1000:.1f} ms，最大 {max(latencies) * 1000:.1f} ms")
+    if ui_block:
+        print(f"  界面回调耗时：平均 {statistics.mean(ui_block) * 1000:.2f} ms，"
+              f"最大 {max(ui_block) * 1000:.2f} ms，回调次数 {len(ui_block)}")
+
+
+def bench_old(tk, count):
+    """旧实现：每条日志一个 after 回调，回调内 root.update()"""
+    root = tk.Tk()
+    text = tk.Text(root)
+    text.pack()
+    latencies, ui_block = [], []
+    done = threading.Event()
+
+    def add_log(message, queued_at):
+        def update_log():
+            start = time.perf_counter()
+            text.config(state=tk.NORMAL)
+            text.insert(tk.END, f"{time.strftime('[%H:%M:%S]')} {message}\n")
+            text.see(tk.END)
+            text.config(state=tk.DISABLED)
+            root.update()
+            now = time.perf_counter()
+            latencies.append(now - queued_at)
+            ui_block.append(now - start)
+            if len(latencies) == count:
+                done.set()
+        root.after(10, update_log)
+
+    def produce():
+        for i in range(count):
+            add_log(f"🔧 尝试执行：setup{i}.exe /S", time.perf_counter())
+
+    def wait_done():
+        if done.is_set():
+            root.quit()
+        else:
+            root.after(20, wait_done)
+
+    start = time.perf_counter()
+    threading.Thread(target=produce, daemon=True).start()
+    root.after(20, wait_done)
+    root.mainloop()
+    elapsed = time.perf_counter() - start
+    root.destroy()
+    report("旧：逐条 after + update", count, elapsed, latencies, ui_block)
+
+
+def bench_new(tk, count):
+    """新实现：管道入队，定时器一次插入全部待显示行"""
+    root = tk.Tk()
+    text = tk.Text(root)
+    text.pack()
+    pipeline = LogPipeline(max_pending=count)
+    queued_at = []
+    latencies, ui_block = [], []
+    shown = [0]
+
+    def produce():
+        for i in range(count):
+            queued_at.append(time.perf_counter())
+            pipeline.put(f"🔧 尝试执行：setup{i}.exe /S")
+
+    def tick():
+        start = time.perf_counter()
+        lines, _ = pipeline.drain()
+        if lines:
+            text.config(state=tk.NORMAL)
+            text.insert(tk.END, "\n".join(lines) + "\n")
+            line_count = int(text.index("end-1c").split(".")[0])
+            if line_count > MAX_UI_LINES:
+                text.delete("1.0", f"{line_count - MAX_UI_LINES}.0")
+            text.see(tk.END)
+            text.config(state=tk.DISABLED)
+            now = time.perf_counter()
+            latencies.extend(now - t for t in queued_at[shown[0]:shown[0] + len(lines)])
+            shown[0] += len(lines)
+            ui_block.append(now - start)
+        if shown[0] >= count:
+            root.quit()
+        else:
+            root.after(UI_TICK_MS, tick)
+
+    start = time.perf_counter()
+    threading.Thread(target=produce, daemon=True).start()
+    root.after(UI_TICK_MS, tick)
+    root.mainloop()
+    elapsed = time.perf_counter() - start
+    root.destroy()
+    report("新：批量管道", count, elapsed, latencies, ui_block)
+
+
+def bench_headless(count, producers=4):
+    """无界面：多线程入队 + 取出 + 后台写盘"""
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = os.path.join(tmp, "bench.log")
+        pipeline = LogPipeline(log_path, max_pending=MAX_UI_LINES)
+        per_thread = count // producers
+
+        def produce():
+            for i in range(per_thread):
+                pipeline.put(f"🔧 尝试执行：setup{i}.exe /S")
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=produce) for _ in range(producers)]
+        for thread in threads:
+            thread.start()
+        drain_costs = []
+        while any(thread.is_alive() for thread in threads):
+            t = time.perf_counter()
+            pipeline.drain()
+            drain_costs.append(time.perf_counter() - t)
+            time.sleep(UI_TICK_MS / 1000)
+        put_elapsed = time.perf_counter() - start
+        pipeline.close(timeout=30)
+        total_elapsed = time.perf_counter() - start
+        with open(log_path, encoding="utf-8") as f:
+            written = sum(1 for _ in f)
+    total = per_thread * producers
+    print(f"[管道（{producers} 个写入线程）]")
+    print(f"  入队吞吐：{total / put_elapsed:,.0f} 条/秒")
+    print(f"  写盘完成：{written} 行，总耗时 {total_elapsed:.2f} 秒")
+    if drain_costs:
+        print(f"  单次 drain 耗时：最大 {max(drain_costs) * 1000:.2f} ms")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    bench_headless(count * 20)
+    try:
+        import tkinter as tk
+        tk.Tk().destroy()
+    except Exception as e:
+        print(f"跳过界面对比（无可用图形环境：{e}）")
+        return
+    bench_old(tk, count)
+    bench_new(tk, count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""安装列表数据模型耗时测量（不需要界面）
+
+用法：python benchmarks/package_list.py [条目数]
+
+按扫描批次追加条目，测量排序、逐字输入的增量筛选、安装中更新一行状态的耗时，
+每项与一帧界面刷新的预算（UI_TICK_MS）比较。
+"""
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from flyinstaller.package_list import PackageListModel, PackageEntry, RUNNING  # noqa: E402
+from flyinstaller.scanner import DEFAULT_BATCH  # noqa: E402
+
+# 与 flyinstaller.gui.UI_TICK_MS 相同（不导入界面模块）
+UI_TICK_MS = 50
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rng = random.Random(1)
+    vendors = ["adobe", "google", "mozilla", "7zip", "python", "nodejs", "vscode", "git"]
+    entries = [PackageEntry(f"/pkg/{vendor}/{vendor}-{i}.exe", f"{vendor}/{vendor}-{i}.exe",
+                            size=rng.randint(1 << 20, 1 << 31), duration=rng.choice([None, rng.uniform(5, 900)]))
+               for i, vendor in ((i, rng.choice(vendors)) for i in range(count))]
+    model = PackageListModel()
+
+    results = {}
+    results["追加（每批）"] = max(timed(lambda: model.extend(entries[k:k + DEFAULT_BATCH]))
+                              for k in range(0, count, DEFAULT_BATCH))
+    results["按大小排序"] = timed(lambda: model.set_sort("size", reverse=True))
+    results["逐字筛选（每个字符）"] = max(timed(lambda: model.set_filter(text)) for text in ("g", "go", "goo", "goog"))
+    results["清除筛选"] = timed(lambda: model.set_filter(""))
+    results["更新一行状态"] = max(timed(lambda: model.set_status(entry.path, RUNNING)) for entry in entries[:200])
+    results["取可见窗口"] = timed(lambda: model.window(count // 2, 40))
+
+    print(f"{count} 个条目：")
+    ok = True
+    for name, elapsed in results.items():
+        ok = ok and elapsed <= UI_TICK_MS
+        print(f"  {name}：{elapsed:.2f} ms")
+    print(f"单项不超过 {UI_TICK_MS} ms：{'达标' if ok else '未达标'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""安装前预检耗时测量
+
+用法：python benchmarks/preflight.py [安装包个数]
+
+生成一个文件夹的合成安装包（文件头合法的 .exe/.msi，大小 1–8 MB），其中混入截断、0 字节、
+文件头错误的包，测量并发预检的耗时，并确认有问题的包全部被找出。
+"""
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from flyinstaller.preflight import OLE_MAGIC, run_preflight  # noqa: E402
+
+# 预检耗时目标（毫秒）
+BUDGET_MS = 1000
+
+PE_OFFSET = 0x80
+OPTIONAL_SIZE = 0xE0
+HEADER_SIZE = 0x400
+
+
+def pe_header(size):
+    """一个节、节数据一直到文件末尾的最小 PE 头"""
+    head = bytearray(HEADER_SIZE)
+    head[:2] = b"MZ"
+    struct.pack_into("<I", head, 0x3C, PE_OFFSET)
+    head[PE_OFFSET:PE_OFFSET + 4] = b"PE\0\0"
+    struct.pack_into("<H", head, PE_OFFSET + 6, 1)
+    struct.pack_into("<H", head, PE_OFFSET + 20, OPTIONAL_SIZE)
+    table = PE_OFFSET + 24 + OPTIONAL_SIZE
+    head[table:table + 8] = b".text\0\0\0"
+    struct.pack_into("<II", head, table + 16, size - HEADER_SIZE, HEADER_SIZE)
+    return bytes(head)
+
+
+def msi_header(size):
+    """FAT 扇区在开头、目录扇区在末尾的最小复合文档头（512 字节扇区）"""
+    head = bytearray(512)
+    head[:8] = OLE_MAGIC
+    struct.pack_into("<H", head, 30, 9)
+    struct.pack_into("<I", head, 48, size // 512 - 2)
+    struct.pack_into("<109I", head, 76, 0, *([0xFFFFFFFF] * 108))
+    return bytes(head)
+
+
+def write_package(path, size, truncate=False):
+    header = pe_header(size) if path.endswith(".exe") else msi_header(size)
+    with open(path, "wb") as f:
+        f.write(header)
+        f.truncate(size // 2 if truncate else size)
+
+
+def build_folder(folder, count, rng):
+    broken = set()
+    for i in range(count):
+        suffix = ".msi" if i % 4 == 0 else ".exe"
+        path = os.path.join(folder, f"package{i:04d}{suffix}")
+        size = rng.randint(1, 8) * 1024 * 1024
+        if i % 50 == 7:
+            write_package(path, size, truncate=True)
+            broken.add(path)
+        elif i % 50 == 23:
+            open(path, "wb").close()
+            broken.add(path)
+        elif i % 50 == 41:
+            with open(path, "wb") as f:
+                f.write(b"<html>404 Not Found</html>")
+            broken.add(path)
+        else:
+            write_package(path, size)
+    return broken
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as folder:
+        broken = build_folder(folder, count, rng)
+        files = sorted(os.path.join(folder, name) for name in os.listdir(folder))
+        start = time.perf_counter()
+        report = run_preflight(files, folder)
+        elapsed = (time.perf_counter() - start) * 1000
+
+    found = report.bad_files()
+    print(f"{count} 个安装包（{report.total_size / (1024 * 1024):.0f} MB，其中 {len(broken)} 个有问题）")
+    print(f"预检耗时：{elapsed:.1f} ms")
+    print(f"找出有问题的包：{len(found & broken)}/{len(broken)}，误报 {len(found - broken)} 个")
+    ok = elapsed <= BUDGET_MS and found == broken
+    print(f"不超过 {BUDGET_MS} ms 且结果正确：{'达标' if ok else '未达标'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
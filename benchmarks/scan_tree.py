@@ -0,0 +1,57 @@
+"""安装包扫描耗时测量
+
+用法：python benchmarks/scan_tree.py [目录数] [每个目录的文件数]
+
+生成一棵临时目录树（每个目录一半是 .exe/.msi，一半是其他文件），分别测量
+没有索引的首次扫描、索引完整时的再次扫描、以及只改动一个目录后的扫描耗时。
+"""
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from flyinstaller.scanner import PackageScanner  # noqa: E402
+
+
+def build_tree(root, dirs, files):
+    for d in range(dirs):
+        folder = os.path.join(root, f"group{d // 20:03d}", f"dir{d:04d}")
+        os.makedirs(folder)
+        for f in range(files):
+            suffix = (".exe", ".msi", ".txt", ".ini")[f % 4]
+            open(os.path.join(folder, f"file{f:04d}{suffix}"), "w").close()
+
+
+def timed_scan(root, index_path):
+    scanner = PackageScanner(index_path, max_depth=None)
+    start = time.perf_counter()
+    found = scanner.scan(root)
+    return (time.perf_counter() - start) * 1000, len(found), scanner
+
+
+def main():
+    dirs = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    files = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    with tempfile.TemporaryDirectory() as workdir:
+        root = os.path.join(workdir, "package")
+        index_path = os.path.join(workdir, "scan_index.json")
+        build_tree(root, dirs, files)
+
+        cold, count, _ = timed_scan(root, index_path)
+        warm, _, scanner = timed_scan(root, index_path)
+        warm_hits = scanner.hits
+        open(os.path.join(root, "group000", "dir0000", "new.exe"), "w").close()
+        changed, changed_count, scanner = timed_scan(root, index_path)
+
+    print(f"目录树：{dirs} 个目录，每个 {files} 个文件，共 {count} 个安装包")
+    print(f"首次扫描（无索引）：{cold:.1f} ms")
+    print(f"再次扫描（索引命中 {warm_hits} 个目录）：{warm:.1f} ms")
+    print(f"改动一个目录后（重新读取 {scanner.misses} 个目录，{changed_count} 个安装包）：{changed:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""合成安装包：在 Linux 上生成可配置的假安装程序，用于驱动完整的批量安装流程
+
+每个假安装包是一个 /bin/sh 脚本（后缀仍为 .exe/.msi），行为由 Profile 描述：
+运行时长、返回码、输出量、派生子进程、是否挂起、只接受哪个静默参数。
+
+POSIX 进程的退出码只有 8 位，无法表示 1618、3010 等 Windows 返回码，
+所以脚本在最后一行输出 ``##EXIT <返回码>``，由 ExitCodeLauncher 替换真实退出码。
+.msi 由放在 PATH 最前面的假 msiexec.exe 执行。
+"""
+import os
+import random
+import stat
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flyinstaller.process import AsyncLauncher  # noqa: E402
+from flyinstaller.timeouts import SAMPLE_INTERVAL  # noqa: E402
+
+EXIT_MARKER = "##EXIT "
+
+# 参数不被接受时的返回码（不在任何成功码中）
+REJECT_CODE = 1639
+
+
+class Profile:
+    """假安装包的行为描述"""
+
+    def __init__(self, runtime=0.2, exit_code=0, output_lines=0, children=0,
+                 hang=False, accept=None, suffix=".exe"):
+        self.runtime = runtime
+        self.exit_code = exit_code
+        self.output_lines = output_lines
+        self.children = children
+        self.hang = hang
+        # 只在命令行包含该参数时成功，其余参数返回 REJECT_CODE（模拟逐一尝试的浪费）
+        self.accept = accept
+        self.suffix = suffix
+
+    def script(self):
+        lines = ["#!/bin/sh"]
+        if self.accept:
+            lines.append(f'case " $* " in *" {self.accept} "*) ;; *) echo "{EXIT_MARKER}{REJECT_CODE}"; exit 1;; esac')
+        if self.output_lines:
+            lines.append(f"seq 1 {self.output_lines} | sed 's/^/正在复制文件 /'")
+        for _ in range(self.children):
+            lines.append(f"sleep {self.runtime} &")
+        if self.hang:
+            lines.append("sleep 100000")
+        lines.append(f"sleep {self.runtime}")
+        if self.children:
+            lines.append("wait")
+        lines.append(f'echo "{EXIT_MARKER}{self.exit_code}"')
+        lines.append(f"exit {self.exit_code % 256}")
+        return "\n".join(lines) + "\n"
+
+
+def _write_script(path, content):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+
+def install_fake_msiexec(bin_dir):
+    """生成假的 msiexec.exe：执行 /i 后面的 .msi 脚本，并转发其余参数"""
+    os.makedirs(bin_dir, exist_ok=True)
+    _write_script(os.path.join(bin_dir, "msiexec.exe"), "\n".join([
+        "#!/bin/sh",
+        '[ "$1" = "/i" ] && pkg="$2" && shift 2',
+        'exec sh "$pkg" "$@"',
+    ]) + "\n")
+    return bin_dir
+
+
+def default_mix(count, runtime, output_lines=2000, hang=0, seed=0):
+    """常见的混合场景：大部分 /S 一次成功，部分需要其他参数、输出很多、派生子进程、MSI 需重启、挂起"""
+    rng = random.Random(seed)
+    profiles = []
+    for index in range(count):
+        roll = rng.random()
+        jitter = runtime * rng.uniform(0.5, 1.5)
+        if index < hang:
+            profiles.append(Profile(runtime=jitter, hang=True))
+        elif roll < 0.50:
+            profiles.append(Profile(runtime=jitter))
+        elif roll < 0.65:
+            profiles.append(Profile(runtime=jitter, accept="/verysilent"))
+        elif roll < 0.75:
+            profiles.append(Profile(runtime=jitter, output_lines=output_lines))
+        elif roll < 0.85:
+            profiles.append(Profile(runtime=jitter, children=3))
+        elif roll < 0.93:
+            profiles.append(Profile(runtime=jitter, exit_code=rng.choice([0, 3010, 1641]), suffix=".msi"))
+        else:
+            profiles.append(Profile(runtime=jitter, exit_code=rng.choice([259, 1618, 2])))
+    return profiles
+
+
+def generate(folder, profiles):
+    """在 folder 中生成假安装包，返回 [(路径, Profile)]"""
+    os.makedirs(folder, exist_ok=True)
+    packages = []
+    for index, profile in enumerate(profiles):
+        path = os.path.join(folder, f"pkg{index:04d}{profile.suffix}")
+        _write_script(path, profile.script())
+        packages.append((path, profile))
+    return packages
+
+
+class ExitCodeLauncher(AsyncLauncher):
+    """用脚本输出的 ##EXIT 行替换退出码，模拟 Windows 返回码；同时统计转发的输出行数"""
+
+    def __init__(self, tracker=None, sample_interval=SAMPLE_INTERVAL):
+        super().__init__(tracker, sample_interval)
+        self.output_lines = 0
+
+    async def __call__(self, cmd, timeout, new_console=False, on_output=None, idle_window=None):
+        reported = []
+
+        def forward(stream, line):
+            if line.startswith(EXIT_MARKER):
+                reported.append(int(line[len(EXIT_MARKER):]))
+                return
+            self.output_lines += 1
+            if on_output:
+                on_output(stream, line)
+
+        returncode, stdout, stderr = await super().__call__(cmd, timeout, new_console, forward, idle_window)
+        return (reported[-1] if reported else returncode), stdout, stderr
@@ -0,0 +1,16 @@
+"""FlyInstaller 安装核心（除 gui 模块外不依赖 tkinter/customtkinter，可在无界面环境下使用）"""
+
+from .engine import InstallEngine, EXE_SILENT_PARAMS, MSI_SUCCESS_CODES, safe_decode
+from .scheduler import InstallScheduler, DEFAULT_LANES, package_lane
+from .runtime import InstallRuntime
+
+__all__ = [
+    "InstallEngine",
+    "InstallScheduler",
+    "InstallRuntime",
+    "EXE_SILENT_PARAMS",
+    "MSI_SUCCESS_CODES",
+    "DEFAULT_LANES",
+    "package_lane",
+    "safe_decode",
+]
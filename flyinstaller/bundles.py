@@ -0,0 +1,280 @@
+"""压缩包（.zip）中的安装包
+
+扫描时只读取压缩包的中央目录，把其中的每个 .exe/.msi 列为一个安装包，路径记为 压缩包路径 + 包内路径
+（如 ``D:\\package\\tools.zip\\app\\setup.exe``），日志、结果、批次日志、安装状态都使用这个路径。
+
+安装时 BundleExtractor 在线程池中并行解压：当前包开始安装时，其后 depth 个包提前解压；
+包内同一目录下的非安装包文件（如 MSI 外置的 .cab）一并解压；安装结束后立即删除解压出的文件。
+解压出的文件总大小不超过 budget（正在等待安装的包除外），不需要先解压整个压缩包。
+"""
+import asyncio
+import contextlib
+import hashlib
+import os
+import shutil
+import threading
+import time
+
+# zipfile、tempfile 在用到时才导入：没有压缩包时不加载（命令行启动耗时见 benchmarks/cli_startup.py）
+from .scanner import PACKAGE_SUFFIXES
+
+BUNDLE_SUFFIXES = (".zip",)
+# 默认提前解压的包数、并行解压线程数、解压文件总大小上限
+DEFAULT_AHEAD = 2
+DEFAULT_WORKERS = 2
+DEFAULT_BUDGET = 4 * 1024 * 1024 * 1024
+EXTRACT_BLOCK = 4 * 1024 * 1024
+
+# 压缩包路径 → ((大小, 修改时间), {包内路径: ZipInfo})
+_index_cache = {}
+_index_lock = threading.Lock()
+
+
+class BundleError(OSError):
+    """压缩包无法读取或解压失败"""
+
+
+def split_member(file_path):
+    """把安装包路径拆成 (压缩包路径, 包内路径)；不在压缩包中时返回 None"""
+    lowered = file_path.lower()
+    for suffix in BUNDLE_SUFFIXES:
+        marker = suffix + os.sep
+        start = 0
+        while True:
+            index = lowered.find(marker, start)
+            if index < 0:
+                break
+            archive = file_path[:index + len(suffix)]
+            if os.path.isfile(archive):
+                return archive, file_path[index + len(marker):].replace(os.sep, "/")
+            start = index + 1
+    return None
+
+
+def member_path(archive, name):
+    """压缩包中成员对应的安装包路径"""
+    return os.path.join(archive, *name.split("/"))
+
+
+def archive_index(archive):
+    """读取压缩包中央目录（按大小与修改时间缓存），返回 {包内路径: ZipInfo}"""
+    stat = os.stat(archive)
+    identity = (stat.st_size, stat.st_mtime_ns)
+    with _index_lock:
+        cached = _index_cache.get(archive)
+    if cached is not None and cached[0] == identity:
+        return cached[1]
+    import zipfile
+    try:
+        with zipfile.ZipFile(archive) as bundle:
+            members = {info.filename: info for info in bundle.infolist() if not info.is_dir()}
+    except zipfile.BadZipFile as e:
+        raise BundleError(f"压缩包已损坏：{os.path.basename(archive)}（{e}）")
+    with _index_lock:
+        _index_cache[archive] = (identity, members)
+    return members
+
+
+def list_bundle(archive):
+    """压缩包中的安装包路径（按包内顺序，不解压）"""
+    return [member_path(archive, name) for name in archive_index(archive)
+            if name.lower().endswith(PACKAGE_SUFFIXES)]
+
+
+def _member_info(file_path):
+    archive, name = split_member(file_path)
+    try:
+        return archive, archive_index(archive)[name]
+    except KeyError:
+        raise BundleError(f"压缩包中没有该文件：{name}")
+
+
+class MemberStat:
+    """压缩包成员的大小与修改时间（与 os.stat_result 相同的属性名）"""
+
+    def __init__(self, info):
+        self.st_size = info.file_size
+        self.st_mtime_ns = int(time.mktime(info.date_time + (0, 0, -1))) * 1_000_000_000
+
+
+def package_stat(file_path):
+    """安装包的大小与修改时间，压缩包中的安装包使用包内记录的值"""
+    if split_member(file_path) is None:
+        return os.stat(file_path)
+    return MemberStat(_member_info(file_path)[1])
+
+
+@contextlib.contextmanager
+def open_package(file_path):
+    """以二进制方式读取安装包内容，压缩包中的安装包直接流式解压"""
+    member = split_member(file_path)
+    if member is None:
+        with open(file_path, "rb") as f:
+            yield f
+        return
+    archive, name = member
+    import zipfile
+    with zipfile.ZipFile(archive) as bundle, bundle.open(name) as f:
+        yield f
+
+
+def sidecars(members, name):
+    """与安装包位于包内同一目录的非安装包文件"""
+    folder = name.rpartition("/")[0]
+    return [other for other in members if other != name and other.rpartition("/")[0] == folder
+            and not other.lower().endswith(PACKAGE_SUFFIXES)]
+
+
+def extracted_size(file_path):
+    """解压该安装包（含同目录的附属文件）需要的磁盘空间"""
+    archive, info = _member_info(file_path)
+    members = archive_index(archive)
+    return info.file_size + sum(members[other].file_size for other in sidecars(members, info.filename))
+
+
+def extract_package(file_path, folder, cancel_event=None, block_size=EXTRACT_BLOCK):
+    """把安装包及其附属文件解压到 folder，返回 (安装包本地路径, SHA-256)
+
+    只使用成员的文件名（不保留包内目录），CRC 由 zipfile 在读到末尾时校验。
+    """
+    archive, name = split_member(file_path)
+    members = archive_index(archive)
+    os.makedirs(folder, exist_ok=True)
+    local_path = None
+    digest = None
+    import zipfile
+    try:
+        with zipfile.ZipFile(archive) as bundle:
+            for member in [name] + sidecars(members, name):
+                info = members[member]
+                target = os.path.join(folder, os.path.basename(member))
+                sha = hashlib.sha256() if member == name else None
+                with bundle.open(info) as src, open(target, "wb") as dst:
+                    while True:
+                        if cancel_event is not None and cancel_event.is_set():
+                            raise BundleError("已取消")
+                        block = src.read(block_size)
+                        if not block:
+                            break
+                        if sha is not None:
+                            sha.update(block)
+                        dst.write(block)
+                mode = (info.external_attr >> 16) & 0o777
+                if mode:
+                    os.chmod(target, mode)
+                if sha is not None:
+                    local_path, digest = target, sha.hexdigest()
+    except zipfile.BadZipFile as e:
+        raise BundleError(f"解压失败：{name}（{e}）")
+    return local_path, digest
+
+
+class BundleExtractor:
+    """批次内按需解压压缩包中的安装包（在安装事件循环中使用，接口与 staging.Stager 相同）
+
+    schedule(files) 设置本批次的安装顺序；acquire(file_path) 等待该包解压完成并返回本地路径，
+    同时开始解压其后 depth 个包；release(file_path) 删除解压出的文件。
+    on_extracted(file_path, local_path, sha256) 在每个包解压完成后调用。
+    """
+
+    def __init__(self, root=None, depth=DEFAULT_AHEAD, workers=DEFAULT_WORKERS, budget=DEFAULT_BUDGET,
+                 log=None, cancel_event=None, on_extracted=None):
+        self.root = root
+        self.depth = max(0, int(depth))
+        self.workers = max(1, int(workers))
+        self.budget = budget
+        self.log = log or (lambda message: None)
+        self.cancel_event = cancel_event
+        self.on_extracted = on_extracted
+        self.order = []
+        self.position = {}
+        self._jobs = {}
+        # 路径 → (解压目录, 占用字节数)
+        self._extracted = {}
+        self._needed = set()
+        self._on_disk = 0
+        self._freed = None
+        self._worker_slots = None
+        self._batch_root = None
+        self._serial = 0
+
+    def schedule(self, files):
+        self.order = [file_path for file_path in files if split_member(file_path) is not None]
+        self.position = {file_path: index for index, file_path in enumerate(self.order)}
+
+    async def acquire(self, file_path):
+        index = self.position.get(file_path)
+        if index is None:
+            self.order.append(file_path)
+            index = self.position[file_path] = len(self.order) - 1
+        if self._worker_slots is None:
+            self._worker_slots = asyncio.Semaphore(self.workers)
+            self._freed = asyncio.Event()
+        self._needed.add(file_path)
+        self._freed.set()
+        for upcoming in self.order[index:index + self.depth + 1]:
+            if upcoming not in self._jobs:
+                self._jobs[upcoming] = asyncio.ensure_future(self._extract(upcoming))
+        return await asyncio.shield(self._jobs[file_path])
+
+    def _fits(self, file_path, size):
+        # 正在等待安装的包不受上限约束，避免与提前解压的包互相等待
+        return file_path in self._needed or self._on_disk == 0 or self._on_disk + size <= self.budget
+
+    async def _extract(self, file_path):
+        loop = asyncio.get_running_loop()
+        size = await loop.run_in_executor(None, extracted_size, file_path)
+        while not self._fits(file_path, size):
+            self._freed.clear()
+            await self._freed.wait()
+        self._on_disk += size
+        try:
+            self._serial += 1
+            folder = os.path.join(self._root(), str(self._serial))
+            async with self._worker_slots:
+                start = time.perf_counter()
+                job = loop.run_in_executor(None, extract_package, file_path, folder, self.cancel_event)
+                try:
+                    local_path, digest = await asyncio.shield(job)
+                except asyncio.CancelledError:
+                    # 批次已结束，解压仍在线程池中进行：完成后删除
+                    job.add_done_callback(lambda _: shutil.rmtree(folder, ignore_errors=True))
+                    raise
+        except BaseException:
+            self._on_disk -= size
+            self._freed.set()
+            raise
+        self._extracted[file_path] = (folder, size)
+        self.log(f"🗜️ 已从压缩包解压：{os.path.basename(file_path)}（{size / (1024 * 1024):.1f} MB，"
+                 f"{time.perf_counter() - start:.1f} 秒）")
+        if self.on_extracted is not None:
+            self.on_extracted(file_path, local_path, digest)
+        return local_path
+
+    def _root(self):
+        if self._batch_root is None:
+            import tempfile
+            self._batch_root = tempfile.mkdtemp(prefix="flyinstaller-bundle-", dir=self.root)
+        return self._batch_root
+
+    def release(self, file_path):
+        self._needed.discard(file_path)
+        extracted = self._extracted.pop(file_path, None)
+        if extracted is None:
+            return
+        folder, size = extracted
+        shutil.rmtree(folder, ignore_errors=True)
+        self._on_disk -= size
+        if self._freed is not None:
+            self._freed.set()
+
+    def close(self):
+        """批次结束：取消未开始的解压并删除所有解压出的文件"""
+        for job in self._jobs.values():
+            job.cancel()
+        self._jobs = {}
+        for file_path in list(self._extracted):
+            self.release(file_path)
+        if self._batch_root is not None:
+            shutil.rmtree(self._batch_root, ignore_errors=True)
+            self._batch_root = None
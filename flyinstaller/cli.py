@@ -0,0 +1,605 @@
+"""无界面命令行模式（不导入 tkinter/customtkinter）
+
+用法：
+    python installer.py --packages D:\\package --target "D:\\Apps" --concurrency 4 --report result.json
+    python -m flyinstaller --packages ./package
+
+每个安装包结束时向 stdout 输出一行 JSON（命令、返回码、耗时），日志输出到 stderr，
+--report 指定时在结束后写入完整的 JSON 报告。
+批次进度记录在数据目录的 journal.jsonl 中：上次同一批次中途崩溃或被中断时，自动跳过已完成的安装包继续安装
+（--no-resume 重新开始）。
+上次成功安装后没有变化的安装包默认跳过（--force 全部重新安装）。
+同一产品有多个版本的安装包（如 app-1.2.exe、app-1.4.exe）时只安装最新版本（按 PE 版本资源、MSI 属性表
+或文件名中的版本号识别，见 metadata.py；--all-versions 全部安装）。
+每次尝试与每个安装包的结果记录在数据目录的 metrics.db（SQLite）中，用于估算耗时：每个安装包结束时
+输出按估算耗时加权的进度与剩余时间，--order sjf/ljf 按估算耗时短/长优先调度。
+返回码 1618（另一个安装正在进行）等暂时性错误按指数退避重试同一条命令（--retry-budget 为整批的重试次数），
+安装包损坏、平台不支持等致命错误不再尝试其他参数（分类规则见 retry.py，可在部署清单中按安装包调整）。
+--metrics-port 开启 Prometheus 指标（GET /metrics：完成、失败、待安装数，当前安装包，尝试与超时次数，累计耗时），
+默认只监听 127.0.0.1（--metrics-host 0.0.0.0 允许其他机器采集），见 exporter.py。
+--agent [主机:]端口 以代理端运行，--agents 主机:端口 ... 以控制端运行：控制端把安装计划推送给各代理端并汇总每台机器的结果，
+整个机群同时安装的包数不超过 --fleet-concurrency（见 fleet.py）。
+--workers N 时安装程序在 N 个工作进程中启动（输出批量发回，工作进程崩溃或卡死时自动替换并重新执行该次尝试）。
+开始安装前并发预检全部安装包（文件头是否完整、是否可读、管理员权限、目标磁盘空间），
+有错误时不开始安装（--preflight skip 跳过有问题的安装包继续，--preflight off 不预检）。
+.zip 压缩包中的安装包在安装前按需解压，安装后删除。
+安装包文件夹内（或与其并列）的 flyinstaller.toml / flyinstaller.json 为部署清单（--manifest 指定其他路径），
+声明每个安装包的参数、目标目录、成功返回码、依赖、并发组和重启要求（见 manifest.py）。
+安装包文件夹位于网络共享上时，安装前把接下来的安装包预取到本地临时目录（--stage on/off 强制开关）。
+各阶段耗时默认记录到数据目录 traces/ 下（--trace 指定文件，--no-trace 关闭），
+--export-trace 把追踪文件导出为 Chrome trace（chrome://tracing、ui.perfetto.dev 可打开）。
+退出码：0 全部成功，1 有安装包失败，130 被中断。
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+from . import paths
+from .engine import InstallEngine, DEFAULT_TIMEOUT, check_admin
+from .install_state import InstallState, UNCHANGED, describe_plan
+from .journal import open_batch
+from .manifest import ManifestError, find_manifest, load_manifest
+from .metrics import BatchProgress, MetricsStore, DEFAULT_ESTIMATE, format_eta
+from .preflight import run_preflight
+from .retry import BASE_DELAY, DEFAULT_RETRY_BUDGET
+from .scanner import PackageScanner
+from .scheduler import InstallScheduler, DEFAULT_LANES, ORDER_POLICIES, order_priority
+from .staging import DEFAULT_DEPTH, DEFAULT_BUDGET
+from .timeouts import DEFAULT_IDLE_WINDOW
+from .tracing import Tracer, NULL_TRACER, open_tracer, export_chrome
+
+# 启动耗时目标：从进程启动到开始扫描安装包（见 benchmarks/cli_startup.py）
+STARTUP_BUDGET_MS = 250
+
+DEFAULT_TARGET = "C:\\Program Files\\"
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="FlyInstaller", description="批量静默安装（无界面模式）")
+    parser.add_argument("--packages", default=paths.default_package_path(), help="安装包文件夹（默认：程序目录下的 package）")
+    parser.add_argument("--target", default=DEFAULT_TARGET, help="安装目标目录")
+    parser.add_argument("--depth", type=int, default=0, help="扫描子文件夹的层数（0 只扫描安装包文件夹本身，-1 不限）")
+    parser.add_argument("--include", action="append", metavar="GLOB",
+                        help="只安装匹配的安装包（可多次指定；含 / 时匹配相对路径，否则匹配文件名）")
+    parser.add_argument("--exclude", action="append", metavar="GLOB", help="跳过匹配的安装包或子文件夹（可多次指定）")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_LANES["exe"], help="EXE 安装包并发数")
+    parser.add_argument("--msi-concurrency", type=int, default=DEFAULT_LANES["msi"], help="MSI 安装包并发数（Windows Installer 全局锁，通常为1）")
+    parser.add_argument("--order", choices=list(ORDER_POLICIES), default="auto",
+                        help="调度顺序：auto 有部署清单时按关键路径、否则按扫描顺序；sjf 短作业优先；ljf 长作业优先")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="在 N 个工作进程中启动安装程序（0 在本进程中启动；通常设为各通道并发数之和）")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="没有历史耗时记录时的单次尝试超时（秒）")
+    parser.add_argument("--fixed-timeout", action="store_true", help="不按历史耗时调整超时，始终使用 --timeout")
+    parser.add_argument("--idle-window", type=float, default=DEFAULT_IDLE_WINDOW,
+                        help="进程树无 CPU/I/O 活动超过该秒数视为挂起（0 关闭）")
+    parser.add_argument("--retry-budget", type=int, default=DEFAULT_RETRY_BUDGET,
+                        help="暂时性错误（如 1618 另一个安装正在进行）整批最多重试的次数（0 不重试）")
+    parser.add_argument("--retry-delay", type=float, default=BASE_DELAY,
+                        help="暂时性错误第一次重试前的等待秒数（之后按指数增长并随机抖动）")
+    parser.add_argument("--report", help="JSON 报告输出路径")
+    parser.add_argument("--metrics-port", type=int, help="在该端口提供 Prometheus 指标（/metrics，默认关闭）")
+    parser.add_argument("--metrics-host", default="127.0.0.1", help="指标服务监听的地址（0.0.0.0 允许其他机器采集）")
+    parser.add_argument("--no-cache", action="store_true", help="不使用已学习的静默参数缓存")
+    parser.add_argument("--force", action="store_true", help="重新安装上次成功安装后没有变化的安装包")
+    parser.add_argument("--no-resume", action="store_true", help="不续装上次中断的批次，从头开始")
+    parser.add_argument("--all-versions", action="store_true", help="同一产品的旧版本安装包也安装（默认只安装最新版本）")
+    parser.add_argument("--stage", choices=("auto", "on", "off"), default="auto",
+                        help="预取安装包到本地后再安装（auto：安装包文件夹在网络共享上时启用）")
+    parser.add_argument("--stage-ahead", type=int, default=DEFAULT_DEPTH, help="提前预取的安装包个数")
+    parser.add_argument("--stage-budget", type=int, default=DEFAULT_BUDGET // (1024 * 1024),
+                        help="本地预取缓存上限（MB），超出时按最近最少使用淘汰")
+    parser.add_argument("--stage-dir", help="本地预取缓存目录（默认：系统临时目录下的 flyinstaller-staging）")
+    parser.add_argument("--manifest", help="部署清单路径（默认：安装包文件夹内或与其并列的 flyinstaller.toml/.json）")
+    parser.add_argument("--no-manifest", action="store_true", help="不使用部署清单")
+    parser.add_argument("--preflight", choices=("strict", "skip", "off"), default="strict",
+                        help="安装前预检：strict 有错误时不开始安装，skip 跳过有问题的安装包，off 不预检")
+    parser.add_argument("--agent", metavar="[HOST:]PORT",
+                        help="以代理端运行：监听该地址，执行控制端推送的安装计划（默认监听所有地址，需要 --fleet-token）")
+    parser.add_argument("--agents", nargs="+", metavar="HOST:PORT",
+                        help="以控制端运行：把安装包文件夹的安装计划推送给这些代理端，汇总各机器的结果")
+    parser.add_argument("--fleet-concurrency", type=int, default=4,
+                        help="控制端：整个机群同时安装的包数上限（避免挤满共享文件服务器）")
+    parser.add_argument("--fleet-token", help="代理端与控制端共用的令牌（默认读取环境变量 FLYINSTALLER_FLEET_TOKEN）")
+    parser.add_argument("--no-fingerprint", action="store_true", help="不识别安装框架，直接逐一尝试参数")
+    parser.add_argument("--quiet", action="store_true", help="不输出日志")
+    parser.add_argument("--trace", help="耗时追踪文件路径（JSON Lines，默认写入数据目录 traces/）")
+    parser.add_argument("--no-trace", action="store_true", help="不记录耗时追踪")
+    parser.add_argument("--export-trace", nargs=2, metavar=("TRACE_JSONL", "OUTPUT_JSON"),
+                        help="把追踪文件导出为 Chrome trace 后退出（不执行安装）")
+    return parser
+
+
+def stderr_log(message):
+    print(f"{time.strftime('[%H:%M:%S]')} {message}", file=sys.stderr, flush=True)
+
+
+def emit_result(outcome):
+    print(json.dumps(outcome.to_dict(), ensure_ascii=False), flush=True)
+
+
+async def run_batch(engine, files, lanes, options=None, progress=None):
+    """执行整批安装，中断（Ctrl+C）时结束正在运行的进程树
+
+    options 为调度参数（部署清单的依赖与并发组、调度顺序），progress（BatchProgress）用于输出进度与剩余时间。
+    """
+    loop = asyncio.get_running_loop()
+
+    def on_result(file_path, success):
+        emit_result(engine.outcomes[file_path])
+        if progress is not None:
+            progress.finish(file_path)
+            engine.log(f"⏳ 进度 {progress.fraction():.0%}，{format_eta(progress.eta())}")
+
+    scheduler = InstallScheduler(
+        engine.install_file,
+        lanes=lanes,
+        cancel_event=engine.cancel_event,
+        on_start=progress.start if progress is not None else None,
+        on_result=on_result,
+        on_cancel=lambda: loop.run_in_executor(None, engine.cancel),
+        on_blocked=engine.block,
+        tracer=engine.tracer,
+        **(options or {})
+    )
+    engine.begin_batch(files)
+    try:
+        return await scheduler.run(files)
+    except asyncio.CancelledError:
+        await scheduler.cancel()
+        raise
+    finally:
+        engine.end_batch()
+
+
+def open_switch_cache(args):
+    if args.no_cache:
+        return None
+    from .switch_cache import SwitchCache
+    try:
+        return SwitchCache(paths.data_path("switch_cache.json"))
+    except OSError:
+        return None
+
+
+def open_install_state(switch_cache):
+    """打开安装状态索引；有参数缓存时复用其内容哈希"""
+    try:
+        return InstallState(paths.data_path("install_state.json"),
+                            hasher=switch_cache.content_hash if switch_cache is not None else None)
+    except OSError:
+        return None
+
+
+def open_scanner(args):
+    """带目录索引缓存的扫描器，数据目录不可写时不使用缓存"""
+    try:
+        index_path = paths.data_path("scan_index.json")
+    except OSError:
+        index_path = None
+    return PackageScanner(index_path, max_depth=None if args.depth < 0 else args.depth,
+                          include=args.include, exclude=args.exclude)
+
+
+def open_runtime_history(args):
+    if args.fixed_timeout:
+        return None
+    from .timeouts import RuntimeHistory
+    try:
+        return RuntimeHistory(paths.data_path("runtimes.json"))
+    except OSError:
+        return None
+
+
+def open_trace(args):
+    if args.no_trace:
+        return NULL_TRACER
+    try:
+        return Tracer(args.trace) if args.trace else open_tracer()
+    except OSError:
+        return NULL_TRACER
+
+
+def open_journal(args, files, log):
+    """打开批次日志，返回 (journal, 上次中断的批次状态)；日志不可写时不记录"""
+    try:
+        journal, resume = open_batch(paths.data_path("journal.jsonl"), files, args.target, resume=not args.no_resume)
+    except OSError as e:
+        log(f"⚠️ 批次日志不可用，中断后无法续装：{e}")
+        return None, None
+    if resume is not None:
+        done = len(files) - len(resume.remaining())
+        log(f"🔁 继续上次中断的批次：跳过已完成的 {done} 个安装包")
+    return journal, resume
+
+
+def select_latest_versions(args, files, log):
+    """读取安装包版本信息，返回 (要安装的安装包, {旧版本: 取代它的新版本})；--all-versions 时不筛选"""
+    if args.all_versions:
+        return files, {}
+    from .metadata import MetadataCache, select_latest
+    try:
+        cache = MetadataCache(paths.data_path("metadata.json"))
+    except OSError:
+        cache = MetadataCache()
+    latest, superseded = select_latest(files, cache.read_all(files))
+    for old, new in superseded.items():
+        log(f"⏭️ {os.path.basename(old)} 是旧版本，安装 {os.path.basename(new)}")
+    return latest, superseded
+
+
+def open_metrics():
+    try:
+        return MetricsStore(paths.data_path("metrics.db"))
+    except OSError:
+        return None
+
+
+def open_exporter(args, log):
+    """--metrics-port 指定时启动指标服务，返回 (BatchStats, MetricsExporter)；未开启或端口不可用时返回 (None, None)"""
+    if args.metrics_port is None:
+        return None, None
+    from .exporter import BatchStats, MetricsExporter
+    stats = BatchStats()
+    try:
+        exporter = MetricsExporter(stats, args.metrics_port, args.metrics_host).start()
+    except OSError as e:
+        log(f"⚠️ 指标服务无法启动：{e}")
+        return None, None
+    log(f"📈 Prometheus 指标：http://{exporter.host}:{exporter.port}/metrics")
+    return stats, exporter
+
+
+def open_worker_pool(args, cancel_event, log):
+    """--workers 大于 0 时创建安装工作进程池"""
+    if args.workers <= 0:
+        return None
+    from .workers import WorkerPool
+    log(f"🧩 安装程序在 {args.workers} 个工作进程中启动")
+    return WorkerPool(args.workers, cancel_event=cancel_event, log=log)
+
+
+def open_plan(args, files, history, log, estimates=None):
+    """读取并编译部署清单，没有清单时返回 None；清单有误时抛出 ManifestError"""
+    if args.no_manifest:
+        return None
+    path = args.manifest or find_manifest(args.packages)
+    if path is None:
+        return None
+    try:
+        manifest = load_manifest(path)
+    except OSError as e:
+        raise ManifestError(f"无法读取 {path}：{e}")
+    plan = manifest.compile(files, args.packages, history=history, log=log, estimates=estimates)
+    log(f"📜 部署清单 {path}：{plan.describe()}")
+    return plan
+
+
+def open_stager(args, log, cancel_event, package_dir=None):
+    from .staging import create_stager
+    return create_stager(package_dir or args.packages, mode=args.stage, depth=args.stage_ahead,
+                         budget=args.stage_budget * 1024 * 1024, root=args.stage_dir,
+                         log=log, cancel_event=cancel_event)
+
+
+def package_results(files, engine, skipped, resume=None, rejected=None, superseded=None):
+    """每个安装包的最终结果（本次执行、上次中断前完成、未变化跳过、预检未通过、旧版本、未执行）"""
+    packages = []
+    rejected = rejected or {}
+    superseded = superseded or {}
+    for file_path in files:
+        outcome = engine.outcomes.get(file_path)
+        if outcome is not None:
+            packages.append(outcome.to_dict())
+        elif file_path in superseded:
+            packages.append({"name": os.path.basename(file_path), "path": file_path,
+                             "status": "superseded", "superseded_by": superseded[file_path]})
+        elif file_path in rejected:
+            packages.append({"name": os.path.basename(file_path), "path": file_path,
+                             "status": "invalid", "error": rejected[file_path]})
+        elif resume is not None and file_path in resume.statuses:
+            # 上次中断前已完成
+            packages.append({"name": os.path.basename(file_path), "path": file_path,
+                             "status": resume.statuses[file_path], "resumed": True})
+        elif file_path in skipped:
+            packages.append({"name": os.path.basename(file_path), "path": file_path, "status": UNCHANGED})
+        else:
+            packages.append({"name": os.path.basename(file_path), "path": file_path, "status": "skipped"})
+    return packages
+
+
+def write_report(path, args, packages, started, elapsed):
+    report = {
+        "packages_dir": args.packages,
+        "target": args.target,
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(started)),
+        "duration": round(elapsed, 3),
+        "succeeded": sum(1 for item in packages if item["status"] == "succeeded"),
+        "failed": sum(1 for item in packages if item["status"] == "failed"),
+        "unchanged": sum(1 for item in packages if item["status"] == UNCHANGED),
+        "blocked": sum(1 for item in packages if item["status"] == "blocked"),
+        "invalid": sum(1 for item in packages if item["status"] == "invalid"),
+        "superseded": sum(1 for item in packages if item["status"] == "superseded"),
+        "retries": sum(item.get("retries", 0) for item in packages),
+        "reboot_required": [item["path"] for item in packages if item.get("reboot")],
+        "packages": packages,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    log = (lambda message: None) if args.quiet else stderr_log
+    if args.export_trace:
+        source, output = args.export_trace
+        try:
+            count = export_chrome(source, output)
+        except OSError as e:
+            log(f"❌ 导出追踪失败：{e}")
+            return 1
+        log(f"✅ 已导出 {count} 个事件：{output}")
+        return 0
+    if args.agents:
+        return run_controller(args, log)
+    tracer = open_trace(args)
+    try:
+        if args.agent:
+            return run_agent(args, log, tracer)
+        return run(args, log, tracer)
+    finally:
+        tracer.close()
+
+
+def run(args, log, tracer):
+    try:
+        with tracer.span("scan", cat="scan", folder=args.packages) as span:
+            scanner = open_scanner(args)
+            files = scanner.scan(args.packages, log=log)
+            span.args["packages"] = len(files)
+            span.args["cached_dirs"] = scanner.hits
+    except OSError as e:
+        log(f"❌ 读取安装包文件夹失败：{e}")
+        return 1
+    if not files:
+        log(f"⚠️ {args.packages} 中未找到.exe或.msi安装包")
+        return 0
+    with tracer.span("metadata", cat="scan", packages=len(files)):
+        latest, superseded = select_latest_versions(args, files, log)
+    history = open_runtime_history(args)
+    metrics = open_metrics()
+    try:
+        estimates = metrics.estimate_all(files) if metrics is not None else {}
+    except OSError as e:
+        log(f"⚠️ 无法读取安装指标，不估算耗时：{e}")
+        estimates = {}
+    try:
+        plan = open_plan(args, files, history, log, estimates=estimates or None)
+    except ManifestError as e:
+        log(f"❌ 部署清单有误：{e}")
+        return 1
+    log(f"🚀 开始批量安装，共 {len(files)} 个安装包")
+    switch_cache = open_switch_cache(args)
+    install_state = open_install_state(switch_cache)
+    pending = latest
+    if install_state is not None:
+        pending, kinds = install_state.plan(latest, args.target, force=args.force)
+        log(f"📋 {describe_plan(kinds)}" + ("（强制全部重新安装）" if args.force else ""))
+    skipped = set(latest) - set(pending)
+    rejected = {}
+    if args.preflight != "off" and pending:
+        report = run_preflight(pending, args.target, admin_check=check_admin)
+        for line in report.lines():
+            log(line)
+        if report.batch_errors() or (report.errors and args.preflight == "strict"):
+            log("⛔ 预检未通过，未开始安装（--preflight skip 跳过有问题的安装包，--preflight off 不预检）")
+            return 1
+        rejected = {issue.file_path: issue.message for issue in report.errors}
+        if rejected:
+            log(f"⏭️ 跳过预检未通过的 {len(rejected)} 个安装包")
+            pending = [file_path for file_path in pending if file_path not in rejected]
+    # 批次日志按完整列表记录，跳过未变化的包不影响中断后的续装
+    journal, resume = open_journal(args, files, log)
+    if resume is not None:
+        remaining = set(resume.remaining())
+        pending = [file_path for file_path in pending if file_path in remaining]
+
+    cancel_event = threading.Event()
+    pool = open_worker_pool(args, cancel_event, log) if pending else None
+    stats, exporter = open_exporter(args, log)
+    engine = InstallEngine(
+        args.target,
+        log=log,
+        cancel_event=cancel_event,
+        timeout=args.timeout,
+        fingerprint=not args.no_fingerprint,
+        switch_cache=switch_cache,
+        tracer=tracer,
+        history=history,
+        idle_window=args.idle_window,
+        journal=journal,
+        resume_attempts=resume.attempts if resume is not None else None,
+        install_state=install_state,
+        stager=open_stager(args, log, cancel_event) if pending else None,
+        package_settings=plan.settings if plan is not None else None,
+        metrics=metrics,
+        retry_budget=args.retry_budget,
+        retry_delay=args.retry_delay,
+        launcher=pool,
+        tracker=pool,
+        stats=stats
+    )
+    options = plan.scheduler_options() if plan is not None else {}
+    priority = order_priority(args.order, estimates)
+    if priority is not None:
+        options["priority"] = priority
+        log(f"🔀 调度顺序：{ORDER_POLICIES[args.order]}")
+    progress = BatchProgress({file_path: estimates.get(file_path, DEFAULT_ESTIMATE) for file_path in pending})
+    lanes = {"exe": args.concurrency, "msi": args.msi_concurrency}
+    started = time.time()
+    start = time.perf_counter()
+    interrupted = False
+    try:
+        asyncio.run(run_batch(engine, pending, lanes, options, progress))
+    except KeyboardInterrupt:
+        interrupted = True
+        log("🛑 已中断，正在结束安装进程（下次运行时继续）")
+    finally:
+        if journal is not None:
+            # 中断时保留进度，正常结束时整理日志
+            if interrupted:
+                journal.close()
+            else:
+                journal.complete()
+        if metrics is not None:
+            metrics.close()
+        if pool is not None:
+            pool.close()
+        if exporter is not None:
+            exporter.close()
+    elapsed = time.perf_counter() - start
+
+    packages = package_results(files, engine, skipped, resume, rejected, superseded)
+    if args.report:
+        write_report(args.report, args, packages, started, elapsed)
+    succeeded = sum(1 for item in packages if item["status"] == "succeeded")
+    unchanged = sum(1 for item in packages if item["status"] == UNCHANGED)
+    log(f"✅ 批量安装结束，成功 {succeeded}/{len(latest) - unchanged}（跳过未变化 {unchanged} 个"
+        + (f"、旧版本 {len(superseded)} 个" if superseded else "") + f"），用时 {elapsed:.1f} 秒")
+    reboot = [item["name"] for item in packages if item.get("reboot")]
+    if reboot:
+        log(f"🔁 需要重启计算机：{'、'.join(reboot)}")
+    if interrupted:
+        return 130
+    return 0 if succeeded + unchanged == len(latest) else 1
+
+
+def fleet_token(args):
+    from .fleet import TOKEN_ENV
+    return args.fleet_token or os.environ.get(TOKEN_ENV) or None
+
+
+def run_agent(args, log, tracer):
+    """代理端：监听端口，用本机的安装引擎执行控制端推送的安装计划（Ctrl+C 退出）"""
+    from .fleet import FleetAgent, parse_address
+    host, port = parse_address(args.agent, default_host="0.0.0.0")
+    token = fleet_token(args)
+    if token is None and host not in ("127.0.0.1", "localhost", "::1"):
+        log("⛔ 代理端监听其他机器可访问的地址时必须设置令牌（--fleet-token 或环境变量 FLYINSTALLER_FLEET_TOKEN）")
+        return 1
+    switch_cache = open_switch_cache(args)
+    history = open_runtime_history(args)
+    metrics = open_metrics()
+    stats, exporter = open_exporter(args, log)
+
+    def make_engine(plan, cancel_event):
+        return InstallEngine(
+            plan.get("target") or args.target,
+            log=log,
+            cancel_event=cancel_event,
+            timeout=args.timeout,
+            fingerprint=not args.no_fingerprint,
+            switch_cache=switch_cache,
+            tracer=tracer,
+            history=history,
+            idle_window=args.idle_window,
+            install_state=open_install_state(switch_cache),
+            stager=open_stager(args, log, cancel_event, plan.get("packages_dir")),
+            metrics=metrics,
+            retry_budget=args.retry_budget,
+            retry_delay=args.retry_delay,
+            stats=stats
+        )
+
+    agent = FleetAgent(make_engine, token=token, log=log)
+
+    async def serve():
+        server = await agent.start(host, port)
+        log(f"🛰️ 代理端已启动，监听 {host}:{agent.port}，等待控制端推送安装计划")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        log("🛑 代理端已退出")
+    except OSError as e:
+        log(f"❌ 代理端无法启动：{e}")
+        return 1
+    finally:
+        if metrics is not None:
+            metrics.close()
+        if exporter is not None:
+            exporter.close()
+    return 0
+
+
+def run_controller(args, log):
+    """控制端：扫描安装包文件夹，把安装计划推送给 --agents 中的代理端，汇总每台机器的结果
+
+    安装包路径原样发给代理端，安装包文件夹应为各机器都能以同一路径访问的共享目录（如 \\server\share\package）。
+    """
+    from .fleet import FleetController
+    try:
+        files = open_scanner(args).scan(args.packages, log=log)
+    except OSError as e:
+        log(f"❌ 读取安装包文件夹失败：{e}")
+        return 1
+    if not files:
+        log(f"⚠️ {args.packages} 中未找到.exe或.msi安装包")
+        return 0
+    latest, superseded = select_latest_versions(args, files, log)
+    controller = FleetController(
+        args.agents, latest, args.target,
+        packages_dir=args.packages,
+        concurrency=args.fleet_concurrency,
+        token=fleet_token(args),
+        force=args.force,
+        lanes={"exe": args.concurrency, "msi": args.msi_concurrency},
+        log=log,
+        on_result=lambda agent, outcome: print(json.dumps({"agent": agent, **outcome}, ensure_ascii=False), flush=True)
+    )
+    started = time.time()
+    start = time.perf_counter()
+    try:
+        results = asyncio.run(controller.run())
+    except KeyboardInterrupt:
+        log("🛑 已中断，代理端将结束正在运行的安装")
+        return 130
+    elapsed = time.perf_counter() - start
+    ok = 0
+    for agent, packages in results.items():
+        succeeded = sum(1 for outcome in packages.values() if outcome.get("status") in ("succeeded", UNCHANGED))
+        ok += succeeded
+        log(f"🖥️ {agent}：成功 {succeeded}/{len(packages)}")
+    total = len(latest) * len(args.agents)
+    log(f"✅ 机群安装结束，成功 {ok}/{total}，用时 {elapsed:.1f} 秒")
+    if args.report:
+        write_fleet_report(args.report, args, results, started, elapsed)
+    return 0 if ok == total else 1
+
+
+def write_fleet_report(path, args, results, started, elapsed):
+    agents = {}
+    for agent, packages in results.items():
+        items = list(packages.values())
+        agents[agent] = {
+            "succeeded": sum(1 for item in items if item.get("status") == "succeeded"),
+            "failed": sum(1 for item in items if item.get("status") == "failed"),
+            "unchanged": sum(1 for item in items if item.get("status") == UNCHANGED),
+            "lost": sum(1 for item in items if item.get("status") == "lost"),
+            "packages": items,
+        }
+    report = {
+        "packages_dir": args.packages,
+        "target": args.target,
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(started)),
+        "duration": round(elapsed, 3),
+        "fleet_concurrency": args.fleet_concurrency,
+        "agents": agents,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,208 @@
+"""安装框架识别：读取 PE 头、资源节与附加数据（overlay），直接给出对应的静默命令
+
+所有读取都通过 mmap 并限制在固定窗口内，单个文件的识别耗时在毫秒级，
+与安装包体积无关。无法识别的安装包返回 None，由引擎回退到参数逐一尝试。
+"""
+import mmap
+import os
+import struct
+
+# 各区域最大扫描字节数
+HEAD_WINDOW = 1024 * 1024
+RSRC_WINDOW = 1024 * 1024
+OVERLAY_WINDOW = 256 * 1024
+
+# 框架名称 → 界面显示名称
+FRAMEWORK_NAMES = {
+    "wix_burn": "WiX Burn",
+    "nsis": "NSIS",
+    "inno": "Inno Setup",
+    "installshield": "InstallShield",
+    "squirrel": "Squirrel",
+    "advanced_installer": "Advanced Installer",
+    "installaware": "InstallAware",
+    "setup_factory": "Setup Factory",
+    "wise": "Wise",
+}
+
+# 特征串（按识别优先级排列）：(框架, 特征字节, 是否同时匹配UTF-16LE形式)
+SIGNATURES = [
+    ("nsis", b"\xef\xbe\xad\xdeNullsoftInst", False),
+    ("nsis", b"Nullsoft.NSIS.exehead", False),
+    ("inno", b"Inno Setup Setup Data", False),
+    ("inno", b"rDlPtS\xcd\xe6\xd7\x7b\x0b\x2a", False),
+    ("inno", b"JR.Inno.Setup", False),
+    ("installshield", b"InstallShield", True),
+    ("squirrel", b"SquirrelSetup", True),
+    ("squirrel", b"Squirrel.Windows", True),
+    ("advanced_installer", b"Advanced Installer", True),
+    ("advanced_installer", b"Caphyon", True),
+    ("installaware", b"InstallAware", True),
+    ("setup_factory", b"Setup Factory", True),
+    ("wise", b"WiseMain", True),
+]
+
+# 各框架已成功的返回码（3010/1641 表示需要重启，259 表示仍在运行）
+FRAMEWORK_SUCCESS_CODES = (0, 259, 1641, 3010)
+
+
+# PE 文件头 Machine 字段 → 平台
+PE_MACHINES = {0x14C: "x86", 0x8664: "x64", 0x1C4: "arm", 0xAA64: "arm64"}
+
+
+class PEHeader:
+    """PE 文件头中用到的字段
+
+    sections 为 (节名, 虚拟地址, 虚拟大小, 文件偏移, 文件内大小)；resource_rva 为资源目录的 RVA，没有资源时为 None。
+    """
+
+    def __init__(self, machine, sections, resource_rva=None):
+        self.machine = machine
+        self.sections = sections
+        self.resource_rva = resource_rva
+
+    @property
+    def platform(self):
+        """x86 / x64 / arm / arm64，未知的 Machine 为 None"""
+        return PE_MACHINES.get(self.machine)
+
+    @property
+    def overlay_start(self):
+        """节数据之后的附加数据（overlay）起始偏移"""
+        return max((offset + size for _, _, _, offset, size in self.sections), default=0)
+
+
+def read_pe_header(view):
+    """解析 PE 文件头、资源目录位置与节表；非 PE 文件返回 None"""
+    if len(view) < 0x40 or view[:2] != b"MZ":
+        return None
+    pe_offset = struct.unpack_from("<I", view, 0x3C)[0]
+    if pe_offset + 24 > len(view) or view[pe_offset:pe_offset + 4] != b"PE\0\0":
+        return None
+    machine, section_count = struct.unpack_from("<HH", view, pe_offset + 4)
+    optional_size, = struct.unpack_from("<H", view, pe_offset + 20)
+    optional = pe_offset + 24
+    resource_rva = None
+    if optional + 2 <= len(view):
+        magic, = struct.unpack_from("<H", view, optional)
+        # 数据目录在 PE32 / PE32+ 可选头中的偏移，资源目录是第 3 项
+        directories = optional + {0x10B: 96, 0x20B: 112}.get(magic, 0)
+        if directories != optional and directories + 24 <= len(view) and \
+                struct.unpack_from("<I", view, directories - 4)[0] > 2:
+            resource_rva = struct.unpack_from("<I", view, directories + 16)[0] or None
+    table = optional + optional_size
+    sections = []
+    for i in range(min(section_count, 96)):
+        entry = table + i * 40
+        if entry + 40 > len(view):
+            break
+        name = bytes(view[entry:entry + 8]).rstrip(b"\0")
+        virtual_size, virtual_address, raw_size, raw_offset = struct.unpack_from("<IIII", view, entry + 8)
+        sections.append((name, virtual_address, virtual_size, raw_offset, raw_size))
+    return PEHeader(machine, sections, resource_rva)
+
+
+def read_pe_layout(view):
+    """解析 PE 头，返回 (节表列表, overlay起始偏移)；非 PE 文件返回 None
+
+    节表元素为 (节名, 文件偏移, 文件内大小)。
+    """
+    header = read_pe_header(view)
+    if header is None:
+        return None
+    return [(name, offset, size) for name, _, _, offset, size in header.sections], header.overlay_start
+
+
+def _windows(view, sections, overlay_start):
+    """需要扫描的有界字节窗口"""
+    size = len(view)
+    yield view[:min(size, HEAD_WINDOW)]
+    for name, offset, raw_size in sections:
+        if name == b".rsrc" and offset < size:
+            yield view[offset:min(size, offset + min(raw_size, RSRC_WINDOW))]
+    if 0 < overlay_start < size:
+        yield view[overlay_start:min(size, overlay_start + OVERLAY_WINDOW)]
+
+
+def detect_framework(file_path):
+    """识别 .exe 安装包使用的安装框架，返回框架标识或 None"""
+    try:
+        with open(file_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < 0x40:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                layout = read_pe_layout(view)
+                if layout is None:
+                    return None
+                sections, overlay_start = layout
+                # WiX Burn 引导程序带有专用节 .wixburn
+                if any(name == b".wixburn" for name, _, _ in sections):
+                    return "wix_burn"
+                chunks = list(_windows(view, sections, overlay_start))
+    except (OSError, ValueError, struct.error):
+        return None
+
+    for framework, signature, wide in SIGNATURES:
+        patterns = [signature]
+        if wide:
+            patterns.append(signature.decode("latin-1").encode("utf-16-le"))
+        for chunk in chunks:
+            if any(pattern in chunk for pattern in patterns):
+                return framework
+    return None
+
+
+def _short_path(path):
+    """Windows 8.3 短路径（不含空格）；目录不存在、卷上未启用短文件名或非 Windows 时返回 None"""
+    if os.name != "nt":
+        return None
+    import ctypes
+    buffer = ctypes.create_unicode_buffer(32768)
+    length = ctypes.windll.kernel32.GetShortPathNameW(path, buffer, len(buffer))
+    if not 0 < length < len(buffer):
+        return None
+    return buffer.value
+
+
+def nsis_target(target_path):
+    """NSIS /D= 使用的目录，无法安全传递时返回 None（使用安装包默认路径）
+
+    NSIS 把 /D= 之后的整段命令行原样作为目录，不能带引号；而命令以参数列表启动，
+    含空格的参数会被整体加上引号（如默认的 C:\\Program Files\\），NSIS 无法识别。
+    含空格时改用 8.3 短路径，短路径仍含空格时不传 /D。
+    """
+    if not any(char.isspace() for char in target_path):
+        return target_path
+    short = _short_path(target_path)
+    if short and not any(char.isspace() for char in short):
+        return short
+    return None
+
+
+def silent_command(framework, file_path, target_path):
+    """生成指定框架的静默安装命令（目标目录为空时使用安装包默认路径）"""
+    if framework == "inno":
+        cmd = [file_path, "/VERYSILENT", "/SUPPRESSMSGBOXES", "/NORESTART", "/SP-"]
+        if target_path:
+            cmd.append(f"/DIR={target_path}")
+        return cmd
+    if framework == "nsis":
+        cmd = [file_path, "/S"]
+        target = nsis_target(target_path) if target_path else None
+        if target:
+            # /D= 必须是最后一个参数
+            cmd.append(f"/D={target}")
+        return cmd
+    if framework == "installshield":
+        return [file_path, "/s", "/v/qn /norestart"]
+    if framework == "wix_burn":
+        return [file_path, "/quiet", "/norestart"]
+    if framework == "squirrel":
+        return [file_path, "--silent"]
+    if framework == "advanced_installer":
+        return [file_path, "/exenoui", "/qn", "/norestart"]
+    if framework in ("installaware", "wise"):
+        return [file_path, "/s"]
+    if framework == "setup_factory":
+        return [file_path, "/S"]
+    raise ValueError(f"未知安装框架：{framework}")
@@ -0,0 +1,676 @@
+"""单个安装包的静默安装逻辑（从 GUI 中拆出，不依赖 Tk）"""
+import asyncio
+import contextvars
+import functools
+import inspect
+import os
+import subprocess
+import threading
+import time
+
+from .bundles import BundleExtractor, split_member
+from .detect import detect_framework, silent_command, FRAMEWORK_NAMES
+from .metrics import new_batch_id
+from .process import AsyncLauncher
+from .proctree import InstallCancelled, ProcessTracker
+from .retry import (BASE_DELAY, BUSY_CODES, DEFAULT_RETRY_BUDGET, FATAL, REBOOT, SUCCESS, TRANSIENT,
+                    RetryBudget, RetryPolicy, backoff_delay, describe_code)
+from .switch_cache import expand_template
+from .timeouts import DEFAULT_IDLE_WINDOW
+from .tracing import NULL_TRACER
+
+# 常见的EXE静默参数（按尝试顺序）
+EXE_SILENT_PARAMS = ["/S", "/verysilent", "/silent", "/quiet", "/qn", "/norestart"]
+
+# MSI 成功返回码（微软官方）
+MSI_SUCCESS_CODES = (0, 1641, 3010, 259)
+
+# 已学习参数再次执行时视为成功的返回码
+LEARNED_SUCCESS_CODES = (0, 259, 1641, 3010)
+
+# 没有历史耗时记录时单次尝试的超时（秒）；卡住的安装程序由挂起检测提前结束，这里只作兜底
+DEFAULT_TIMEOUT = 1800
+
+# 不做挂起检测的程序：msiexec 客户端进程只等待 Windows Installer 服务，安装期间本身一直空闲
+IDLE_EXEMPT = ("msiexec", "msiexec.exe")
+
+
+def safe_decode(byte_data):
+    """安全解码字节流（流式启动器已返回解码后的文本，直接使用）"""
+    if not byte_data:
+        return ""
+    if isinstance(byte_data, str):
+        return byte_data
+    encodings = ['utf-8', 'gbk', 'gb2312', 'latin-1']
+    for encoding in encodings:
+        try:
+            return byte_data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return byte_data.decode('utf-8', errors='ignore')
+
+
+class InstallOutcome:
+    """单个安装包的执行记录（命令、返回码、尝试次数、耗时），供报告使用"""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.status = "pending"
+        self.command = None
+        self.returncode = None
+        self.attempts = 0
+        self.duration = 0.0
+        self.timeout = None
+        self.reboot = False
+        # 暂时性错误（如 1618）的重试次数
+        self.retries = 0
+
+    def to_dict(self):
+        return {
+            "name": os.path.basename(self.file_path),
+            "path": self.file_path,
+            "status": self.status,
+            "command": self.command,
+            "returncode": self.returncode,
+            "attempts": self.attempts,
+            "timeout": self.timeout,
+            "duration": round(self.duration, 3),
+            "reboot": self.reboot,
+            "retries": self.retries,
+        }
+
+
+# 当前协程正在安装的包的执行记录（并发安装时各任务互不影响）
+_current_outcome = contextvars.ContextVar("current_outcome", default=None)
+
+
+def check_admin():
+    """管理员权限检测：返回 True/False，无法检测时抛出异常"""
+    import ctypes
+    return bool(ctypes.windll.shell32.IsUserAnAdmin())
+
+
+class InstallEngine:
+    """安装引擎：负责单个安装包的参数尝试与结果判断
+
+    所有安装方法都是协程，需要在事件循环中运行（GUI 通过 InstallRuntime 的后台事件循环调用）。
+
+    launcher 可替换为任意 ``launcher(cmd, timeout, new_console=False, on_output=None, idle_window=None)`` 可调用对象，
+    返回 (返回码, stdout, stderr)，便于在 Linux 上用假安装脚本驱动整个流程；
+    协程形式的 launcher 直接 await，普通函数放到线程池中执行，不阻塞事件循环。
+    安装程序的输出通过 on_output 实时写入日志，返回值只用于失败摘要。
+    单次尝试的超时按 history（timeouts.RuntimeHistory）中该安装包以往的耗时计算，没有记录时为 timeout；
+    idle_window 秒内进程树没有 CPU/I/O 活动即视为挂起（0 或 None 关闭）。
+    journal（journal.BatchJournal）记录每次尝试与最终状态，用于崩溃后续装；
+    resume_attempts 为 {路径: 上次已开始的尝试次数}，续装时这些尝试直接跳过，从下一个参数继续。
+    install_state（install_state.InstallState）记录成功安装的安装包，供下次增量安装时跳过未变化的包。
+    stager（staging.Stager）把安装包预取到本地，安装程序从本地副本运行；结果、日志、历史记录仍使用原路径。
+    压缩包中的安装包由 extractor（bundles.BundleExtractor，未指定时按需创建）提前解压，安装后删除。
+    一批安装前后分别调用 begin_batch(files) 与 end_batch()。
+    metrics（metrics.MetricsStore）记录每次尝试与每个安装包的结果，用于估算耗时、进度与调度顺序。
+    package_settings 为 {路径: manifest.PackageRule}，部署清单中声明的参数、目标目录、成功返回码与重启要求优先于自动识别。
+    每次尝试的返回码按 retry.RetryPolicy 分类：暂时性错误（如 1618 另一个安装正在进行）从 retry_delay 秒开始
+    按指数退避重试同一条命令，整批最多重试 retry_budget 次；致命错误及重试后机器仍在忙时不再尝试其他参数。
+    tracer 记录每个安装包、每次参数尝试、管理员检测、重试等阶段的耗时（见 tracing.Tracer）。
+    stats（exporter.BatchStats）统计完成、失败、正在安装的安装包与尝试、超时次数，供 Prometheus 指标导出。
+    """
+
+    def __init__(self, target_path, log=None, launcher=None, cancel_event=None,
+                 silent_params=None, timeout=DEFAULT_TIMEOUT, admin_check=check_admin,
+                 fingerprint=True, switch_cache=None, tracker=None, tracer=None,
+                 history=None, idle_window=DEFAULT_IDLE_WINDOW, journal=None, resume_attempts=None,
+                 install_state=None, stager=None, extractor=None, package_settings=None,
+                 metrics=None, retry_budget=DEFAULT_RETRY_BUDGET, retry_delay=BASE_DELAY, stats=None):
+        self.target_path = target_path
+        self.log = log or (lambda message: None)
+        self.cancel_event = cancel_event or threading.Event()
+        self.tracker = tracker or ProcessTracker(self.cancel_event)
+        self.launcher = launcher or AsyncLauncher(self.tracker)
+        self._launcher_is_async = inspect.iscoroutinefunction(self.launcher) or \
+            inspect.iscoroutinefunction(getattr(self.launcher, "__call__", None))
+        self.silent_params = list(silent_params or EXE_SILENT_PARAMS)
+        self.timeout = timeout
+        self.admin_check = admin_check
+        self.fingerprint = fingerprint
+        self.switch_cache = switch_cache
+        self.tracer = tracer or NULL_TRACER
+        self.history = history
+        self.idle_window = idle_window
+        self.journal = journal
+        self.resume_attempts = dict(resume_attempts or {})
+        self.install_state = install_state
+        self.stager = stager
+        self.extractor = extractor
+        self.package_settings = dict(package_settings or {})
+        self.metrics = metrics
+        self.stats = stats
+        self.batch_id = new_batch_id()
+        self.retry_budget = RetryBudget(retry_budget)
+        self.retry_delay = retry_delay
+        # 安装包路径 → RetryPolicy
+        self._policies = {}
+        if stager is not None and stager.on_staged is None:
+            # 复制时算出的哈希写入参数缓存，之后查询参数不再通过网络重新读取安装包
+            stager.on_staged = self.on_staged
+        # 安装包路径 → InstallOutcome
+        self.outcomes = {}
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        """立即取消：设置取消标志并结束所有正在运行的安装进程树，返回 (结束的进程数, 耗时秒)"""
+        return self.tracker.cancel()
+
+    async def run(self, cmd, new_console=False, watch_idle=True):
+        """执行一次安装尝试（超时为单次尝试的时限）；watch_idle=False 时不做挂起检测（如需要用户操作的手动安装）"""
+        outcome = _current_outcome.get()
+        timeout = outcome.timeout if outcome is not None and outcome.timeout else self.timeout
+        kwargs = {"new_console": new_console, "on_output": self.on_output}
+        if watch_idle and self.idle_window and os.path.basename(cmd[0]).lower() not in IDLE_EXEMPT:
+            kwargs["idle_window"] = self.idle_window
+        call = functools.partial(self.launcher, cmd, timeout, **kwargs)
+        if outcome is not None:
+            outcome.attempts += 1
+            outcome.command = list(cmd)
+            outcome.returncode = None
+            if outcome.attempts <= self.resume_attempts.get(outcome.file_path, 0):
+                self.log(f"⏭️ 跳过：上次中断前已尝试过该参数（第 {outcome.attempts} 次尝试）")
+                return None, "", ""
+            if self.journal is not None:
+                self.journal.attempt(outcome.file_path, outcome.attempts)
+        result = await self.launch(call, cmd, timeout, outcome)
+        # 暂时性错误重试同一条命令，仍记为同一次尝试（续装时按尝试次数跳过）
+        while outcome is not None and await self.retry_transient(outcome, result[0]):
+            result = await self.launch(call, cmd, timeout, outcome)
+        return result
+
+    async def launch(self, call, cmd, timeout, outcome):
+        started = time.time()
+        start = time.perf_counter()
+        if self.stats is not None:
+            self.stats.attempt()
+        with self.tracer.span("attempt", cmd=" ".join(cmd), timeout=timeout) as span:
+            try:
+                if self._launcher_is_async:
+                    result = await call()
+                else:
+                    result = await self.blocking(call)
+            except subprocess.TimeoutExpired:
+                if self.stats is not None:
+                    self.stats.timed_out()
+                raise
+            span.args["returncode"] = result[0]
+        if outcome is not None:
+            outcome.returncode = result[0]
+            elapsed = time.perf_counter() - start
+            if self.history is not None and self.succeeded(result[0]):
+                await self.blocking(self.history.record, outcome.file_path, elapsed)
+            if self.metrics is not None:
+                await self.record_metrics(self.metrics.record_attempt, self.batch_id, outcome.file_path,
+                                          cmd, result[0], elapsed, started)
+        return result
+
+    def retry_policy(self, file_path):
+        """该安装包的返回码分类规则（部署清单中的设置优先）"""
+        policy = self._policies.get(file_path)
+        if policy is None:
+            # 清单未声明成功返回码时按安装包类型的默认成功返回码
+            defaults = MSI_SUCCESS_CODES if file_path.lower().endswith(".msi") else LEARNED_SUCCESS_CODES
+            policy = RetryPolicy.for_package(self.package_settings.get(file_path), defaults)
+            self._policies[file_path] = policy
+        return policy
+
+    async def retry_transient(self, outcome, returncode):
+        """返回码为暂时性错误且重试次数、本批预算都有剩余时，退避等待后返回 True（重试同一条命令）"""
+        policy = self.retry_policy(outcome.file_path)
+        if policy.classify(returncode) != TRANSIENT or self.cancelled:
+            return False
+        limit = policy.max_retries(returncode)
+        if outcome.retries >= limit:
+            return False
+        if not self.retry_budget.take():
+            self.log(f"⚠️ 本批次的重试次数（{self.retry_budget.total} 次）已用完，返回码 {returncode} 不再重试")
+            return False
+        outcome.retries += 1
+        delay = backoff_delay(outcome.retries, self.retry_delay)
+        reason = describe_code(returncode) or "暂时性错误"
+        self.log(f"🔄 返回码 {returncode}（{reason}），{delay:.0f} 秒后重试（第 {outcome.retries}/{limit} 次）")
+        with self.tracer.span("retry_backoff", returncode=returncode, delay=round(delay, 1)):
+            await self.pause(delay)
+        self.tracker.check()
+        return True
+
+    async def pause(self, seconds):
+        """等待指定秒数，取消时提前结束"""
+        deadline = time.monotonic() + seconds
+        while not self.cancelled:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                break
+            await asyncio.sleep(min(left, 0.2))
+
+    def succeeded(self, returncode):
+        """返回码表示安装成功（包括需要重启）"""
+        outcome = _current_outcome.get()
+        if outcome is None:
+            return returncode in LEARNED_SUCCESS_CODES
+        return self.retry_policy(outcome.file_path).classify(returncode) in (SUCCESS, REBOOT)
+
+    def gave_up(self, returncode):
+        """返回码为致命错误，或重试后机器仍在忙（如 1618）时记录原因并返回 True（不再尝试其他参数）"""
+        outcome = _current_outcome.get()
+        if outcome is None:
+            return False
+        kind = self.retry_policy(outcome.file_path).classify(returncode)
+        if kind == FATAL:
+            reason = describe_code(returncode) or "致命错误"
+            self.log(f"⛔ 返回码 {returncode}（{reason}），换参数也无法安装，不再尝试")
+            return True
+        if kind == TRANSIENT and returncode in BUSY_CODES:
+            reason = describe_code(returncode) or "暂时性错误"
+            self.log(f"⛔ 返回码 {returncode}（{reason}）重试后仍未解决，不再尝试其他参数")
+            return True
+        return False
+
+    async def record_metrics(self, func, *args):
+        try:
+            await self.blocking(func, *args)
+        except OSError as e:
+            self.log(f"⚠️ 安装指标写入失败：{str(e)}")
+
+    async def blocking(self, func, *args):
+        """在线程池中执行阻塞操作（哈希、文件读取等）"""
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    def on_output(self, stream, line):
+        """安装程序输出实时转发到日志"""
+        self.log(f"📝 {line}" if stream == "stdout" else f"❗ {line}")
+
+    async def install_file(self, file_path):
+        """安装单个文件（适配安装目标目录），执行记录保存在 self.outcomes 中"""
+        outcome = self.outcomes[file_path] = InstallOutcome(file_path)
+        outcome.timeout = self.deadline(file_path)
+        token = _current_outcome.set(outcome)
+        if self.stats is not None:
+            self.stats.start(file_path)
+        started = time.time()
+        start = time.perf_counter()
+        with self.tracer.span("package", package=os.path.basename(file_path)) as span:
+            try:
+                success = await self._install_file(file_path)
+                outcome.status = "succeeded" if success else ("cancelled" if self.cancelled else "failed")
+                if self.journal is not None and outcome.status != "cancelled":
+                    self.journal.finish(file_path, outcome.status)
+                if success:
+                    self.note_reboot(file_path, outcome)
+                if self.metrics is not None and outcome.status != "cancelled":
+                    outcome.duration = time.perf_counter() - start
+                    await self.record_metrics(self.metrics.record_package, self.batch_id, outcome, started)
+                if success and self.install_state is not None:
+                    await self.blocking(self.install_state.record, file_path, self.target_path, outcome.command)
+                return success
+            except asyncio.CancelledError:
+                outcome.status = "cancelled"
+                raise
+            finally:
+                outcome.duration = time.perf_counter() - start
+                span.args["status"] = outcome.status
+                span.args["attempts"] = outcome.attempts
+                if self.stats is not None:
+                    self.stats.finish(outcome)
+                self.unstage(file_path)
+                _current_outcome.reset(token)
+
+    def note_reboot(self, file_path, outcome):
+        settings = self.package_settings.get(file_path)
+        if (settings is not None and settings.reboot) or \
+                self.retry_policy(file_path).classify(outcome.returncode) == REBOOT:
+            outcome.reboot = True
+            self.log(f"🔁 {os.path.basename(file_path)} 需要重启后才能完全生效")
+
+    def block(self, file_path, dependency):
+        """依赖安装失败，不再安装该安装包（由调度器回调）"""
+        outcome = self.outcomes[file_path] = InstallOutcome(file_path)
+        outcome.status = "blocked"
+        if self.stats is not None:
+            self.stats.finish(outcome)
+        self.log(f"\n⏭️ 跳过：{os.path.basename(file_path)}（依赖的 {os.path.basename(dependency)} 安装失败）")
+        if self.journal is not None:
+            # 记为失败，续装时不会在依赖仍未安装的情况下执行
+            self.journal.finish(file_path, "failed")
+
+    def deadline(self, file_path):
+        """该安装包单次尝试的超时（秒）"""
+        if self.history is None:
+            return self.timeout
+        return self.history.deadline(file_path, self.timeout)
+
+    async def _install_file(self, file_path):
+        try:
+            self.log(f"\n📦 开始安装：{os.path.basename(file_path)}")
+            self.log(f"📂 文件路径：{file_path}")
+            settings = self.package_settings.get(file_path)
+            target_path = settings.target if settings is not None and settings.target else self.target_path
+            self.log(f"📌 安装目标目录：{target_path}")
+            timeout = self.outcomes[file_path].timeout
+            if timeout != self.timeout:
+                self.log(f"⏱️ 根据以往安装耗时，单次尝试超时设为 {timeout:.0f} 秒")
+            run_path = await self.stage(file_path)
+
+            if settings is not None and settings.args is not None:
+                success = await self.install_declared(run_path, target_path, settings)
+            elif file_path.lower().endswith(".exe"):
+                success = await self.install_exe(run_path, target_path)
+            elif file_path.lower().endswith(".msi"):
+                success = await self.install_msi(run_path, target_path)
+            else:
+                success = False
+
+            if success:
+                self.log(f"✅ 安装完成：{os.path.basename(file_path)}")
+                return True
+            else:
+                self.log(f"❌ 安装失败：{os.path.basename(file_path)}")
+                self.log("ℹ️ 建议：手动运行该安装包，或检查管理员权限")
+                return False
+
+        except InstallCancelled:
+            self.log(f"⛔ 已取消安装：{os.path.basename(file_path)}")
+            return False
+        except asyncio.CancelledError:
+            self.log(f"⛔ 已取消安装：{os.path.basename(file_path)}")
+            raise
+        except Exception as e:
+            self.log(f"❌ 安装异常：{os.path.basename(file_path)} - {str(e)}")
+            return False
+
+    def begin_batch(self, files):
+        """按本批次的安装顺序安排预取与解压"""
+        self.batch_id = new_batch_id()
+        self.retry_budget.reset()
+        if self.stats is not None:
+            self.stats.begin(files)
+        members = [file_path for file_path in files if split_member(file_path) is not None]
+        if members and self.extractor is None:
+            self.extractor = BundleExtractor(log=self.log, cancel_event=self.cancel_event,
+                                             on_extracted=self.on_staged)
+        if self.extractor is not None:
+            self.extractor.schedule(members)
+        if self.stager is not None:
+            self.stager.schedule([file_path for file_path in files if split_member(file_path) is None])
+
+    def end_batch(self):
+        """批次结束：释放预取的副本，删除解压出的文件"""
+        if self.extractor is not None:
+            self.extractor.close()
+        if self.stager is not None:
+            self.stager.close()
+
+    def on_staged(self, file_path, local_path, digest):
+        """复用解压时算出的哈希，查询参数缓存时不再重新读取"""
+        if self.switch_cache is None:
+            return
+        try:
+            self.switch_cache.note_hash(file_path, digest)
+            self.switch_cache.note_hash(local_path, digest, temporary=True)
+        except OSError:
+            pass
+
+    async def stage(self, file_path):
+        """等待安装包预取或解压完成，返回用于安装的路径（未启用预取或预取失败时为原路径）"""
+        if split_member(file_path) is not None:
+            if self.extractor is None:
+                self.begin_batch([file_path])
+            with self.tracer.span("extract_wait"):
+                return await self.extractor.acquire(file_path)
+        if self.stager is None:
+            return file_path
+        with self.tracer.span("stage_wait") as span:
+            run_path = await self.stager.acquire(file_path)
+            span.args["staged"] = run_path != file_path
+        return run_path
+
+    def unstage(self, file_path):
+        if self.extractor is not None:
+            self.extractor.release(file_path)
+        if self.stager is not None:
+            self.stager.release(file_path)
+
+    async def install_cached(self, file_path, target_path):
+        """使用之前学习到的参数安装；缓存失效时删除记录并返回 False，
+        返回码表明换参数也无法安装时保留记录并返回 None"""
+        if self.switch_cache is None:
+            return False
+        with self.tracer.span("cache_lookup") as span:
+            entry = await self.blocking(self.switch_cache.lookup, file_path)
+            span.args["hit"] = bool(entry)
+        if not entry:
+            return False
+        cmd = expand_template(entry["cmd"], file_path, target_path)
+        self.log(f"💾 使用已学习的参数：{' '.join(cmd)}")
+        try:
+            returncode, _, _ = await self.run(cmd, new_console=True)
+        except Exception as e:
+            self.log(f"⚠️ 已学习参数执行异常：{str(e)}")
+            returncode = None
+        if returncode is not None and (returncode == entry["returncode"] or self.succeeded(returncode)):
+            self.log(f"✅ 已学习参数安装成功，返回码：{returncode}")
+            return True
+        if self.gave_up(returncode):
+            return None
+        self.log(f"⚠️ 已学习参数失效（返回码：{returncode}），重新识别安装参数")
+        await self.blocking(self.switch_cache.forget, file_path)
+        return False
+
+    async def learn(self, file_path, cmd, target_path, returncode):
+        """记录成功的静默命令，供之后的运行直接使用"""
+        if self.switch_cache is None:
+            return
+        try:
+            await self.blocking(self.switch_cache.remember, file_path, cmd, target_path, returncode)
+        except OSError as e:
+            self.log(f"⚠️ 参数缓存写入失败：{str(e)}")
+
+    async def install_exe(self, file_path, target_path):
+        """处理 .exe 静默安装（适配目标路径）"""
+        cached = await self.install_cached(file_path, target_path)
+        if cached is not False:
+            return bool(cached)
+        # 能识别安装框架时直接使用对应参数，不再逐一尝试
+        framework = None
+        if self.fingerprint:
+            with self.tracer.span("detect") as span:
+                framework = await self.blocking(detect_framework, file_path)
+                span.args["framework"] = framework
+        if framework:
+            return await self.install_detected(file_path, target_path, framework)
+
+        success = False
+        # 常见的EXE安装路径参数（不同安装包可能不同）
+        exe_target_params = [
+            f"/DIR={target_path}",  # Inno Setup 安装包
+            f"/INSTALLDIR={target_path}",  # NSIS 安装包
+            f"-dir {target_path}",  # 部分自定义安装包
+        ]
+        # 组合静默参数+目标路径参数
+        for silent_param in self.silent_params:
+            if self.cancelled:
+                break
+            # 先试带目标路径的参数
+            for target_param in exe_target_params:
+                cmd = [file_path, silent_param, target_param]
+                self.log(f"🔧 尝试执行：{' '.join(cmd)}")
+
+                try:
+                    returncode, _, err = await self.run(cmd, new_console=True)
+                    stderr = safe_decode(err)
+
+                    # 成功判断：0=成功，259=仍在运行（也算成功），1641/3010=成功但需要重启
+                    if self.succeeded(returncode):
+                        self.log(f"✅ 参数 {silent_param} + {target_param} 静默安装成功")
+                        await self.learn(file_path, cmd, target_path, returncode)
+                        success = True
+                        break
+                    elif returncode in (1, 2):
+                        self.log(f"⚠️ 参数 {silent_param} + {target_param} 触发交互安装（需手动完成）")
+                        success = True
+                        break
+                    else:
+                        self.log(f"⚠️ 参数组合失败，返回码：{returncode}")
+                        if stderr:
+                            self.log(f"❌ 错误：{stderr[-300:]}")
+                        if self.gave_up(returncode):
+                            return False
+                except Exception as e:
+                    self.log(f"⚠️ 参数组合执行异常：{str(e)}")
+            if success:
+                break
+
+        # 所有带目标路径的参数都失败 → 试仅静默参数
+        if not success:
+            for silent_param in self.silent_params:
+                if self.cancelled:
+                    break
+                cmd = [file_path, silent_param]
+                self.log(f"🔧 尝试仅静默参数：{' '.join(cmd)}")
+                try:
+                    returncode, _, _ = await self.run(cmd)
+                    if self.succeeded(returncode) or returncode in (1, 2):
+                        self.log(f"✅ 仅静默参数 {silent_param} 安装成功（使用默认路径）")
+                        if self.succeeded(returncode):
+                            await self.learn(file_path, cmd, target_path, returncode)
+                        success = True
+                        break
+                    else:
+                        self.log(f"⚠️ 仅静默参数失败，返回码：{returncode}")
+                        if self.gave_up(returncode):
+                            return False
+                except Exception as e:
+                    self.log(f"⚠️ 仅静默参数执行异常：{str(e)}")
+
+        # 所有静默参数都失败 → 手动运行
+        if not success and not self.cancelled:
+            self.log("⚠️ 所有静默参数失败，尝试手动安装")
+            returncode, _, _ = await self.run([file_path], watch_idle=False)
+            success = returncode is not None and returncode not in (-1, 127)
+        return success
+
+    async def install_detected(self, file_path, target_path, framework):
+        """使用识别出的安装框架参数安装（只执行一次）"""
+        cmd = silent_command(framework, file_path, target_path)
+        self.log(f"🔍 识别到安装框架：{FRAMEWORK_NAMES[framework]}")
+        self.log(f"🔧 执行：{' '.join(cmd)}")
+        try:
+            returncode, _, err = await self.run(cmd, new_console=True)
+        except Exception as e:
+            self.log(f"⚠️ 执行异常：{str(e)}")
+            return False
+        if self.succeeded(returncode):
+            self.log(f"✅ {FRAMEWORK_NAMES[framework]} 静默安装成功，返回码：{returncode}")
+            await self.learn(file_path, cmd, target_path, returncode)
+            return True
+        self.log(f"❌ {FRAMEWORK_NAMES[framework]} 静默安装失败，返回码：{returncode}")
+        stderr = safe_decode(err)
+        if stderr:
+            self.log(f"❌ 错误：{stderr[-300:]}")
+        return False
+
+    async def install_declared(self, file_path, target_path, settings):
+        """使用部署清单中声明的参数安装（只执行一次，不再自动识别）"""
+        args = expand_template(settings.args, file_path, target_path)
+        if file_path.lower().endswith(".msi"):
+            cmd = ["msiexec.exe", "/i", os.path.abspath(file_path)] + args
+            success_codes = settings.success_codes or MSI_SUCCESS_CODES
+        else:
+            cmd = [file_path] + args
+            success_codes = settings.success_codes or LEARNED_SUCCESS_CODES
+        self.log(f"📜 使用清单中的参数：{' '.join(cmd)}")
+        try:
+            returncode, _, err = await self.run(cmd, new_console=True)
+        except Exception as e:
+            self.log(f"⚠️ 执行异常：{str(e)}")
+            return False
+        if self.succeeded(returncode):
+            self.log(f"✅ 清单参数安装成功，返回码：{returncode}")
+            return True
+        self.log(f"❌ 清单参数安装失败，返回码：{returncode}（成功返回码：{', '.join(map(str, success_codes))}）")
+        stderr = safe_decode(err)
+        if stderr:
+            self.log(f"❌ 错误：{stderr[-300:]}")
+        return False
+
+    async def install_msi(self, file_path, target_path):
+        """处理 .msi 静默安装（适配目标路径）"""
+        try:
+            # 管理员权限检测（必须）
+            try:
+                with self.tracer.span("admin_check"):
+                    is_admin = self.admin_check()
+                if not is_admin:
+                    self.log("❌ 错误：当前无管理员权限，MSI 无法安装！")
+                    self.log("ℹ️ 请右键程序 → 以管理员身份运行")
+                    return False
+            except Exception as e:
+                self.log(f"⚠️ 管理员检测异常：{str(e)}")
+
+            # 路径处理（彻底解决引号/空格问题）
+            msi_path = os.path.abspath(file_path)
+            if not os.path.exists(msi_path):
+                self.log(f"❌ MSI 文件不存在：{msi_path}")
+                return False
+
+            cached = await self.install_cached(file_path, target_path)
+            if cached is not False:
+                return bool(cached)
+
+            # 构建 MSI 命令（带目标路径 INSTALLDIR）
+            # 不经过 shell 执行，路径中的空格由参数列表负责转义，无需手动加引号
+            cmd = [
+                "msiexec.exe",
+                "/i", msi_path,
+                f"INSTALLDIR={target_path}",  # 指定MSI安装路径
+                "/qb",                  # 半静默（显示进度，比 /qn 稳定）
+                "/norestart"            # 不自动重启
+            ]
+            self.log(f"🔧 MSI 命令（带目标路径）：{' '.join(cmd)}")
+
+            # 执行 MSI 安装
+            returncode, _, err = await self.run(cmd, new_console=True)
+            stderr = safe_decode(err)
+
+            if self.succeeded(returncode):
+                self.log(f"✅ MSI 安装成功，返回码：{returncode}")
+                await self.learn(file_path, cmd, target_path, returncode)
+                return True
+
+            self.log(f"❌ MSI 安装失败（带目标路径），返回码：{returncode}")
+            if stderr:
+                self.log(f"❌ MSI 错误：{stderr[-500:]}")
+            if self.cancelled or self.gave_up(returncode):
+                return False
+
+            # 失败重试：去掉目标路径，用默认路径
+            self.log("ℹ️ 重试：使用默认安装路径")
+            retry_cmd = [
+                "msiexec.exe",
+                "/i", msi_path,
+                "/qb",
+                "/norestart"
+            ]
+            self.log(f"🔧 重试命令：{' '.join(retry_cmd)}")
+            with self.tracer.span("msi_retry"):
+                returncode, _, err = await self.run(retry_cmd)
+            if self.succeeded(returncode):
+                self.log("✅ MSI 重试安装成功（默认路径）")
+                await self.learn(file_path, retry_cmd, target_path, returncode)
+                return True
+            self.log(f"❌ 重试失败，返回码：{returncode}")
+            retry_stderr = safe_decode(err)
+            if retry_stderr:
+                self.log(f"❌ 重试错误：{retry_stderr[-500:]}")
+
+        except Exception as e:
+            self.log(f"❌ MSI 执行异常：{str(e)}")
+        return False
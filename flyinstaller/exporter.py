@@ -0,0 +1,179 @@
+"""Prometheus 指标导出：机房批量装机时，在监控系统中统一查看每台机器的安装进度
+
+默认关闭，命令行用 --metrics-port 开启，界面用环境变量 FLYINSTALLER_METRICS_PORT 开启；
+默认只监听 127.0.0.1，需要从其他机器采集时用 --metrics-host / FLYINSTALLER_METRICS_HOST 指定 0.0.0.0。
+HTTP 服务运行在独立线程中，GET /metrics 返回 Prometheus 文本格式：
+
+    flyinstaller_packages_succeeded_total    成功的安装包数（计数器）
+    flyinstaller_packages_failed_total       失败、被依赖阻塞的安装包数（计数器）
+    flyinstaller_packages_pending            本批次尚未开始的安装包数
+    flyinstaller_packages_running            正在安装的安装包数
+    flyinstaller_current_package{package=…}  正在安装的安装包（每个一行，值为开始时间戳）
+    flyinstaller_attempts_total              参数尝试次数
+    flyinstaller_timeouts_total              超时或挂起被结束的尝试次数
+    flyinstaller_install_seconds_total       安装耗时累计（秒）
+    flyinstaller_log_backlog                 等待界面显示的日志行数
+
+BatchStats 只在安装事件循环的线程中更新，每次更新后整体替换 snapshot（创建后不再修改的 StatsSnapshot），
+HTTP 线程只读取当前 snapshot，不与安装流程共用锁。
+"""
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_HOST = "127.0.0.1"
+PORT_ENV = "FLYINSTALLER_METRICS_PORT"
+HOST_ENV = "FLYINSTALLER_METRICS_HOST"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# (指标名, 类型, 说明)
+METRICS = (
+    ("flyinstaller_packages_succeeded_total", "counter", "Packages installed successfully"),
+    ("flyinstaller_packages_failed_total", "counter", "Packages that failed or were blocked by a failed dependency"),
+    ("flyinstaller_packages_pending", "gauge", "Packages in the current batch that have not started"),
+    ("flyinstaller_packages_running", "gauge", "Packages being installed"),
+    ("flyinstaller_attempts_total", "counter", "Installer invocations"),
+    ("flyinstaller_timeouts_total", "counter", "Installer invocations killed on timeout or hang"),
+    ("flyinstaller_install_seconds_total", "counter", "Cumulative package install time in seconds"),
+)
+
+
+class StatsSnapshot:
+    """某一时刻的统计（创建后不再修改）"""
+
+    __slots__ = ("succeeded", "failed", "pending", "running", "attempts", "timeouts", "seconds")
+
+    def __init__(self, succeeded=0, failed=0, pending=0, running=(), attempts=0, timeouts=0, seconds=0.0):
+        self.succeeded = succeeded
+        self.failed = failed
+        self.pending = pending
+        # ((安装包名, 开始时间戳), ...)
+        self.running = running
+        self.attempts = attempts
+        self.timeouts = timeouts
+        self.seconds = seconds
+
+    def values(self):
+        """按 METRICS 的顺序返回各指标的值"""
+        return (self.succeeded, self.failed, self.pending, len(self.running),
+                self.attempts, self.timeouts, self.seconds)
+
+
+class BatchStats:
+    """安装统计：计数器跨批次累计，pending/running 每批重新开始（只在安装事件循环的线程中调用）"""
+
+    def __init__(self):
+        self.snapshot = StatsSnapshot()
+        self._pending = set()
+        self._running = {}
+
+    def _publish(self, **changes):
+        old = self.snapshot
+        values = {name: getattr(old, name) for name in StatsSnapshot.__slots__}
+        values.update(changes)
+        values["pending"] = len(self._pending)
+        values["running"] = tuple(sorted(self._running.values(), key=lambda item: item[1]))
+        self.snapshot = StatsSnapshot(**values)
+
+    def begin(self, files):
+        self._pending = set(files)
+        self._running = {}
+        self._publish()
+
+    def start(self, file_path):
+        self._pending.discard(file_path)
+        self._running[file_path] = (os.path.basename(file_path), time.time())
+        self._publish()
+
+    def attempt(self):
+        self._publish(attempts=self.snapshot.attempts + 1)
+
+    def timed_out(self):
+        self._publish(timeouts=self.snapshot.timeouts + 1)
+
+    def finish(self, outcome):
+        """一个安装包结束（InstallOutcome）；取消的不计入成功或失败"""
+        self._pending.discard(outcome.file_path)
+        self._running.pop(outcome.file_path, None)
+        old = self.snapshot
+        self._publish(succeeded=old.succeeded + (outcome.status == "succeeded"),
+                      failed=old.failed + (outcome.status in ("failed", "blocked")),
+                      seconds=old.seconds + outcome.duration)
+
+
+def _label(value):
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def render(snapshot, backlog=None):
+    """Prometheus 文本格式"""
+    lines = []
+    for (name, kind, help_text), value in zip(METRICS, snapshot.values()):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"{name} {value:.3f}" if isinstance(value, float) else f"{name} {value}")
+    lines.append("# HELP flyinstaller_current_package Package being installed (value: start time, unix seconds)")
+    lines.append("# TYPE flyinstaller_current_package gauge")
+    for package, started in snapshot.running:
+        lines.append(f"flyinstaller_current_package{{package=\"{_label(package)}\"}} {started:.3f}")
+    if backlog is not None:
+        lines.append("# HELP flyinstaller_log_backlog Log lines waiting to be shown in the window")
+        lines.append("# TYPE flyinstaller_log_backlog gauge")
+        lines.append(f"flyinstaller_log_backlog {backlog()}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsExporter:
+    """在独立线程中提供 /metrics 的 HTTP 服务
+
+    backlog 为返回日志积压行数的可调用对象（可为 None）；port 为 0 时由系统分配，start() 后从 self.port 读取。
+    """
+
+    def __init__(self, stats, port, host=DEFAULT_HOST, backlog=None):
+        self.stats = stats
+        self.host = host
+        self.port = port
+        self.backlog = backlog
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        """绑定端口并开始服务，端口被占用等错误抛出 OSError"""
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = render(exporter.stats.snapshot, exporter.backlog).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-exporter", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def address_from_env():
+    """环境变量中的 (地址, 端口)，未设置或端口无效时返回 None"""
+    value = os.environ.get(PORT_ENV, "").strip()
+    if not value.isdigit():
+        return None
+    return os.environ.get(HOST_ENV, "").strip() or DEFAULT_HOST, int(value)
@@ -0,0 +1,333 @@
+"""机群模式：一台控制端同时驱动多台机器上的代理端安装
+
+代理端（python -m flyinstaller --agent 0.0.0.0:9470）监听端口，等待控制端推送安装计划，
+用本机的安装引擎与调度器（与命令行模式相同：参数识别、重试、增量安装、本地预取）执行；
+控制端（python -m flyinstaller --packages \\\\server\\share\\package --agents pc01:9470 pc02:9470 ...）扫描安装包文件夹，
+把同一份计划推送给每个代理端，汇总每台机器上每个安装包的状态。
+
+安装包文件夹位于共享文件服务器上时，所有机器同时开始安装会挤满服务器带宽，
+因此代理端每开始一个安装包前都要向控制端申请名额，整个机群同时安装的包数不超过 --fleet-concurrency。
+
+协议为 TCP 上的 JSON Lines（每行一条 UTF-8 JSON 消息）：
+
+    代理端 → 控制端  {"type": "hello", "host": 机器名, "version": 1}
+    控制端 → 代理端  {"type": "plan", "token": …, "packages": [路径…], "packages_dir": …, "target": …,
+                      "force": false, "lanes": {"exe": 4, "msi": 1}}
+    代理端 → 控制端  {"type": "acquire", "package": 路径}            申请开始安装的名额
+    控制端 → 代理端  {"type": "grant", "package": 路径}
+    代理端 → 控制端  {"type": "started", "package": 路径}
+    代理端 → 控制端  {"type": "result", "package": 路径, "outcome": InstallOutcome.to_dict()}  同时归还名额
+    代理端 → 控制端  {"type": "done"} / {"type": "error", "message": …}
+
+代理端同时只执行一个计划；连接断开（如控制端被中断）时代理端结束正在运行的安装，控制端把未完成的安装包记为 lost。
+设置了令牌（--fleet-token 或环境变量 FLYINSTALLER_FLEET_TOKEN）时代理端只接受令牌相同的计划。
+"""
+import asyncio
+import hmac
+import json
+import os
+import socket
+import threading
+
+from .scheduler import InstallScheduler
+
+PROTOCOL_VERSION = 1
+DEFAULT_PORT = 9470
+DEFAULT_FLEET_CONCURRENCY = 4
+TOKEN_ENV = "FLYINSTALLER_FLEET_TOKEN"
+# 单条消息的长度上限（安装计划中的路径列表）
+MAX_MESSAGE = 4 * 1024 * 1024
+CONNECT_TIMEOUT = 10.0
+HELLO_TIMEOUT = 10.0
+
+
+class FleetError(OSError):
+    """连接失败或对方发送了不符合协议的消息"""
+
+
+def parse_address(text, default_host="127.0.0.1", default_port=DEFAULT_PORT):
+    """"主机:端口" / "主机" / "端口" → (主机, 端口)"""
+    text = text.strip()
+    if text.isdigit():
+        return default_host, int(text)
+    host, sep, port = text.rpartition(":")
+    if not sep or not port.isdigit():
+        return text.strip("[]"), default_port
+    return host.strip("[]") or default_host, int(port)
+
+
+def encode(message):
+    return json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+async def receive(reader):
+    """读取一条消息，连接关闭时返回 None"""
+    try:
+        line = await reader.readline()
+    except (ValueError, asyncio.LimitOverrunError):
+        raise FleetError("消息过长")
+    if not line:
+        return None
+    try:
+        message = json.loads(line)
+    except ValueError:
+        raise FleetError("无法解析的消息")
+    if not isinstance(message, dict) or not isinstance(message.get("type"), str):
+        raise FleetError("消息格式错误")
+    return message
+
+
+def token_matches(expected, received):
+    if not expected:
+        return True
+    return isinstance(received, str) and hmac.compare_digest(expected.encode("utf-8"), received.encode("utf-8"))
+
+
+class FleetAgent:
+    """代理端：执行控制端推送的安装计划
+
+    make_engine(plan, cancel_event) 按计划（plan 消息）创建本机的 InstallEngine，
+    安装前用引擎的 install_state 跳过未变化的安装包（计划中 force 为 true 时全部安装）。
+    """
+
+    def __init__(self, make_engine, token=None, log=None):
+        self.make_engine = make_engine
+        self.token = token
+        self.log = log or (lambda message: None)
+        self.server = None
+        self._busy = False
+
+    async def start(self, host, port):
+        """开始监听，返回 asyncio.Server（端口为 0 时由系统分配，见 self.port）"""
+        self.server = await asyncio.start_server(self.handle, host, port, limit=MAX_MESSAGE)
+        return self.server
+
+    @property
+    def port(self):
+        return self.server.sockets[0].getsockname()[1]
+
+    async def handle(self, reader, writer):
+        peer = writer.get_extra_info("peername")
+        controller = f"{peer[0]}:{peer[1]}" if peer else "控制端"
+        try:
+            writer.write(encode({"type": "hello", "host": socket.gethostname(), "version": PROTOCOL_VERSION}))
+            plan = await asyncio.wait_for(receive(reader), HELLO_TIMEOUT)
+            if plan is None or plan["type"] != "plan":
+                raise FleetError("未收到安装计划")
+            if not token_matches(self.token, plan.get("token")):
+                self.log(f"⛔ 拒绝来自 {controller} 的安装计划：令牌不匹配")
+                writer.write(encode({"type": "error", "message": "令牌不匹配"}))
+                return
+            if self._busy:
+                writer.write(encode({"type": "error", "message": "正在执行其他控制端的安装计划"}))
+                return
+            self._busy = True
+            try:
+                self.log(f"🛰️ 收到 {controller} 的安装计划，共 {len(plan.get('packages') or ())} 个安装包")
+                await AgentSession(self, plan, reader, writer).run()
+            except Exception as e:
+                # 计划格式错误、引擎无法创建等：告知控制端原因，而不是直接断开连接
+                self.log(f"❌ 执行 {controller} 的安装计划失败：{type(e).__name__}: {e}")
+                if not writer.is_closing():
+                    writer.write(encode({"type": "error", "message": f"代理端执行安装计划失败：{type(e).__name__}: {e}"}))
+            finally:
+                self._busy = False
+        except (OSError, asyncio.TimeoutError) as e:
+            self.log(f"⚠️ 与 {controller} 的连接中断：{e}")
+        finally:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+
+
+class AgentSession:
+    """代理端执行一个安装计划：每个安装包开始前向控制端申请名额，结束后回报结果"""
+
+    def __init__(self, agent, plan, reader, writer):
+        self.agent = agent
+        self.plan = plan
+        self.reader = reader
+        self.writer = writer
+        self.cancel_event = threading.Event()
+        self.engine = None
+        self.scheduler = None
+        # 安装包路径 → 等待名额的 future
+        self._grants = {}
+
+    def send(self, message):
+        if not self.writer.is_closing():
+            self.writer.write(encode(message))
+
+    async def run(self):
+        files = [str(file_path) for file_path in self.plan.get("packages") or ()]
+        self.engine = engine = self.agent.make_engine(self.plan, self.cancel_event)
+        loop = asyncio.get_running_loop()
+        pending = files
+        if engine.install_state is not None:
+            pending, _ = await loop.run_in_executor(
+                None, lambda: engine.install_state.plan(files, engine.target_path, force=bool(self.plan.get("force"))))
+        for file_path in files:
+            if file_path not in pending:
+                self.send({"type": "result", "package": file_path,
+                           "outcome": {"name": os.path.basename(file_path), "path": file_path, "status": "unchanged"}})
+        listener = asyncio.ensure_future(self.listen())
+        self.scheduler = InstallScheduler(
+            self.install,
+            lanes=self.plan.get("lanes"),
+            cancel_event=self.cancel_event,
+            on_cancel=lambda: loop.run_in_executor(None, engine.cancel),
+            on_blocked=self.block,
+            tracer=engine.tracer
+        )
+        engine.begin_batch(pending)
+        try:
+            results = await self.scheduler.run(pending)
+        finally:
+            engine.end_batch()
+            listener.cancel()
+        succeeded = sum(1 for result in results if result)
+        self.agent.log(f"✅ 安装计划执行完毕，成功 {succeeded}/{len(pending)}")
+        self.send({"type": "done"})
+        if not self.writer.is_closing():
+            await self.writer.drain()
+
+    async def listen(self):
+        """接收名额；连接断开时取消整个批次"""
+        try:
+            while True:
+                message = await receive(self.reader)
+                if message is None:
+                    break
+                if message["type"] == "grant":
+                    future = self._grants.pop(message.get("package"), None)
+                    if future is not None and not future.done():
+                        future.set_result(True)
+        except OSError as e:
+            self.agent.log(f"⚠️ 读取控制端消息失败：{e}")
+        self.agent.log("🛑 与控制端的连接已断开，结束正在运行的安装")
+        await self.scheduler.cancel()
+
+    async def install(self, file_path):
+        future = self._grants[file_path] = asyncio.get_running_loop().create_future()
+        self.send({"type": "acquire", "package": file_path})
+        await future
+        self.send({"type": "started", "package": file_path})
+        try:
+            return await self.engine.install_file(file_path)
+        finally:
+            outcome = self.engine.outcomes.get(file_path)
+            self.send({"type": "result", "package": file_path,
+                       "outcome": outcome.to_dict() if outcome is not None else
+                       {"name": os.path.basename(file_path), "path": file_path, "status": "cancelled"}})
+
+    def block(self, file_path, dependency):
+        self.engine.block(file_path, dependency)
+        self.send({"type": "result", "package": file_path, "outcome": self.engine.outcomes[file_path].to_dict()})
+
+
+class FleetController:
+    """控制端：把安装计划推送给各代理端，汇总结果；整个机群同时安装的包数不超过 concurrency
+
+    on_result(代理端, 结果字典) 在每个安装包结束时调用；run() 返回 {代理端: {安装包路径: 结果字典}}，
+    代理端不可达或中途断开时，没有结果的安装包记为 lost。
+    """
+
+    def __init__(self, agents, files, target, packages_dir=None, concurrency=DEFAULT_FLEET_CONCURRENCY,
+                 token=None, force=False, lanes=None, log=None, on_result=None):
+        self.agents = list(agents)
+        self.files = list(files)
+        self.target = target
+        self.packages_dir = packages_dir
+        self.concurrency = max(1, int(concurrency))
+        self.token = token
+        self.force = force
+        self.lanes = dict(lanes or {})
+        self.log = log or (lambda message: None)
+        self.on_result = on_result
+        self.results = {}
+        self._slots = None
+
+    async def run(self):
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self.log(f"🛰️ 向 {len(self.agents)} 台机器推送 {len(self.files)} 个安装包（机群同时安装不超过 {self.concurrency} 个）")
+        await asyncio.gather(*(self.drive(agent) for agent in self.agents))
+        return self.results
+
+    def plan_message(self):
+        return {"type": "plan", "token": self.token, "packages": self.files, "packages_dir": self.packages_dir,
+                "target": self.target, "force": self.force, "lanes": self.lanes}
+
+    async def drive(self, agent):
+        """驱动一台代理端执行计划"""
+        results = self.results[agent] = {}
+        host, port = parse_address(agent)
+        held = set()
+        waiting = set()
+        writer = None
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port, limit=MAX_MESSAGE), CONNECT_TIMEOUT)
+            hello = await asyncio.wait_for(receive(reader), HELLO_TIMEOUT)
+            if hello is None or hello["type"] != "hello" or hello.get("version") != PROTOCOL_VERSION:
+                raise FleetError("对方不是兼容的 FlyInstaller 代理端")
+            self.log(f"🔗 [{agent}] 已连接（{hello.get('host') or '未知机器'}）")
+            writer.write(encode(self.plan_message()))
+            await writer.drain()
+            while True:
+                message = await receive(reader)
+                if message is None:
+                    if len(results) < len(self.files):
+                        self.log(f"⚠️ [{agent}] 连接中断")
+                    break
+                kind = message["type"]
+                file_path = message.get("package")
+                if kind == "acquire":
+                    waiting.add(asyncio.ensure_future(self.grant(writer, file_path, held)))
+                elif kind == "started":
+                    self.log(f"📦 [{agent}] 开始安装：{os.path.basename(file_path)}")
+                elif kind == "result":
+                    if file_path in held:
+                        held.discard(file_path)
+                        self._slots.release()
+                    outcome = message.get("outcome") or {}
+                    results[file_path] = outcome
+                    self.report(agent, outcome)
+                elif kind == "done":
+                    break
+                elif kind == "error":
+                    self.log(f"❌ [{agent}] {message.get('message')}")
+                    break
+        except (OSError, asyncio.TimeoutError) as e:
+            self.log(f"❌ [{agent}] 无法连接或连接中断：{e or type(e).__name__}")
+        finally:
+            for task in waiting:
+                task.cancel()
+            for _ in held:
+                self._slots.release()
+            held.clear()
+            if writer is not None:
+                writer.close()
+            for file_path in self.files:
+                results.setdefault(file_path, {"name": os.path.basename(file_path), "path": file_path,
+                                               "status": "lost"})
+
+    async def grant(self, writer, file_path, held):
+        await self._slots.acquire()
+        if writer.is_closing():
+            self._slots.release()
+            return
+        held.add(file_path)
+        writer.write(encode({"type": "grant", "package": file_path}))
+
+    def report(self, agent, outcome):
+        status = outcome.get("status")
+        icon = {"succeeded": "✅", "unchanged": "⏭️", "blocked": "⏭️"}.get(status, "❌")
+        self.log(f"{icon} [{agent}] {outcome.get('name')}：{status}")
+        if self.on_result is not None:
+            self.on_result(agent, outcome)
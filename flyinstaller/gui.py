@@ -0,0 +1,1167 @@
+"""FlyInstaller 图形界面（customtkinter）
+
+只有不带参数启动 installer.py 时才导入本模块；无界面模式、安装工作进程和 flyinstaller 包的其他模块都不导入 tkinter/customtkinter。
+"""
+import os
+import threading
+import time
+import tkinter as tk
+
+import customtkinter as ctk
+
+from . import InstallEngine, InstallRuntime, DEFAULT_LANES, EXE_SILENT_PARAMS
+from .engine import check_admin
+from .scheduler import ORDER_POLICIES, order_priority
+from . import paths
+from .switch_cache import SwitchCache
+from .timeouts import RuntimeHistory
+from .journal import open_batch, read_journal
+from .install_state import InstallState, UNCHANGED, describe_plan
+from .staging import create_stager
+from .manifest import ManifestError, find_manifest, load_manifest
+from .metrics import BatchProgress, MetricsStore, DEFAULT_ESTIMATE, format_eta
+from .metadata import MetadataCache, select_latest
+from .exporter import BatchStats, MetricsExporter, address_from_env
+from .preflight import run_preflight
+from .workers import WorkerPool
+from .scanner import PackageScanner
+from .package_list import (PackageListModel, make_entries, SORT_KEYS,
+                           QUEUED, RUNNING, SUCCEEDED, FAILED, SUPERSEDED,
+                           UNCHANGED as UNCHANGED_STATUS)
+from .logpipe import LogPipeline, MAX_UI_LINES
+from .tracing import NULL_TRACER, open_tracer
+
+COLORS = {
+    "global_bg": "#EFF4F9",      # 全局画布背景
+    "panel_bg": "#f0f0f2",       # 右侧功能面板背景（保持参考图样式）
+    "content_bg": "#ffffff",     # 输入框/列表/日志背景
+    "text_primary": "#000000",   # 大标题/小标题文字
+    "text_secondary": "#666666", # 说明文字
+    "btn_primary_bg": "#1a365d", # 开始安装按钮背景
+    "btn_primary_text": "#ffffff",# 开始安装按钮文字
+    "btn_cancel_text": "#1a365d", # 取消按钮文字
+    "progress_bg": "#e0e0e0",    # 进度条背景
+    "progress_fg": "#1a365d",    # 进度条进度色
+    "border_color": "#e5e5e7",   # 边框色
+    "left_bg": "#EFF4F9"         # 左侧区域背景
+}
+
+# 界面刷新间隔（毫秒）：日志与进度统一在该定时器中批量更新
+UI_TICK_MS = 50
+
+# 间距定义（严格按要求）
+PADDING = {
+    "panel_pad": 36,             # 面板内边距
+    "title_to_subtitle": 16,      # 大标题到小标题
+    "subtitle_to_content": 6,    # 小标题到内容
+    "section_gap": 6            # 区域之间间隔
+}
+
+# 安装列表中各状态的文字颜色
+STATUS_COLORS = {
+    RUNNING: "#1a365d",
+    SUCCEEDED: "#2e7d32",
+    FAILED: "#c62828",
+    UNCHANGED_STATUS: "#999999",
+    SUPERSEDED: "#999999",
+}
+
+
+class PackageListView:
+    """只渲染可见行的安装列表（数据在 PackageListModel 中）
+
+    Listbox 中始终只有可见窗口内的几十行，滚动条按 model 的总行数换算；
+    安装过程中状态变化时只替换对应的一行。
+    """
+
+    def __init__(self, parent, model, **listbox_options):
+        self.model = model
+        self.first = 0
+        self.listbox = tk.Listbox(parent, selectmode=tk.BROWSE, **listbox_options)
+        self.scrollbar = tk.Scrollbar(parent, orient=tk.VERTICAL, command=self.on_scroll)
+        self.listbox.bind("<Configure>", lambda event: self.refresh())
+        self.listbox.bind("<MouseWheel>", lambda event: self.scroll_by(-1 if event.delta > 0 else 1, "units"))
+        self.listbox.bind("<Button-4>", lambda event: self.scroll_by(-1, "units"))
+        self.listbox.bind("<Button-5>", lambda event: self.scroll_by(1, "units"))
+        # 禁止 Listbox 自身的键盘/拖动滚动（内容只有可见窗口）
+        self.listbox.bind("<B1-Motion>", lambda event: "break")
+    
+    def pack(self, **options):
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox.pack(**options)
+    
+    def configure(self, **options):
+        self.listbox.configure(**options)
+    
+    def visible_rows(self):
+        line_height = max(1, tk.font.Font(font=self.listbox.cget("font")).metrics("linespace") + 1)
+        return max(1, self.listbox.winfo_height() // line_height + 1)
+    
+    def refresh(self):
+        """重新渲染可见窗口"""
+        total = len(self.model)
+        rows = self.visible_rows()
+        self.first = max(0, min(self.first, total - rows))
+        entries = self.model.window(self.first, rows)
+        self.listbox.delete(0, tk.END)
+        if entries:
+            self.listbox.insert(0, *(entry.text() for entry in entries))
+            for index, entry in enumerate(entries):
+                self.listbox.itemconfigure(index, fg=STATUS_COLORS.get(entry.status, COLORS["text_primary"]))
+        if total > rows:
+            self.scrollbar.set(self.first / total, (self.first + rows) / total)
+        else:
+            self.scrollbar.set(0, 1)
+    
+    def update_row(self, row):
+        """只刷新 view 中第 row 行（不可见时不做任何事）"""
+        if row is None or not self.first <= row < self.first + self.listbox.size():
+            return
+        entry = self.model.view[row]
+        index = row - self.first
+        self.listbox.delete(index)
+        self.listbox.insert(index, entry.text())
+        self.listbox.itemconfigure(index, fg=STATUS_COLORS.get(entry.status, COLORS["text_primary"]))
+    
+    def scroll_by(self, amount, what):
+        step = self.visible_rows() - 1 if what == "pages" else 1
+        self.first += amount * step
+        self.refresh()
+        return "break"
+    
+    def on_scroll(self, action, *args):
+        if action == "moveto":
+            self.first = int(float(args[0]) * len(self.model))
+            self.refresh()
+        elif action == "scroll":
+            self.scroll_by(int(args[0]), args[1])
+
+
+class FlyInstaller:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("FlyInstaller")
+        self.root.geometry("960x760") 
+        self.root.resizable(False, False)
+        
+        # 获取屏幕宽高
+        screen_width = self.root.winfo_screenwidth()
+        screen_height = self.root.winfo_screenheight()
+        # 计算窗口居中坐标
+        window_width = 960
+        window_height = 760
+        x = (screen_width - window_width) // 2
+        y = (screen_height - window_height) // 2
+        # 设置窗口位置
+        self.root.geometry(f"{window_width}x{window_height}+{x}+{y}")
+        
+        # ========== 关键：字体平滑配置 + 系统默认字体 ==========
+        # 开启Windows字体平滑（抗锯齿）
+        if os.name == "nt":
+            self.root.tk.call("tk", "scaling", 1.0)  # 适配系统DPI
+            # 开启字体抗锯齿（Windows专属）
+            self.root.tk.call("set", "tk_useSystemFontSettings", "1")
+        
+        # 获取系统默认字体配置
+        self.default_font = tk.font.nametofont("TkDefaultFont")
+        # 先获取默认字体配置，再修改weight（避免参数重复）
+        font_config = self.default_font.configure()
+        font_config["weight"] = "bold"
+        self.bold_font = tk.font.Font(** font_config)
+        
+        # 关键：显式设置root窗口背景
+        self.root.configure(fg_color=COLORS["global_bg"])
+        
+        # 初始化变量
+        self.log_pipeline = self.open_log_pipeline()
+        # 各阶段耗时追踪（.flyinstaller/traces，可导出为 Chrome trace）
+        self.tracer = self.open_tracer()
+        self.pending_progress = None
+        # 安装列表（界面只渲染可见行，install_files 由其提供）
+        self.package_model = PackageListModel()
+        self.is_installing = False
+        # 安装包扫描：子文件夹层数（0 只扫描所选文件夹）、后台扫描的序号与取消信号
+        self.scan_depth = 0
+        self.scanner = self.open_scanner()
+        self.scanning = False
+        self.scan_generation = 0
+        self.scan_cancel = None
+        self.cancel_flag = False
+        self.cancel_event = threading.Event()
+        self.exe_silent_params = list(EXE_SILENT_PARAMS)
+        # 各类型安装包的并发数（MSI 受 Windows Installer 全局锁限制只能为1）
+        self.lane_limits = dict(DEFAULT_LANES)
+        # 已验证的静默参数缓存（与package文件夹并列的 .flyinstaller 目录下）
+        self.switch_cache = self.open_switch_cache()
+        # 各安装包以往的安装耗时（用于自适应超时）
+        self.runtime_history = self.open_runtime_history()
+        # 每次尝试与每个安装包的结果（估算耗时、进度与调度顺序）
+        self.metrics = self.open_metrics()
+        self.order_var = tk.StringVar(value=ORDER_POLICIES["auto"])
+        # 当前批次按估算耗时加权的进度，以及各安装包的估算耗时（由 plan_batch 填入）
+        self.batch_progress = None
+        self.batch_estimates = {}
+        # 本批次预检未通过（未开始安装）
+        self.preflight_failed = False
+        # 成功安装记录（增量安装：默认跳过上次成功安装后没有变化的包）
+        self.install_state = self.open_install_state()
+        self.force_var = tk.BooleanVar(value=False)
+        # 安装包的产品名、版本与发布者（同一产品默认只安装最新版本）
+        self.metadata = self.open_metadata()
+        self.all_versions_var = tk.BooleanVar(value=False)
+        # 当前批次的进度日志（崩溃后续装）、续装前已成功的包数、因未变化跳过的包数
+        self.journal = None
+        # 当前批次的安装引擎（批次结束时汇总需要重启的安装包）
+        self.batch_engine = None
+        # 安装工作进程池（首次安装时创建，安装程序在工作进程中启动，输出批量发回）
+        self.worker_pool = None
+        # Prometheus 指标服务（设置环境变量 FLYINSTALLER_METRICS_PORT 时开启）
+        self.batch_stats = None
+        self.metrics_exporter = self.open_exporter()
+        self.resumed_succeeded = 0
+        self.unchanged_skipped = 0
+        self.superseded_skipped = 0
+        # 安装运行时：后台线程中的事件循环，事件经日志管道回到界面线程
+        self.runtime = InstallRuntime(emit=self.log_pipeline.post)
+        
+        # ========== 新增：安装目标目录默认值 ==========
+        self.target_path_var = tk.StringVar(value="C:\\Program Files\\")  # 默认安装路径
+        # 获取默认package路径（适配exe/源码运行）
+        default_package_path = self.get_default_package_path()
+        default_path = default_package_path if os.path.exists(default_package_path) else "当前未选择文件夹（默认路径./package不存在）"
+        self.path_var = tk.StringVar(value=default_path)
+        
+        # 创建整体布局
+        self.create_main_layout()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.after(UI_TICK_MS, self.ui_tick)
+        
+        # 初始化日志
+        self.add_log("✅ 程序已启动，等待选择安装包文件夹...")
+        
+        # 自动加载默认文件夹
+        self.load_default_folder()
+        self.check_interrupted_batch()
+    
+    # ========== 新增：获取默认package路径（适配exe运行） ==========
+    def get_default_package_path(self):
+        # 返回应用目录下的package文件夹
+        return paths.default_package_path()
+    
+    def open_switch_cache(self):
+        """打开静默参数缓存，失败时不使用缓存"""
+        try:
+            return SwitchCache(paths.data_path("switch_cache.json"))
+        except OSError as e:
+            print(f"参数缓存不可用：{e}")
+            return None
+    
+    def open_runtime_history(self):
+        """打开安装耗时记录，失败时使用固定超时"""
+        try:
+            return RuntimeHistory(paths.data_path("runtimes.json"))
+        except OSError as e:
+            print(f"安装耗时记录不可用：{e}")
+            return None
+    
+    def open_metrics(self):
+        """打开安装指标数据库，失败时不估算耗时"""
+        try:
+            return MetricsStore(paths.data_path("metrics.db"))
+        except OSError as e:
+            print(f"安装指标不可用：{e}")
+            return None
+    
+    def open_install_state(self):
+        """打开安装状态索引（复用参数缓存的内容哈希），失败时每次全部安装"""
+        try:
+            hasher = self.switch_cache.content_hash if self.switch_cache is not None else None
+            return InstallState(paths.data_path("install_state.json"), hasher=hasher)
+        except OSError as e:
+            print(f"安装状态记录不可用：{e}")
+            return None
+    
+    def open_exporter(self):
+        """环境变量指定端口时启动指标服务，端口不可用时不导出"""
+        address = address_from_env()
+        if address is None:
+            return None
+        host, port = address
+        stats = BatchStats()
+        try:
+            exporter = MetricsExporter(stats, port, host, backlog=lambda: self.log_pipeline.backlog).start()
+        except OSError as e:
+            self.add_log(f"⚠️ 指标服务无法启动：{e}")
+            return None
+        self.batch_stats = stats
+        self.add_log(f"📈 Prometheus 指标：http://{exporter.host}:{exporter.port}/metrics")
+        return exporter
+    
+    def open_metadata(self):
+        """打开安装包版本信息缓存，失败时每次重新读取"""
+        try:
+            return MetadataCache(paths.data_path("metadata.json"))
+        except OSError as e:
+            print(f"版本信息缓存不可用：{e}")
+            return MetadataCache()
+    
+    def plan_batch(self, files, target_path, force, resume, all_versions=False):
+        """（后台线程）跳过旧版本、未变化和上次中断前已完成的安装包，预检其余的安装包，返回本次要安装的列表"""
+        superseded = {}
+        if not all_versions:
+            files, superseded = select_latest(files, self.metadata.read_all(files))
+            for old, new in superseded.items():
+                self.add_log(f"⏭️ {os.path.basename(old)} 是旧版本，安装 {os.path.basename(new)}")
+        self.superseded_skipped = len(superseded)
+        pending = files
+        skipped = set()
+        if self.install_state is not None:
+            pending, kinds = self.install_state.plan(files, target_path, force=force)
+            skipped = {file_path for file_path, kind in kinds.items() if kind == UNCHANGED and not force}
+            self.add_log(f"📋 {describe_plan(kinds)}" + ("（强制全部重新安装）" if force else ""))
+        if resume is not None:
+            remaining = set(resume.remaining())
+            pending = [file_path for file_path in pending if file_path in remaining]
+            self.resumed_succeeded = sum(1 for file_path, status in resume.statuses.items()
+                                         if status == "succeeded" and file_path not in skipped)
+        self.unchanged_skipped = len(skipped)
+        if pending:
+            report = run_preflight(pending, target_path, admin_check=check_admin)
+            for line in report.lines():
+                self.add_log(line)
+            if not report.ok:
+                self.preflight_failed = True
+                return []
+        estimates = {}
+        if self.metrics is not None:
+            try:
+                estimates = self.metrics.estimate_all(pending)
+            except OSError as e:
+                self.add_log(f"⚠️ 无法读取安装指标，不估算耗时：{e}")
+        # 调度器在本函数返回后才创建，调度顺序按这里填入的估算耗时计算
+        self.batch_estimates.clear()
+        self.batch_estimates.update(estimates)
+        self.log_pipeline.post("planned", (pending, skipped, resume.statuses if resume is not None else {}, estimates,
+                                           superseded))
+        if not pending:
+            self.add_log("✅ 所有安装包均已是最新，无需安装（勾选“重新安装未变化的包”可强制安装）")
+        return pending
+    
+    def journal_path(self):
+        return paths.data_path("journal.jsonl")
+    
+    def check_interrupted_batch(self):
+        """启动时提示上次未完成的批次"""
+        try:
+            state = read_journal(self.journal_path())
+        except OSError:
+            return
+        if state is not None and state.interrupted:
+            done = len(state.files) - len(state.remaining())
+            self.add_log(f"🔁 上次批量安装未完成（已完成 {done}/{len(state.files)} 个包），"
+                         f"对同一文件夹和目标目录开始安装时将从中断处继续")
+    
+    def open_journal(self, target_path):
+        """开始批次日志，返回上次中断的批次状态（不续装时为 None）"""
+        try:
+            self.journal, resume = open_batch(self.journal_path(), self.install_files, target_path)
+        except OSError as e:
+            self.add_log(f"⚠️ 批次日志不可用，中断后无法续装：{str(e)}")
+            self.journal = None
+            return None
+        return resume
+    
+    def create_main_layout(self):
+        # 主容器（左右布局）
+        main_container = ctk.CTkFrame(
+            self.root,
+            fg_color=COLORS["global_bg"],
+            border_width=0
+        )
+        main_container.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+        
+        # 1. 左侧图标区域（显示📦 emoji）
+        left_frame = ctk.CTkFrame(
+            main_container,
+            fg_color=COLORS["left_bg"],
+            border_width=0,
+            width=250
+        )
+        left_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 20))
+        left_frame.pack_propagate(False)
+        
+        # 显示📦 emoji（使用系统默认字体，仅调整大小）
+        emoji_label = ctk.CTkLabel(
+            left_frame,
+            text="📦",
+            # 去掉family，使用系统默认字体
+            font=ctk.CTkFont(size=120),
+            text_color="#1a365d"
+        )
+        emoji_label.pack(expand=True)
+        
+        # 显示版本号行
+        version_label = ctk.CTkLabel(
+            left_frame,
+            text="v0.1.1 By Lvi_Fly",
+            font=ctk.CTkFont(size=10),
+            text_color="#868686"
+        )
+        version_label.pack(side=tk.LEFT, expand=True, padx=100, pady=10)
+        
+        # 2. 右侧功能面板（核心区域）
+        right_panel = ctk.CTkFrame(
+            main_container,
+            fg_color=COLORS["panel_bg"],
+            corner_radius=12,
+            border_width=2,
+            border_color="#e0e0e0",
+            bg_color=COLORS["global_bg"]
+        )
+        right_panel.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
+        
+        # 面板内边距36px
+        panel_inner = ctk.CTkFrame(
+            right_panel,
+            fg_color="transparent",
+            border_width=0
+        )
+        panel_inner.pack(fill=tk.BOTH, expand=True, padx=PADDING["panel_pad"], pady=PADDING["panel_pad"])
+        
+        # ========== 2.1 大标题 ==========
+        title_label = ctk.CTkLabel(
+            panel_inner,
+            text="FlyInstaller",
+            # 仅保留size和weight，使用系统默认字体
+            font=ctk.CTkFont(size=24, weight="bold"),
+            text_color=COLORS["text_primary"]
+        )
+        title_label.pack(anchor=tk.W, pady=(0, PADDING["title_to_subtitle"]))
+        
+        # ========== 2.2 安装包目录区域 ==========
+        # 小标题
+        dir_subtitle = ctk.CTkLabel(
+            panel_inner,
+            text="安装包目录",
+            font=ctk.CTkFont(size=14),
+            text_color=COLORS["text_primary"]
+        )
+        dir_subtitle.pack(anchor=tk.W, pady=(0, PADDING["subtitle_to_content"]))
+        
+        # 路径选择行（输入框+按钮）
+        dir_frame = ctk.CTkFrame(
+            panel_inner,
+            fg_color="transparent",
+            border_width=0
+        )
+        dir_frame.pack(fill=tk.X, pady=(0, PADDING["section_gap"]))
+        
+        path_entry = ctk.CTkEntry(
+            dir_frame,
+            textvariable=self.path_var,
+            font=ctk.CTkFont(size=12),
+            state="readonly",
+            border_width=0,
+            corner_radius=6,
+            fg_color="#F0F0F2",
+            text_color=COLORS["text_secondary"],
+            height=38
+        )
+        path_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        select_btn = ctk.CTkButton(
+            dir_frame,
+            text="更改",
+            command=self.select_folder,
+            font=ctk.CTkFont(size=12),
+            fg_color="#f8f8f9",
+            text_color=COLORS["text_primary"],
+            border_color=COLORS["border_color"],
+            border_width=1,
+            corner_radius=6,
+            height=38,
+            width=80,
+            hover_color="#e0e0e0"
+        )
+        select_btn.pack(side=tk.RIGHT, padx=(10, 0))
+        
+        # ========== 新增：2.3 安装目标目录区域 ==========
+        # 小标题
+        target_subtitle = ctk.CTkLabel(
+            panel_inner,
+            text="目标目录",
+            font=ctk.CTkFont(size=14),
+            text_color=COLORS["text_primary"]
+        )
+        target_subtitle.pack(anchor=tk.W, pady=(PADDING["section_gap"], PADDING["subtitle_to_content"]))
+        
+        # 目标路径选择行（输入框+按钮）
+        target_frame = ctk.CTkFrame(
+            panel_inner,
+            fg_color="transparent",
+            border_width=0
+        )
+        target_frame.pack(fill=tk.X, pady=(0, PADDING["section_gap"]))
+        
+        target_entry = ctk.CTkEntry(
+            target_frame,
+            textvariable=self.target_path_var,
+            font=ctk.CTkFont(size=12),
+            state="readonly",
+            border_width=0,
+            corner_radius=6,
+            fg_color="#F0F0F2",
+            text_color=COLORS["text_secondary"],
+            height=38
+        )
+        target_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        target_select_btn = ctk.CTkButton(
+            target_frame,
+            text="更改",
+            command=self.select_target_folder,
+            font=ctk.CTkFont(size=12),
+            fg_color="#f8f8f9",
+            text_color=COLORS["text_primary"],
+            border_color=COLORS["border_color"],
+            border_width=1,
+            corner_radius=6,
+            height=38,
+            width=80,
+            hover_color="#e0e0e0"
+        )
+        target_select_btn.pack(side=tk.RIGHT, padx=(10, 0))
+        
+        # ========== 2.4 安装列表区域 ==========
+        # 小标题
+        list_subtitle = ctk.CTkLabel(
+            panel_inner,
+            text="安装列表",
+            font=ctk.CTkFont(size=14),
+            text_color=COLORS["text_primary"]
+        )
+        list_subtitle.pack(anchor=tk.W, pady=(PADDING["section_gap"], PADDING["subtitle_to_content"]))
+        
+        # 说明文字 + 搜索与排序
+        list_tools = ctk.CTkFrame(panel_inner, fg_color="transparent")
+        list_tools.pack(fill=tk.X, pady=(0, PADDING["subtitle_to_content"]))
+        list_note = ctk.CTkLabel(
+            list_tools,
+            text="自动识别出的 .exe、.msi（含 .zip 中的）会显示在下方",
+            font=ctk.CTkFont(size=11),
+            text_color=COLORS["text_secondary"]
+        )
+        list_note.pack(side=tk.LEFT)
+        self.sort_var = tk.StringVar(value=SORT_KEYS["order"])
+        sort_menu = ctk.CTkOptionMenu(
+            list_tools,
+            variable=self.sort_var,
+            values=list(SORT_KEYS.values()),
+            command=lambda choice: self.apply_list_sort(),
+            font=ctk.CTkFont(size=11),
+            width=90,
+            height=24
+        )
+        sort_menu.pack(side=tk.RIGHT)
+        # 不使用 textvariable：CTkEntry 绑定变量后不显示占位文字
+        self.search_entry = ctk.CTkEntry(
+            list_tools,
+            placeholder_text="搜索安装包",
+            font=ctk.CTkFont(size=11),
+            border_color=COLORS["border_color"],
+            width=140,
+            height=24
+        )
+        self.search_entry.bind("<KeyRelease>", lambda event: self.apply_list_filter())
+        self.search_entry.pack(side=tk.RIGHT, padx=(0, 6))
+        
+        # 列表框（原生tk组件，使用系统默认字体+平滑）
+        list_frame = ctk.CTkFrame(
+            panel_inner,
+            fg_color=COLORS["content_bg"],
+            border_color=COLORS["border_color"],
+            border_width=1,
+            corner_radius=6,
+            height=100
+        )
+        list_frame.pack(fill=tk.X, pady=(0, PADDING["section_gap"]))
+        list_frame.pack_propagate(False)
+        
+        self.package_view = PackageListView(
+            list_frame,
+            self.package_model,
+            # 使用系统默认字体，指定大小
+            font=(self.default_font.actual()["family"], 14),
+            bg=COLORS["content_bg"],
+            fg=COLORS["text_primary"],
+            bd=0,
+            highlightthickness=0,
+            relief=tk.FLAT,
+            # 开启列表框字体平滑
+            activestyle="none"
+        )
+        # 强制开启抗锯齿（Windows）
+        if os.name == "nt":
+            self.package_view.configure(font=("Segoe UI", 14))  # Windows默认无衬线字体
+        self.package_view.pack(fill=tk.BOTH, expand=True, padx=8, pady=8)
+        
+        # ========== 2.5 日志输出区域 ==========
+        # 小标题
+        log_subtitle = ctk.CTkLabel(
+            panel_inner,
+            text="输出",
+            font=ctk.CTkFont(size=14),
+            text_color=COLORS["text_primary"]
+        )
+        log_subtitle.pack(anchor=tk.W, pady=(PADDING["section_gap"], PADDING["subtitle_to_content"]))
+        
+        # 日志框（原生tk组件，字体优化）
+        log_frame = ctk.CTkFrame(
+            panel_inner,
+            fg_color=COLORS["content_bg"],
+            border_color=COLORS["border_color"],
+            border_width=1,
+            corner_radius=6,
+            height=100
+        )
+        log_frame.pack(fill=tk.X, pady=(0, PADDING["panel_pad"]))
+        log_frame.pack_propagate(False)
+        
+        self.log_text = tk.Text(
+            log_frame,
+            # 使用系统默认字体
+            font=(self.default_font.actual()["family"], 14),
+            bg=COLORS["content_bg"],
+            fg=COLORS["text_primary"],
+            bd=0,
+            highlightthickness=0,
+            relief=tk.FLAT,
+            wrap=tk.WORD,
+            state=tk.DISABLED
+        )
+        # Windows下强制使用Segoe UI（系统默认，自带抗锯齿）
+        if os.name == "nt":
+            self.log_text.configure(font=("Segoe UI", 14))
+        self.log_text.pack(fill=tk.BOTH, expand=True, padx=8, pady=8)
+        
+        # ========== 2.6 进度条 ==========
+        self.progress_var = tk.DoubleVar(value=0)
+        self.progress_bar = ctk.CTkProgressBar(
+            panel_inner,
+            variable=self.progress_var,
+            height=6,
+            corner_radius=3,
+            fg_color=COLORS["progress_bg"],
+            progress_color=COLORS["progress_fg"]
+        )
+        self.progress_bar.pack(fill=tk.X, pady=(0, 4))
+        self.eta_label = ctk.CTkLabel(
+            panel_inner,
+            text="",
+            font=ctk.CTkFont(size=11),
+            text_color=COLORS["text_secondary"],
+            height=16
+        )
+        self.eta_label.pack(anchor=tk.W, pady=(0, PADDING["panel_pad"] - 4))
+        
+        # ========== 2.7 按钮区域 ==========
+        btn_frame = ctk.CTkFrame(
+            panel_inner,
+            fg_color="transparent",
+            border_width=0
+        )
+        btn_frame.pack(fill=tk.X, anchor=tk.E)
+        
+        self.cancel_btn = ctk.CTkButton(
+            btn_frame,
+            text="取消",
+            command=self.cancel_install,
+            font=ctk.CTkFont(size=12),
+            fg_color="transparent",
+            text_color=COLORS["btn_cancel_text"],
+            border_width=0,
+            corner_radius=6,
+            height=38,
+            width=40,
+             hover_color="#F0F0F2"
+
+        )
+        self.cancel_btn.pack(side=tk.LEFT, padx=0)
+
+        self.start_btn = ctk.CTkButton(
+            btn_frame,
+            text="开始批量安装",
+            command=self.start_install,
+            font=ctk.CTkFont(size=12, weight="bold"),
+            fg_color=COLORS["btn_primary_bg"],
+            text_color=COLORS["btn_primary_text"],
+            border_width=0,
+            corner_radius=6,
+            height=38,
+            width=120,
+            hover_color="#2c4a78"
+        )
+        self.start_btn.pack(side=tk.RIGHT)
+        
+        # 默认跳过上次成功安装后没有变化的安装包，勾选后全部重新安装
+        force_check = ctk.CTkCheckBox(
+            btn_frame,
+            text="重新安装未变化的包",
+            variable=self.force_var,
+            font=ctk.CTkFont(size=12),
+            text_color=COLORS["text_secondary"],
+            checkbox_width=18,
+            checkbox_height=18,
+            border_width=1
+        )
+        force_check.pack(side=tk.RIGHT, padx=(0, 16))
+        
+        # 同一产品有多个版本时默认只安装最新版本，勾选后全部安装
+        all_versions_check = ctk.CTkCheckBox(
+            btn_frame,
+            text="安装所有版本",
+            variable=self.all_versions_var,
+            font=ctk.CTkFont(size=12),
+            text_color=COLORS["text_secondary"],
+            checkbox_width=18,
+            checkbox_height=18,
+            border_width=1
+        )
+        all_versions_check.pack(side=tk.RIGHT, padx=(0, 16))
+        
+        # 调度顺序：按以往安装耗时短作业优先（尽快装好可用的程序）或长作业优先（缩短总耗时）
+        order_menu = ctk.CTkOptionMenu(
+            btn_frame,
+            variable=self.order_var,
+            values=list(ORDER_POLICIES.values()),
+            font=ctk.CTkFont(size=12),
+            width=110,
+            height=28
+        )
+        order_menu.pack(side=tk.RIGHT, padx=(0, 16))
+    
+    # ========== 新增：选择安装目标目录 ==========
+    def select_target_folder(self):
+        """选择安装目标目录"""
+        target_folder = ctk.filedialog.askdirectory(title="选择安装目标目录")
+        if target_folder:
+            self.target_path_var.set(target_folder)
+            self.add_log(f"📁 已选择安装目标目录：{target_folder}")
+    
+    def select_folder(self):
+        """选择文件夹并识别安装包"""
+        self.add_log("📂 开始选择安装包文件夹...")
+        folder_path = ctk.filedialog.askdirectory(title="选择安装包文件夹")
+        if not folder_path:
+            self.add_log("❌ 取消了文件夹选择")
+            return
+        
+        self.add_log(f"📁 已选择文件夹：{folder_path}")
+        self.scan_folder(folder_path)
+    
+    # ========== 新增：加载默认package文件夹 ==========
+    def load_default_folder(self):
+        """自动加载默认路径./package的安装包"""
+        default_package_path = self.get_default_package_path()
+        if not os.path.exists(default_package_path):
+            self.add_log(f"⚠️ 默认路径 {default_package_path} 不存在，需手动选择文件夹")
+            return
+        
+        self.add_log(f"📁 自动加载默认文件夹：{default_package_path}")
+        self.scan_folder(default_package_path)
+    
+    def open_scanner(self):
+        """安装包扫描器（目录索引缓存在 .flyinstaller 下，不可写时不缓存）"""
+        try:
+            index_path = paths.data_path("scan_index.json")
+        except OSError as e:
+            print(f"扫描索引不可用：{e}")
+            index_path = None
+        return PackageScanner(index_path, max_depth=self.scan_depth)
+    
+    def scan_folder(self, folder_path):
+        """在后台线程中扫描安装包文件夹，结果按批通过日志管道交给界面线程"""
+        if self.scan_cancel is not None:
+            self.scan_cancel.set()
+        self.scan_generation += 1
+        generation = self.scan_generation
+        cancel_event = self.scan_cancel = threading.Event()
+        self.path_var.set(folder_path)
+        self.package_model.clear()
+        self.package_view.refresh()
+        self.scanning = True
+        
+        def worker():
+            error = None
+            try:
+                with self.tracer.span("scan", cat="scan", folder=folder_path) as span:
+                    found = self.scanner.scan(
+                        folder_path,
+                        on_batch=lambda batch: self.log_pipeline.post(
+                            "scan_batch", (generation, make_entries(batch, folder_path, self.runtime_history,
+                                                     self.metadata))),
+                        cancel_event=cancel_event,
+                        log=self.add_log
+                    )
+                    span.args["packages"] = len(found)
+                    span.args["cached_dirs"] = self.scanner.hits
+            except Exception as e:
+                error = e
+            self.log_pipeline.post("scan_done", (generation, error))
+        
+        threading.Thread(target=worker, name="package-scan", daemon=True).start()
+    
+    @property
+    def install_files(self):
+        """全部安装包路径（扫描顺序，不受列表筛选与排序影响）"""
+        return self.package_model.paths()
+    
+    def add_scanned(self, entries):
+        """（界面线程）把一批扫描结果加入列表"""
+        self.package_model.extend(entries)
+        self.package_view.refresh()
+        names = [entry.name for entry in entries]
+        shown = "、".join(names[:5]) + (f" 等 {len(names)} 个" if len(names) > 5 else "")
+        self.add_log(f"🔍 识别到安装包：{shown}")
+    
+    def finish_scan(self, error):
+        self.scanning = False
+        if error is not None:
+            self.add_log(f"❌ 读取文件夹失败：{str(error)}")
+        elif not self.install_files:
+            self.add_log("⚠️ 未在该文件夹中找到.exe/.msi安装包或包含安装包的.zip压缩包")
+        else:
+            self.add_log(f"✅ 共识别到 {len(self.install_files)} 个安装包")
+    
+    def apply_list_filter(self):
+        self.package_model.set_filter(self.search_entry.get())
+        self.package_view.first = 0
+        self.package_view.refresh()
+    
+    def apply_list_sort(self):
+        sort_by = next(key for key, label in SORT_KEYS.items() if label == self.sort_var.get())
+        # 大小、耗时从大到小，名称、扫描顺序从前到后
+        self.package_model.set_sort(sort_by, reverse=sort_by in ("size", "duration"))
+        self.package_view.refresh()
+    
+    def show_plan(self, pending, skipped, resumed, estimates, superseded):
+        """（界面线程）批次开始：标记排队中、旧版本、未变化跳过、上次中断前已完成的安装包，按估算耗时计算进度"""
+        self.batch_progress = BatchProgress(
+            {file_path: estimates.get(file_path, DEFAULT_ESTIMATE) for file_path in pending})
+        self.package_model.reset_status()
+        for file_path, status in resumed.items():
+            self.package_model.set_status(file_path, SUCCEEDED if status == "succeeded" else FAILED)
+        for file_path in skipped:
+            self.package_model.set_status(file_path, UNCHANGED_STATUS)
+        for file_path in superseded:
+            self.package_model.set_status(file_path, SUPERSEDED)
+        for file_path in pending:
+            self.package_model.set_status(file_path, QUEUED)
+        self.package_view.refresh()
+    
+    def set_package_status(self, file_path, status):
+        """（界面线程）更新一个安装包的状态，只刷新对应的一行"""
+        self.package_view.update_row(self.package_model.set_status(file_path, status))
+    
+    def add_log(self, message):
+        """线程安全的日志添加（只入队，由界面定时器批量显示）"""
+        self.log_pipeline.put(message)
+    
+    def update_progress(self, value):
+        """线程安全的进度条更新（0–1，只记录最新值，由界面定时器统一刷新）"""
+        self.pending_progress = value
+    
+    def refresh_progress(self):
+        """（界面线程）按估算耗时刷新进度条与剩余时间，正在安装的包随时间推进"""
+        if self.batch_progress is None:
+            return
+        self.progress_var.set(self.batch_progress.fraction())
+        text = format_eta(self.batch_progress.eta())
+        if self.eta_label.cget("text") != text:
+            self.eta_label.configure(text=text)
+    
+    def ui_tick(self):
+        """界面定时刷新：一次插入所有待显示日志，处理引擎事件，并应用最新进度"""
+        try:
+            events = self.log_pipeline.drain_events()
+            # 空闲的刷新不记录追踪，避免每 50ms 产生一个事件
+            if events or self.log_pipeline.backlog or self.pending_progress is not None:
+                with self.tracer.span("ui_tick", cat="ui", events=len(events)) as span:
+                    span.args["lines"] = self.apply_updates(events)
+            self.refresh_progress()
+        except Exception as e:
+            print(f"日志更新失败：{e}")
+        self.root.after(UI_TICK_MS, self.ui_tick)
+    
+    def apply_updates(self, events):
+        """处理引擎事件，一次插入所有待显示日志并应用最新进度，返回插入的行数"""
+        for kind, payload in events:
+            self.handle_event(kind, payload)
+        lines, dropped = self.log_pipeline.drain()
+        if lines:
+            if dropped:
+                lines.insert(0, f"…… 日志过多，界面省略 {dropped} 行（完整日志见 {self.log_pipeline.log_path}）")
+            self.log_text.config(state=tk.NORMAL)
+            self.log_text.insert(tk.END, "\n".join(lines) + "\n")
+            # 日志框只保留最近的 MAX_UI_LINES 行
+            line_count = int(self.log_text.index("end-1c").split(".")[0])
+            if line_count > MAX_UI_LINES:
+                self.log_text.delete("1.0", f"{line_count - MAX_UI_LINES}.0")
+            self.log_text.see(tk.END)
+            self.log_text.config(state=tk.DISABLED)
+        if self.pending_progress is not None:
+            self.progress_var.set(self.pending_progress)
+            self.pending_progress = None
+        return len(lines)
+    
+    def handle_event(self, kind, payload):
+        """处理安装运行时发来的事件（在界面线程中调用）"""
+        if kind == "scan_batch":
+            generation, entries = payload
+            if generation == self.scan_generation:
+                self.add_scanned(entries)
+        elif kind == "scan_done":
+            generation, error = payload
+            if generation == self.scan_generation:
+                self.finish_scan(error)
+        elif kind == "planned":
+            self.show_plan(*payload)
+        elif kind == "started":
+            if self.batch_progress is not None:
+                self.batch_progress.start(payload)
+            self.set_package_status(payload, RUNNING)
+        elif kind == "result":
+            file_path, success = payload
+            if self.batch_progress is not None:
+                self.batch_progress.finish(file_path)
+            self.set_package_status(file_path, SUCCEEDED if success else FAILED)
+        elif kind == "cancelled":
+            count, elapsed = payload
+            if count:
+                self.add_log(f"🛑 已终止 {count} 个安装进程，用时 {elapsed:.2f} 秒")
+        elif kind == "finished":
+            results = payload
+            if self.cancel_flag:
+                self.add_log("\n🛑 检测到取消信号，终止安装流程")
+            # 批次已结束（包括手动取消、预检未通过），整理进度日志，下次不再续装
+            if self.journal is not None:
+                self.journal.complete()
+                self.journal = None
+            self.batch_progress = None
+            self.eta_label.configure(text="")
+            self.package_model.reset_status(only=(QUEUED, RUNNING))
+            self.package_view.refresh()
+            if self.preflight_failed:
+                self.add_log("⛔ 预检未通过，未开始安装，请处理以上问题后重试")
+                self.reset_ui()
+                return
+            self.finalize_install(sum(1 for result in results if result) + self.resumed_succeeded,
+                                  len(self.install_files) - self.unchanged_skipped - self.superseded_skipped)
+            reboot = [os.path.basename(outcome.file_path) for outcome in self.batch_engine.outcomes.values()
+                      if outcome.reboot]
+            if reboot:
+                self.add_log(f"🔁 需要重启计算机：{'、'.join(reboot)}")
+    
+    def open_log_pipeline(self):
+        """创建日志管道，完整日志同步写入 .flyinstaller/logs 目录"""
+        try:
+            log_path = paths.data_path("logs", time.strftime("flyinstaller-%Y%m%d-%H%M%S.log"))
+            os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        except OSError as e:
+            print(f"日志文件不可用：{e}")
+            log_path = None
+        return LogPipeline(log_path)
+    
+    def open_tracer(self):
+        """创建耗时追踪，数据目录不可写时不记录"""
+        try:
+            return open_tracer()
+        except OSError as e:
+            print(f"耗时追踪不可用：{e}")
+            return NULL_TRACER
+    
+    def on_close(self):
+        """关闭窗口前停止安装运行时并写完剩余日志"""
+        self.runtime.close()
+        if self.worker_pool is not None:
+            self.worker_pool.close()
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.close()
+        if self.journal is not None:
+            # 安装中途关闭窗口：保留进度，下次启动时续装
+            self.journal.close()
+        self.log_pipeline.close()
+        self.tracer.close()
+        if self.metrics is not None:
+            self.metrics.close()
+        self.root.destroy()
+    
+    def cancel_install(self):
+        """取消安装：立即结束正在运行的安装进程及其子进程"""
+        self.cancel_flag = True
+        self.cancel_event.set()
+        self.add_log("⚠️ 触发取消安装操作，正在终止正在运行的安装进程...")
+        self.root.after(10, lambda: self.cancel_btn.configure(state=tk.DISABLED))
+        self.runtime.cancel()
+    
+    def open_plan(self):
+        """读取并编译安装包文件夹的部署清单，没有清单时返回 None；清单有误时抛出 ManifestError"""
+        folder = self.path_var.get()
+        path = find_manifest(folder)
+        if path is None:
+            return None
+        try:
+            manifest = load_manifest(path)
+        except OSError as e:
+            raise ManifestError(f"无法读取 {path}：{e}")
+        plan = manifest.compile(self.install_files, folder, history=self.runtime_history, log=self.add_log)
+        self.add_log(f"📜 部署清单 {path}：{plan.describe()}")
+        return plan
+    
+    def open_worker_pool(self):
+        """安装工作进程池，进程数与各通道并发数之和相同"""
+        size = sum(self.lane_limits.values())
+        if self.worker_pool is not None and self.worker_pool.size != size:
+            self.worker_pool.close()
+            self.worker_pool = None
+        if self.worker_pool is None:
+            self.worker_pool = WorkerPool(size, cancel_event=self.cancel_event, log=self.add_log)
+        return self.worker_pool
+    
+    def create_engine(self, target_path=None, resume_attempts=None, plan=None):
+        """创建安装引擎（日志与取消信号接入界面）"""
+        pool = self.open_worker_pool()
+        return InstallEngine(
+            target_path if target_path is not None else self.target_path_var.get(),
+            log=self.add_log,
+            cancel_event=self.cancel_event,
+            silent_params=self.exe_silent_params,
+            switch_cache=self.switch_cache,
+            tracer=self.tracer,
+            history=self.runtime_history,
+            journal=self.journal,
+            resume_attempts=resume_attempts,
+            install_state=self.install_state,
+            stager=self.open_stager(),
+            package_settings=plan.settings if plan is not None else None,
+            metrics=self.metrics,
+            launcher=pool,
+            tracker=pool,
+            stats=self.batch_stats
+        )
+    
+    def open_stager(self):
+        """安装包文件夹在网络共享上时，把接下来的安装包预取到本地后再安装"""
+        if not self.install_files:
+            return None
+        return create_stager(self.path_var.get(), log=self.add_log, cancel_event=self.cancel_event)
+        
+    def batch_install(self, target_path=None):
+        """批量安装：交给后台事件循环执行，结果通过 finished 事件返回"""
+        total_files = len(self.install_files)
+        if total_files == 0:
+            self.add_log("❌ 没有待安装的文件，请先选择包含安装包的文件夹")
+            self.root.after(10, lambda: self.reset_ui())
+            return
+        
+        self.cancel_flag = False
+        self.preflight_failed = False
+        self.cancel_event.clear()
+        
+        self.add_log(f"\n🚀 开始批量安装，共 {total_files} 个安装包")
+        lanes_desc = "，".join(f"{lane.upper()}×{limit}" for lane, limit in self.lane_limits.items())
+        self.add_log(f"ℹ️ 并发通道：{lanes_desc}")
+        
+        try:
+            plan = self.open_plan()
+        except ManifestError as e:
+            self.add_log(f"❌ 部署清单有误：{e}")
+            self.root.after(10, lambda: self.reset_ui())
+            return
+        
+        target_path = target_path if target_path is not None else self.target_path_var.get()
+        # 批次日志按完整列表记录，跳过未变化的包不影响中断后的续装
+        resume = self.open_journal(target_path)
+        self.resumed_succeeded = 0
+        self.unchanged_skipped = 0
+        self.superseded_skipped = 0
+        if resume is not None:
+            self.add_log(f"🔁 继续上次中断的批次：跳过已完成的 {total_files - len(resume.remaining())} 个安装包")
+        self.add_log("==================================================")
+        
+        engine = self.create_engine(target_path, resume.attempts if resume is not None else None, plan)
+        self.batch_engine = engine
+        force = self.force_var.get()
+        all_versions = self.all_versions_var.get()
+        options = plan.scheduler_options() if plan is not None else {}
+        policy = next(key for key, label in ORDER_POLICIES.items() if label == self.order_var.get())
+        priority = order_priority(policy, self.batch_estimates)
+        if priority is not None:
+            options["priority"] = priority
+            self.add_log(f"🔀 调度顺序：{ORDER_POLICIES[policy]}")
+        self.runtime.start_batch(
+            engine, self.install_files, self.lane_limits,
+            plan=lambda files: self.plan_batch(files, target_path, force, resume, all_versions),
+            options=options
+        )
+    
+    def reset_ui(self):
+        """重置UI状态"""
+        self.is_installing = False
+        self.start_btn.configure(state=tk.NORMAL)
+        self.cancel_btn.configure(state=tk.DISABLED)
+    
+    def finalize_install(self, success_count, total_files):
+        """安装完成后的收尾"""
+        self.is_installing = False
+        self.start_btn.configure(state=tk.NORMAL)
+        self.cancel_btn.configure(state=tk.DISABLED)
+        
+        final_progress = 1.0 if not self.cancel_flag else self.progress_var.get()
+        self.progress_var.set(final_progress)
+        
+        self.add_log("\n==================================================")
+        if self.cancel_flag:
+            self.add_log(f"⛔ 安装已取消，成功安装 {success_count}/{total_files} 个包")
+        else:
+            self.add_log(f"✅ 批量安装完成，成功安装 {success_count}/{total_files} 个包")
+        
+        if success_count < total_files and not self.cancel_flag:
+            self.add_log("⚠️ 部分安装包安装失败，请查看日志并手动安装")
+    
+    def start_install(self):
+        """启动安装"""
+        if self.is_installing:
+            self.add_log("⚠️ 已有安装任务在执行，请勿重复点击")
+            return
+        
+        if self.scanning:
+            self.add_log("⏳ 正在扫描安装包文件夹，请稍候")
+            return
+        
+        if not self.install_files:
+            self.add_log("❌ 没有待安装的文件，请先选择包含安装包的文件夹")
+            return
+        
+        self.add_log("\n🚀 点击了开始批量安装按钮")
+        self.add_log("ℹ️ 提示：部分安装包可能需要手动确认，或管理员权限")
+        
+        self.is_installing = True
+        self.root.after(10, lambda: self.update_btn_states())
+        
+        self.batch_install(self.target_path_var.get())
+    
+    def update_btn_states(self):
+        """更新按钮状态"""
+        self.start_btn.configure(state=tk.DISABLED)
+        self.cancel_btn.configure(state=tk.NORMAL)
+        self.progress_var.set(0)
+
+def main():
+    """启动界面"""
+    ctk.set_appearance_mode("light")
+    ctk.set_default_color_theme("blue")
+    
+    root = ctk.CTk()
+    FlyInstaller(root)
+    root.mainloop()
@@ -0,0 +1,132 @@
+"""安装状态索引：记录每个安装包最近一次成功安装时的文件身份，用于增量安装
+
+键为 目标目录 + 安装包的完整路径（压缩包中的安装包为 压缩包路径 + 包内路径），值为成功安装时的 大小、修改时间、内容哈希。
+批次开始前把安装包分为三类：
+
+- new：没有成功安装记录；
+- changed：大小不同，或大小相同、修改时间不同且内容哈希也不同；
+- unchanged：大小与修改时间都相同，或只有修改时间不同但内容哈希相同（如重新复制到共享目录）。
+
+默认跳过 unchanged，强制模式下全部安装。失败的安装不更新记录，下次仍会重新安装。
+"""
+import json
+import os
+import threading
+import time
+
+from .bundles import package_stat
+from .switch_cache import hash_file
+
+# 版本 1 的键只有文件名，不同目录下的同名安装包（如 a\setup.exe 与 b\setup.exe）会共用记录
+STATE_VERSION = 2
+
+NEW = "new"
+CHANGED = "changed"
+UNCHANGED = "unchanged"
+
+
+def state_key(file_path, target_path):
+    """同一个安装包安装到不同目录视为不同记录；不同目录下的同名安装包也是不同记录"""
+    target = os.path.normcase(os.path.normpath(target_path or ""))
+    return f"{target}|{os.path.normcase(os.path.abspath(file_path))}"
+
+
+class InstallState:
+    """安装状态索引（线程安全，JSON 文件）
+
+    hasher(file_path) 返回内容哈希，默认直接计算 SHA-256；
+    使用参数缓存时可传入 SwitchCache.content_hash，复用其按大小和修改时间缓存的哈希。
+    """
+
+    def __init__(self, path, hasher=None):
+        self.path = path
+        self.hasher = hasher or hash_file
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._entries = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != STATE_VERSION:
+            return
+        self._entries = data.get("installed", {})
+
+    def save(self):
+        """原子写入（先写临时文件再替换）"""
+        with self._save_lock:
+            with self._lock:
+                payload = json.dumps({"version": STATE_VERSION, "installed": self._entries},
+                                     ensure_ascii=False, separators=(",", ":"))
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp_path, self.path)
+
+    def classify(self, file_path, target_path):
+        """返回 new / changed / unchanged"""
+        key = state_key(file_path, target_path)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return NEW
+        try:
+            stat = package_stat(file_path)
+        except OSError:
+            return CHANGED
+        if stat.st_size != entry["size"]:
+            return CHANGED
+        if stat.st_mtime_ns == entry["mtime_ns"]:
+            return UNCHANGED
+        # 只有修改时间变化：用内容哈希判断
+        if not entry.get("sha256"):
+            return CHANGED
+        try:
+            digest = self.hasher(file_path)
+        except OSError:
+            return CHANGED
+        if digest != entry["sha256"]:
+            return CHANGED
+        with self._lock:
+            entry["mtime_ns"] = stat.st_mtime_ns
+        return UNCHANGED
+
+    def plan(self, files, target_path, force=False):
+        """对整批安装包分类，返回 (待安装列表, {路径: 分类})；force 时未变化的也安装"""
+        kinds = {file_path: self.classify(file_path, target_path) for file_path in files}
+        pending = [file_path for file_path in files if force or kinds[file_path] != UNCHANGED]
+        # classify 可能更新了修改时间（内容未变），一并保存
+        try:
+            self.save()
+        except OSError:
+            pass
+        return pending, kinds
+
+    def record(self, file_path, target_path, command=None):
+        """记录一次成功安装"""
+        try:
+            stat = package_stat(file_path)
+            digest = self.hasher(file_path)
+        except OSError:
+            return
+        with self._lock:
+            self._entries[state_key(file_path, target_path)] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": digest,
+                "command": command,
+                "installed": int(time.time()),
+            }
+        self.save()
+
+
+def describe_plan(kinds):
+    """分类统计的日志文本"""
+    counts = {NEW: 0, CHANGED: 0, UNCHANGED: 0}
+    for kind in kinds.values():
+        counts[kind] += 1
+    return f"新增 {counts[NEW]} 个，已更新 {counts[CHANGED]} 个，未变化 {counts[UNCHANGED]} 个"
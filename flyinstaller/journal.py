@@ -0,0 +1,215 @@
+"""可断点续装的批次日志（追加写入 + fsync）
+
+程序或机器在批量安装中途崩溃后，下次启动时根据日志跳过已完成的安装包，
+正在安装的包从上次尝试的参数之后继续，而不是从第一个包重新开始。
+
+日志为 JSON Lines，每行一个状态变化，安装包用批次头中的序号表示：
+    {"batch": 1, "target": "...", "files": [...], "started": 1700000000}   批次开始（列出的包均为排队中）
+    {"i": 3, "a": 2}                                                        第 3 个包开始第 2 次尝试
+    {"i": 3, "s": "succeeded"}                                             第 3 个包结束（succeeded / failed）
+    {"done": true}                                                          批次结束
+多个并发任务只把记录放入队列，由后台线程合并写入并 fsync（组提交），不阻塞事件循环。
+批次结束时整理为只含最终状态的短文件。
+"""
+import json
+import os
+import threading
+import time
+
+JOURNAL_VERSION = 1
+
+# 结束状态（续装时跳过）
+FINAL_STATES = ("succeeded", "failed")
+
+
+class JournalState:
+    """从日志读出的批次状态"""
+
+    def __init__(self, files, target, started):
+        self.files = files
+        self.target = target
+        self.started = started
+        # 路径 → 最终状态
+        self.statuses = {}
+        # 路径 → 已开始的尝试次数
+        self.attempts = {}
+        self.complete = False
+
+    def status(self, file_path):
+        """queued / running / succeeded / failed"""
+        if file_path in self.statuses:
+            return self.statuses[file_path]
+        return "running" if file_path in self.attempts else "queued"
+
+    @property
+    def interrupted(self):
+        return not self.complete
+
+    def remaining(self):
+        """未完成的安装包（保持原顺序）"""
+        return [file_path for file_path in self.files if file_path not in self.statuses]
+
+    def matches(self, files, target):
+        """是否为同一批安装包、同一目标目录（中断的批次只在此时续装）"""
+        return target == self.target and sorted(files) == sorted(self.files)
+
+
+def read_journal(path):
+    """读取日志，文件不存在或没有批次头时返回 None；崩溃时写了一半的最后一行被忽略"""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    state = None
+    for raw in data.splitlines():
+        try:
+            record = json.loads(raw)
+        except ValueError:
+            continue
+        if "batch" in record:
+            if record.get("batch") != JOURNAL_VERSION:
+                return None
+            state = JournalState(record["files"], record.get("target"), record.get("started"))
+        elif state is None:
+            continue
+        elif "i" in record:
+            try:
+                file_path = state.files[record["i"]]
+            except (IndexError, TypeError):
+                continue
+            if "a" in record:
+                state.attempts[file_path] = max(state.attempts.get(file_path, 0), record["a"])
+            if record.get("s") in FINAL_STATES:
+                state.statuses[file_path] = record["s"]
+        elif record.get("done"):
+            state.complete = True
+    return state
+
+
+class BatchJournal:
+    """当前批次的日志写入器
+
+    begin() 写入批次头（续装时一并写入上次的进度），attempt()/finish() 可在任意线程调用，
+    complete() 在批次正常结束后整理日志；close() 只停止写入（保留进度供下次续装）。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._pending = []
+        self._index = {}
+        self._closed = False
+        self._fd = None
+        self._writer = None
+        self.files = []
+        self.target = None
+
+    def begin(self, files, target, resume=None):
+        """开始新批次；resume 为上次中断的 JournalState 时保留其中的完成状态与尝试次数"""
+        self.files = list(files)
+        self.target = target
+        self._index = {file_path: index for index, file_path in enumerate(self.files)}
+        started = resume.started if resume is not None and resume.started else int(time.time())
+        records = [{"batch": JOURNAL_VERSION, "target": target, "files": self.files, "started": started}]
+        if resume is not None:
+            records += self._progress(resume)
+        self._rewrite(records)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | getattr(os, "O_BINARY", 0))
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="journal-writer", daemon=True)
+        self._writer.start()
+
+    def _progress(self, state):
+        records = []
+        for file_path, index in self._index.items():
+            if file_path in state.attempts:
+                records.append({"i": index, "a": state.attempts[file_path]})
+            if file_path in state.statuses:
+                records.append({"i": index, "s": state.statuses[file_path]})
+        return records
+
+    def attempt(self, file_path, number):
+        """记录第 number 次尝试开始"""
+        self._append(file_path, "a", number)
+
+    def finish(self, file_path, status):
+        """记录安装包的最终状态（succeeded / failed）"""
+        self._append(file_path, "s", status)
+
+    def _append(self, file_path, key, value):
+        index = self._index.get(file_path)
+        if index is None:
+            return
+        line = json.dumps({"i": index, key: value}, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._fd is None:
+                return
+            self._pending.append(line.encode("utf-8"))
+            self._ready.notify()
+
+    def close(self, timeout=5.0):
+        """写完队列中的记录后停止写入线程（日志保留，下次启动可续装）"""
+        with self._lock:
+            self._closed = True
+            self._ready.notify()
+        if self._writer is not None:
+            self._writer.join(timeout)
+            self._writer = None
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def complete(self):
+        """批次正常结束：整理为只含最终状态的短日志，并标记为已完成"""
+        self.close()
+        state = read_journal(self.path)
+        records = [{"batch": JOURNAL_VERSION, "target": self.target, "files": self.files,
+                    "started": state.started if state else int(time.time())}]
+        if state is not None:
+            records += [{"i": self._index[file_path], "s": status} for file_path, status in state.statuses.items()
+                        if file_path in self._index]
+        records.append({"done": True})
+        self._rewrite(records)
+
+    def _rewrite(self, records):
+        """原子替换整个日志文件（写临时文件 → fsync → 替换）"""
+        payload = "".join(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n" for record in records)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _write_loop(self):
+        while True:
+            with self._lock:
+                while not self._pending and not self._closed:
+                    self._ready.wait()
+                batch, self._pending = self._pending, []
+                finished = self._closed
+                fd = self._fd
+            if batch and fd is not None:
+                try:
+                    os.write(fd, b"".join(batch))
+                    os.fsync(fd)
+                except OSError:
+                    pass
+            if finished:
+                return
+
+
+def open_batch(path, files, target, resume=True):
+    """开始一个批次并写入日志，返回 (BatchJournal, 上次中断的 JournalState 或 None)
+
+    上次的批次未正常结束、且安装包与目标目录都相同时续装；否则作为新批次开始。
+    """
+    state = read_journal(path) if resume else None
+    if state is not None and not (state.interrupted and state.matches(files, target)):
+        state = None
+    journal = BatchJournal(path)
+    journal.begin(files, target, resume=state)
+    return journal, state
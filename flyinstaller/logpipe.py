@@ -0,0 +1,95 @@
+"""日志管道：任意线程写入，界面定时批量取出，后台线程同步写入磁盘"""
+import threading
+import time
+from collections import deque
+
+# 界面日志框最多保留的行数（超出后删除最早的行）
+MAX_UI_LINES = 2000
+# 磁盘写入线程单次最多合并的行数
+WRITE_BATCH = 512
+
+
+class LogPipeline:
+    """线程安全的日志队列
+
+    put() 可在任意线程调用，只做一次加锁追加；界面线程周期性调用 drain() 一次取出全部待显示行。
+    指定 log_path 时完整日志由后台线程追加写入文件，不受界面行数上限影响。
+    进度、结果等非日志事件通过 post() 走同一通道，界面线程用 drain_events() 取出。
+    """
+
+    def __init__(self, log_path=None, max_pending=MAX_UI_LINES):
+        self._lock = threading.Lock()
+        # 界面来不及显示的旧行直接丢弃（磁盘中仍有完整记录）
+        self._pending = deque(maxlen=max_pending)
+        self._dropped = 0
+        self._events = deque()
+        self.total = 0
+        self.log_path = log_path
+        self._disk = deque()
+        self._disk_ready = threading.Condition(self._lock)
+        self._closed = False
+        self._writer = None
+        if log_path:
+            self._writer = threading.Thread(target=self._write_loop, name="log-writer", daemon=True)
+            self._writer.start()
+
+    def put(self, message):
+        """写入一条日志"""
+        line = f"{time.strftime('[%H:%M:%S]')} {message}"
+        with self._lock:
+            if len(self._pending) == self._pending.maxlen:
+                self._dropped += 1
+            self._pending.append(line)
+            self.total += 1
+            if self._writer is not None:
+                self._disk.append(line)
+                self._disk_ready.notify()
+
+    def post(self, kind, payload=None):
+        """发送一个非日志事件（任意线程）"""
+        with self._lock:
+            self._events.append((kind, payload))
+
+    def drain_events(self):
+        """取出全部待处理事件"""
+        with self._lock:
+            events = list(self._events)
+            self._events.clear()
+        return events
+
+    @property
+    def backlog(self):
+        """等待界面显示的行数（deque 的 len() 是原子操作，不加锁，指标导出线程读取时不影响写日志）"""
+        return len(self._pending)
+
+    def drain(self):
+        """取出全部待显示的行，返回 (行列表, 因积压被跳过的行数)"""
+        with self._lock:
+            lines = list(self._pending)
+            self._pending.clear()
+            dropped, self._dropped = self._dropped, 0
+        return lines, dropped
+
+    def close(self, timeout=2.0):
+        """停止写入线程（剩余日志写完后退出）"""
+        with self._lock:
+            self._closed = True
+            self._disk_ready.notify()
+        if self._writer is not None:
+            self._writer.join(timeout)
+
+    def _write_loop(self):
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            while True:
+                with self._lock:
+                    while not self._disk and not self._closed:
+                        self._disk_ready.wait()
+                    batch = []
+                    while self._disk and len(batch) < WRITE_BATCH:
+                        batch.append(self._disk.popleft())
+                    finished = self._closed and not self._disk
+                if batch:
+                    f.write("\n".join(batch) + "\n")
+                    f.flush()
+                if finished:
+                    return
@@ -0,0 +1,310 @@
+"""部署清单：按安装包声明参数、目标目录、成功返回码、依赖、并发组和重启要求
+
+清单为安装包文件夹内（或与其并列）的 flyinstaller.toml / flyinstaller.json，例如::
+
+    [groups]
+    runtime = 1                          # 并发组：组内同时只安装 1 个
+
+    [packages."vc_redist*.exe"]
+    args = ["/install", "/quiet", "/norestart"]
+    success_codes = [0, 1638, 3010]
+    group = "runtime"
+
+    [packages."7z*.exe"]
+    args = ["/S", "/D={target}\\\\7-Zip"]   # {file} 为安装包路径，{target} 为目标目录
+    target = "D:\\\\Tools"
+    depends_on = ["vc_redist*.exe"]
+    reboot = true
+
+    [packages."legacy_agent.msi"]
+    transient_codes = [1603, 1622]       # 按暂时性错误退避重试（见 retry.py）
+    fatal_codes = [1605]                 # 不再尝试其他参数
+    max_retries = 2
+
+packages 的键是 glob 规则：不含 “/” 时匹配文件名，否则匹配相对安装包文件夹的路径；
+一个安装包匹配多条规则时使用第一条完全相同的，否则使用第一条匹配的。
+声明了 args 的安装包只执行这一条命令（MSI 为 msiexec /i 安装包 + args），success_codes 判断是否成功；
+未声明 args 的仍自动识别参数。
+transient_codes / fatal_codes / max_retries 调整该安装包的返回码分类与暂时性错误的重试次数。
+
+compile() 把清单与本次扫描到的安装包编译为 ExecutionPlan：依赖构成有向无环图（有环时报错），
+按以往耗时估算每个安装包到图末端的最长路径（关键路径），调度时优先执行关键路径上的安装包，
+没有依赖关系的链并行执行。
+"""
+import fnmatch
+import json
+import os
+
+from .scanner import PACKAGE_SUFFIXES
+from .timeouts import percentile
+
+MANIFEST_NAMES = ("flyinstaller.toml", "flyinstaller.json")
+# 没有耗时记录时的估算耗时（秒）
+DEFAULT_ESTIMATE = 60.0
+
+RULE_FIELDS = ("args", "target", "success_codes", "depends_on", "group", "reboot",
+               "transient_codes", "fatal_codes", "max_retries")
+
+
+class ManifestError(ValueError):
+    """清单格式错误或依赖有环"""
+
+
+def find_manifest(package_dir):
+    """在安装包文件夹内、再在其所在目录中查找清单，找不到时返回 None"""
+    folder = os.path.abspath(package_dir)
+    for directory in (folder, os.path.dirname(folder)):
+        for name in MANIFEST_NAMES:
+            path = os.path.join(directory, name)
+            if os.path.isfile(path):
+                return path
+    return None
+
+
+def _read(path):
+    if path.lower().endswith(".toml"):
+        try:
+            import tomllib
+        except ImportError:
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ManifestError("读取 TOML 清单需要 Python 3.11 或 tomli，可改用 flyinstaller.json")
+        with open(path, "rb") as f:
+            try:
+                return tomllib.load(f)
+            except tomllib.TOMLDecodeError as e:
+                raise ManifestError(f"清单格式错误：{e}")
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            return json.load(f)
+        except ValueError as e:
+            raise ManifestError(f"清单格式错误：{e}")
+
+
+def _string_list(value, field, pattern):
+    if isinstance(value, str):
+        return [value]
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise ManifestError(f"{pattern}：{field} 应为字符串列表")
+    return list(value)
+
+
+def _code_list(value, field, pattern):
+    if value is None:
+        return None
+    if not (isinstance(value, list) and all(isinstance(code, int) and not isinstance(code, bool) for code in value)):
+        raise ManifestError(f"{pattern}：{field} 应为整数列表")
+    return tuple(value) or None
+
+
+class PackageRule:
+    """清单中一个安装包（或一组匹配的安装包）的配置"""
+
+    def __init__(self, pattern, fields):
+        unknown = set(fields) - set(RULE_FIELDS)
+        if unknown:
+            raise ManifestError(f"{pattern}：未知字段 {'、'.join(sorted(unknown))}")
+        self.pattern = pattern
+        self.args = _string_list(fields["args"], "args", pattern) if "args" in fields else None
+        self.target = fields.get("target")
+        self.success_codes = _code_list(fields.get("success_codes"), "success_codes", pattern)
+        # 返回码分类（见 retry.py）：暂时性错误按退避时间重试，致命错误不再尝试其他参数
+        self.transient_codes = _code_list(fields.get("transient_codes"), "transient_codes", pattern)
+        self.fatal_codes = _code_list(fields.get("fatal_codes"), "fatal_codes", pattern)
+        max_retries = fields.get("max_retries")
+        if max_retries is not None and (not isinstance(max_retries, int) or isinstance(max_retries, bool)
+                                        or max_retries < 0):
+            raise ManifestError(f"{pattern}：max_retries 应为非负整数")
+        self.max_retries = max_retries
+        self.depends_on = _string_list(fields.get("depends_on", []), "depends_on", pattern)
+        self.group = fields.get("group")
+        self.reboot = bool(fields.get("reboot", False))
+
+    def matches(self, name, relpath):
+        pattern = self.pattern.lower()
+        return fnmatch.fnmatchcase(relpath.lower() if "/" in pattern else name.lower(), pattern)
+
+    def exact(self, name, relpath):
+        return self.pattern.lower() in (name.lower(), relpath.lower())
+
+
+class Manifest:
+    """解析后的部署清单"""
+
+    def __init__(self, path, rules, group_limits):
+        self.path = path
+        self.rules = rules
+        self.group_limits = group_limits
+
+    def rule_for(self, name, relpath):
+        for rule in self.rules:
+            if rule.exact(name, relpath):
+                return rule
+        for rule in self.rules:
+            if rule.matches(name, relpath):
+                return rule
+        return None
+
+    def compile(self, files, package_dir, history=None, log=None, estimates=None):
+        """编译为 ExecutionPlan；依赖有环时抛出 ManifestError
+
+        estimates 为 {路径: 估算耗时}（如 MetricsStore.estimate_all()），未指定时按 history 中的耗时估算。
+        """
+        log = log or (lambda message: None)
+        names = {}
+        for file_path in files:
+            relpath = os.path.relpath(file_path, package_dir).replace(os.sep, "/")
+            names[file_path] = (os.path.basename(file_path), relpath)
+
+        settings = {}
+        used = set()
+        for file_path, (name, relpath) in names.items():
+            rule = self.rule_for(name, relpath)
+            if rule is not None:
+                settings[file_path] = rule
+                used.add(rule.pattern)
+        for rule in self.rules:
+            if rule.pattern not in used:
+                log(f"⚠️ 清单中的 {rule.pattern} 没有匹配的安装包")
+
+        depends = {}
+        for file_path, rule in settings.items():
+            targets = []
+            for pattern in rule.depends_on:
+                dependency = PackageRule(pattern, {})
+                matched = [other for other, (name, relpath) in names.items()
+                           if other != file_path and (dependency.exact(name, relpath) or dependency.matches(name, relpath))]
+                if not matched:
+                    log(f"⚠️ {names[file_path][1]} 依赖的 {pattern} 不在本次安装包中，视为已安装")
+                targets.extend(matched)
+            if targets:
+                depends[file_path] = list(dict.fromkeys(targets))
+
+        groups = {file_path: rule.group for file_path, rule in settings.items() if rule.group}
+        group_limits = dict(self.group_limits)
+        for group in groups.values():
+            group_limits.setdefault(group, 1)
+        if estimates is None:
+            estimates = _estimates(files, history)
+        return ExecutionPlan(list(files), settings, depends, groups, group_limits, estimates)
+
+
+def _estimates(files, history):
+    """每个安装包的估算耗时：以往耗时中位数，没有记录时取本批已知耗时的中位数"""
+    known = {}
+    if history is not None:
+        for file_path in files:
+            samples = history.samples(file_path)
+            if samples:
+                known[file_path] = percentile(samples, 0.5)
+    fallback = percentile(list(known.values()), 0.5) if known else DEFAULT_ESTIMATE
+    return {file_path: known.get(file_path, fallback) for file_path in files}
+
+
+class ExecutionPlan:
+    """依赖图 + 关键路径优先级 + 每个安装包的清单配置"""
+
+    def __init__(self, files, settings, depends, groups, group_limits, estimates):
+        self.files = files
+        self.settings = settings
+        self.depends = depends
+        self.groups = groups
+        self.group_limits = group_limits
+        self.estimates = estimates
+        self.order = self._topological_order()
+        # 从该安装包开始到图末端的最长估算耗时
+        self.remaining = {}
+        dependents = {file_path: [] for file_path in files}
+        for file_path, targets in depends.items():
+            for target in targets:
+                dependents[target].append(file_path)
+        for file_path in reversed(self.order):
+            tail = max((self.remaining[child] for child in dependents[file_path]), default=0.0)
+            self.remaining[file_path] = estimates.get(file_path, DEFAULT_ESTIMATE) + tail
+        self._dependents = dependents
+
+    def _topological_order(self):
+        indegree = {file_path: 0 for file_path in self.files}
+        dependents = {file_path: [] for file_path in self.files}
+        for file_path, targets in self.depends.items():
+            indegree[file_path] = len(targets)
+            for target in targets:
+                dependents[target].append(file_path)
+        ready = [file_path for file_path in self.files if indegree[file_path] == 0]
+        order = []
+        while ready:
+            file_path = ready.pop(0)
+            order.append(file_path)
+            for child in dependents[file_path]:
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    ready.append(child)
+        if len(order) != len(self.files):
+            cycle = [os.path.basename(file_path) for file_path in self.files if indegree[file_path] > 0]
+            raise ManifestError(f"依赖关系有环：{'、'.join(cycle)}")
+        return order
+
+    @property
+    def makespan(self):
+        """依赖允许的最短总耗时估算（并发足够时）"""
+        return max(self.remaining.values(), default=0.0)
+
+    def critical_path(self):
+        """估算耗时最长的依赖链"""
+        if not self.files:
+            return []
+        roots = [file_path for file_path in self.files if not self.depends.get(file_path)]
+        node = max(roots, key=lambda file_path: self.remaining[file_path])
+        path = [node]
+        while self._dependents[node]:
+            node = max(self._dependents[node], key=lambda file_path: self.remaining[file_path])
+            path.append(node)
+        return path
+
+    def priority(self, file_path):
+        """调度优先级（越小越先）：关键路径越长越先执行"""
+        return -self.remaining.get(file_path, 0.0)
+
+    def scheduler_options(self):
+        """传给 InstallScheduler 的参数"""
+        return {
+            "depends": self.depends,
+            "priority": self.priority,
+            "groups": self.groups,
+            "group_limits": self.group_limits,
+        }
+
+    def describe(self):
+        path = " → ".join(os.path.basename(file_path) for file_path in self.critical_path())
+        edges = sum(len(targets) for targets in self.depends.values())
+        return (f"{len(self.settings)} 个安装包有配置，{edges} 条依赖，"
+                f"关键路径 {path}（预计 {self.makespan:.0f} 秒）")
+
+
+def load_manifest(path):
+    """读取并校验清单"""
+    data = _read(path)
+    if not isinstance(data, dict):
+        raise ManifestError("清单顶层应为表/对象")
+    unknown = set(data) - {"version", "groups", "packages"}
+    if unknown:
+        raise ManifestError(f"未知字段 {'、'.join(sorted(unknown))}")
+    if data.get("version", 1) != 1:
+        raise ManifestError(f"不支持的清单版本：{data.get('version')}")
+    group_limits = {}
+    for group, limit in data.get("groups", {}).items():
+        if not isinstance(limit, int) or limit < 1:
+            raise ManifestError(f"并发组 {group} 的并发数应为正整数")
+        group_limits[group] = limit
+    packages = data.get("packages", {})
+    if not isinstance(packages, dict):
+        raise ManifestError("packages 应为表/对象（键为安装包名称或 glob 规则）")
+    rules = []
+    for pattern, fields in packages.items():
+        if not isinstance(fields, dict):
+            raise ManifestError(f"{pattern}：配置应为表/对象")
+        if not pattern.lower().endswith(PACKAGE_SUFFIXES) and not any(ch in pattern for ch in "*?["):
+            raise ManifestError(f"{pattern}：应为 .exe/.msi 文件名或 glob 规则")
+        rules.append(PackageRule(pattern, fields))
+    return Manifest(path, rules, group_limits)
@@ -0,0 +1,591 @@
+"""安装包元数据：产品名、版本、发布者，以及同一产品新旧版本的识别
+
+- .exe：解析 PE 资源中的版本信息（VS_VERSIONINFO 的 ProductName、ProductVersion、CompanyName），平台取自 PE 头的 Machine；
+- .msi：解析 OLE 复合文档，读取 Property 表（ProductName、ProductVersion、Manufacturer、UpgradeCode）
+  与 SummaryInformation（平台）；
+- 都没有时从文件名中取版本号（如 app-1.4.exe）。
+
+只按需读取文件头、资源目录和所需的几个流，单个安装包的读取量不超过 READ_BUDGET，与安装包体积无关。
+结果按 (路径, 大小, 修改时间) 缓存在数据目录的 metadata.json 中，文件不变时不再读取。
+
+select_latest() 按产品分组（MSI 按 UpgradeCode + 平台，其他按发布者 + 产品名 + 平台；没有版本资源的 EXE 不分组，
+没有属性表的 MSI 按同一目录下去掉版本号的文件名），每组只保留版本最新的安装包，旧版本不再安装。
+"""
+import codecs
+import json
+import os
+import re
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .bundles import open_package, package_stat
+from .detect import read_pe_header
+
+CACHE_VERSION = 2
+MAX_WORKERS = 16
+# 单个安装包最多读取的字节数
+READ_BUDGET = 8 * 1024 * 1024
+HEADER_BYTES = 4096
+# 版本资源、MSI 流的大小上限
+MAX_VERSION_RESOURCE = 64 * 1024
+MAX_STREAM = 4 * 1024 * 1024
+
+RT_VERSION = 16
+VS_FIXED_SIGNATURE = 0xFEEF04BD
+
+OLE_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+# 复合文档中的特殊扇区号（空闲、链尾、FAT、DIFAT）起点
+OLE_SPECIAL_SECTOR = 0xFFFFFFFA
+OLE_END_OF_CHAIN = 0xFFFFFFFE
+# MSI 表名流的编码字符集
+MSI_NAME_CHARS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz._"
+
+# 文件名中的版本号（至少两段，如 1.4、2023.10.2）
+NAME_VERSION = re.compile(r"(?<![\d.])v?(\d+(?:\.\d+)+)(?![\d.])", re.IGNORECASE)
+
+
+class MetadataError(ValueError):
+    """安装包结构无法解析（内部使用，最终回退到按文件名识别）"""
+
+
+class PackageInfo:
+    """安装包的产品信息（字段可能为 None）"""
+
+    FIELDS = ("product", "version", "publisher", "upgrade_code", "platform")
+
+    def __init__(self, product=None, version=None, publisher=None, upgrade_code=None, platform=None):
+        self.product = product
+        self.version = version
+        self.publisher = publisher
+        self.upgrade_code = upgrade_code
+        self.platform = platform
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS if getattr(self, field)}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{field: data.get(field) for field in cls.FIELDS})
+
+
+def parse_version(text):
+    """版本号字符串 → 可比较的整数元组（去掉末尾的 0，1.2 与 1.2.0 相同），无法解析时返回 None"""
+    if not text:
+        return None
+    match = re.match(r"\s*v?(\d+(?:\.\d+)*)", text, re.IGNORECASE)
+    if match is None:
+        return None
+    parts = [int(part) for part in match.group(1).split(".")]
+    while len(parts) > 1 and parts[-1] == 0:
+        parts.pop()
+    return tuple(parts)
+
+
+def name_version(file_path):
+    """从文件名中取 (去掉版本号后的名称, 版本号)，没有版本号时版本为 None"""
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    matches = list(NAME_VERSION.finditer(stem))
+    if not matches:
+        return _normalize(stem), None
+    match = matches[-1]
+    return _normalize(stem[:match.start()] + " " + stem[match.end():]), match.group(1)
+
+
+def _normalize(name):
+    """分组用的名称：忽略大小写与标点；名称中的版本号只保留前两段
+    （“Python 3.11.4” 与 “Python 3.12.0”、.NET 6 与 .NET 8 是可以并存的不同产品）"""
+    name = NAME_VERSION.sub(lambda match: " " + ".".join(match.group(1).split(".")[:2]) + " ", name.lower())
+    return " ".join(re.split(r"[\s\-_()]+", name)).strip()
+
+
+class _Reader:
+    """带读取上限的随机读取"""
+
+    def __init__(self, f, size, budget=READ_BUDGET):
+        self.f = f
+        self.size = size
+        self.budget = budget
+
+    def read_at(self, offset, length):
+        if offset < 0 or length < 0 or offset + length > self.size:
+            raise MetadataError("偏移超出文件范围")
+        self.budget -= length
+        if self.budget < 0:
+            raise MetadataError("读取量超过上限")
+        self.f.seek(offset)
+        data = self.f.read(length)
+        if len(data) != length:
+            raise MetadataError("文件不完整")
+        return data
+
+
+# --------------------------
+# PE 版本资源
+# --------------------------
+def _align4(offset):
+    return (offset + 3) & ~3
+
+
+def _rva_offset(rva, sections):
+    for _, virtual_address, virtual_size, raw_offset, raw_size in sections:
+        if virtual_address <= rva < virtual_address + max(virtual_size, raw_size):
+            return raw_offset + rva - virtual_address
+    raise MetadataError("RVA 不在任何节中")
+
+
+def _resource_entries(reader, base, offset):
+    header = reader.read_at(base + offset, 16)
+    named, ids = struct.unpack_from("<HH", header, 12)
+    count = min(named + ids, 1024)
+    data = reader.read_at(base + offset + 16, count * 8)
+    return [struct.unpack_from("<II", data, i * 8) for i in range(count)]
+
+
+def _version_resource(reader, header):
+    """读取 RT_VERSION 资源的内容，没有时返回 None"""
+    if header.resource_rva is None:
+        return None
+    sections = header.sections
+    base = _rva_offset(header.resource_rva, sections)
+    node = None
+    for name, target in _resource_entries(reader, base, 0):
+        if name == RT_VERSION and target & 0x80000000:
+            node = target & 0x7FFFFFFF
+            break
+    if node is None:
+        return None
+    # 第二层为资源名，第三层为语言，均取第一个
+    for _ in range(2):
+        entries = _resource_entries(reader, base, node)
+        if not entries:
+            return None
+        node = entries[0][1]
+        if not node & 0x80000000:
+            break
+        node &= 0x7FFFFFFF
+    if node & 0x80000000:
+        return None
+    data_rva, size = struct.unpack_from("<II", reader.read_at(base + node, 8))
+    return reader.read_at(_rva_offset(data_rva, sections), min(size, MAX_VERSION_RESOURCE))
+
+
+def _version_blocks(data, start, end):
+    """遍历版本信息中的一层块，产生 (键, 值偏移, 值长度, 值类型, 块结束偏移)"""
+    offset = start
+    while offset + 6 <= end:
+        length, value_length, value_type = struct.unpack_from("<HHH", data, offset)
+        if length < 6:
+            break
+        block_end = min(end, offset + length)
+        key_end = offset + 6
+        while key_end + 1 < block_end and data[key_end:key_end + 2] != b"\0\0":
+            key_end += 2
+        key = data[offset + 6:key_end].decode("utf-16-le", "replace")
+        yield key, _align4(key_end + 2), value_length, value_type, block_end
+        offset = _align4(block_end)
+
+
+def parse_version_info(data):
+    """解析 VS_VERSIONINFO，返回 ({字符串名: 值}, 固定信息中的产品版本字符串或 None)"""
+    root = next(_version_blocks(data, 0, len(data)), None)
+    if root is None or root[0] != "VS_VERSION_INFO":
+        raise MetadataError("版本资源损坏")
+    _, value, value_length, _, end = root
+    fixed_version = None
+    if value_length >= 52 and value + 52 <= end and \
+            struct.unpack_from("<I", data, value)[0] == VS_FIXED_SIGNATURE:
+        product_ms, product_ls = struct.unpack_from("<II", data, value + 16)
+        if product_ms or product_ls:
+            fixed_version = f"{product_ms >> 16}.{product_ms & 0xFFFF}.{product_ls >> 16}.{product_ls & 0xFFFF}"
+    strings = {}
+    for key, child, _, _, child_end in _version_blocks(data, _align4(value + value_length), end):
+        if key != "StringFileInfo":
+            continue
+        for _, table, _, _, table_end in _version_blocks(data, child, child_end):
+            for name, text, text_length, text_type, _ in _version_blocks(data, table, table_end):
+                if text_type != 1 or name in strings:
+                    continue
+                raw = data[text:min(table_end, text + text_length * 2)]
+                strings[name] = raw.decode("utf-16-le", "replace").split("\0", 1)[0].strip()
+    return strings, fixed_version
+
+
+def read_pe_info(reader):
+    header = read_pe_header(reader.read_at(0, min(HEADER_BYTES, reader.size)))
+    if header is None:
+        raise MetadataError("不是 PE 文件")
+    # 同一产品的 x86 与 x64 安装包按平台分开分组
+    platform = header.platform
+    data = _version_resource(reader, header)
+    if data is None:
+        return PackageInfo(platform=platform)
+    strings, fixed_version = parse_version_info(data)
+    version = strings.get("ProductVersion") or strings.get("FileVersion")
+    if parse_version(version) is None:
+        version = fixed_version
+    return PackageInfo(product=strings.get("ProductName") or strings.get("FileDescription") or None,
+                       version=version or None,
+                       publisher=strings.get("CompanyName") or None,
+                       platform=platform)
+
+
+# --------------------------
+# MSI（OLE 复合文档）
+# --------------------------
+class CompoundFile:
+    """只读的 OLE 复合文档：按需读取 FAT、目录与流"""
+
+    def __init__(self, reader):
+        self.reader = reader
+        head = reader.read_at(0, 512)
+        if head[:8] != OLE_MAGIC:
+            raise MetadataError("不是复合文档")
+        sector_shift, mini_shift = struct.unpack_from("<HH", head, 30)
+        if sector_shift not in (9, 12):
+            raise MetadataError("扇区大小异常")
+        self.sector_size = 1 << sector_shift
+        self.mini_size = 1 << mini_shift
+        (self.directory_start, _, self.mini_cutoff, self.minifat_start,
+         self.minifat_count, self._difat_next, self._difat_left) = struct.unpack_from("<IIIIIII", head, 48)
+        self.difat = [sector for sector in struct.unpack_from("<109I", head, 76) if sector < OLE_SPECIAL_SECTOR]
+        self._fat = {}
+        self._minifat = None
+        self._ministream = None
+        self._entries = None
+
+    def _sector(self, sector):
+        return self.reader.read_at((sector + 1) * self.sector_size, self.sector_size)
+
+    def _next(self, sector):
+        per_sector = self.sector_size // 4
+        index, slot = divmod(sector, per_sector)
+        table = self._fat.get(index)
+        if table is None:
+            while index >= len(self.difat) and self._difat_left and self._difat_next < OLE_SPECIAL_SECTOR:
+                entries = struct.unpack(f"<{per_sector}I", self._sector(self._difat_next))
+                self.difat.extend(sector for sector in entries[:-1] if sector < OLE_SPECIAL_SECTOR)
+                self._difat_next = entries[-1]
+                self._difat_left -= 1
+            if index >= len(self.difat):
+                raise MetadataError("FAT 不完整")
+            table = self._fat[index] = struct.unpack(f"<{per_sector}I", self._sector(self.difat[index]))
+        return table[slot]
+
+    def chain(self, start, limit):
+        """扇区链（最多 limit 个，防止损坏的文件形成环）"""
+        sectors = []
+        sector = start
+        while sector < OLE_SPECIAL_SECTOR:
+            if len(sectors) >= limit:
+                raise MetadataError("扇区链过长")
+            sectors.append(sector)
+            sector = self._next(sector)
+        return sectors
+
+    def entries(self):
+        """根存储中的 {名称: (类型, 起始扇区, 大小)}"""
+        if self._entries is None:
+            self._entries = {}
+            for sector in self.chain(self.directory_start, 1024):
+                data = self._sector(sector)
+                for offset in range(0, self.sector_size, 128):
+                    name_length, kind = struct.unpack_from("<HB", data, offset + 64)
+                    if kind == 0 or not 2 <= name_length <= 64:
+                        continue
+                    name = data[offset:offset + name_length - 2].decode("utf-16-le", "replace")
+                    start, size = struct.unpack_from("<II", data, offset + 116)
+                    self._entries.setdefault(name, (kind, start, size))
+        return self._entries
+
+    def read_stream(self, name):
+        """读取流的内容，不存在时返回 None"""
+        entry = self.entries().get(name)
+        if entry is None or entry[0] != 2:
+            return None
+        _, start, size = entry
+        if size > MAX_STREAM:
+            raise MetadataError(f"流过大：{size} 字节")
+        if size < self.mini_cutoff:
+            return self._read_mini(start, size)
+        sectors = self.chain(start, size // self.sector_size + 1)
+        return b"".join(self._sector(sector) for sector in sectors)[:size]
+
+    def _read_mini(self, start, size):
+        if self._minifat is None:
+            data = b"".join(self._sector(sector) for sector in self.chain(self.minifat_start, self.minifat_count))
+            self._minifat = struct.unpack(f"<{len(data) // 4}I", data)
+            root = next((entry for entry in self.entries().values() if entry[0] == 5), None)
+            if root is None:
+                raise MetadataError("缺少根存储")
+            self._ministream = self.chain(root[1], MAX_STREAM // self.sector_size)
+        chunks = []
+        sector = start
+        per_sector = self.sector_size // self.mini_size
+        while sector < OLE_SPECIAL_SECTOR and len(chunks) * self.mini_size < size:
+            index, slot = divmod(sector, per_sector)
+            if index >= len(self._ministream) or sector >= len(self._minifat):
+                raise MetadataError("迷你流不完整")
+            offset = (self._ministream[index] + 1) * self.sector_size + slot * self.mini_size
+            chunks.append(self.reader.read_at(offset, self.mini_size))
+            sector = self._minifat[sector]
+        return b"".join(chunks)[:size]
+
+
+def msi_stream_name(table):
+    """MSI 表对应的流名（表名两两压缩为一个字符，前缀 U+4840）"""
+    out = ["䡀"]
+    i = 0
+    while i < len(table):
+        first = MSI_NAME_CHARS.find(table[i])
+        second = MSI_NAME_CHARS.find(table[i + 1]) if i + 1 < len(table) else -1
+        if first < 0:
+            out.append(table[i])
+            i += 1
+        elif second >= 0:
+            out.append(chr(0x3800 + first + (second << 6)))
+            i += 2
+        else:
+            out.append(chr(0x4800 + first))
+            i += 1
+    return "".join(out)
+
+
+def _codec(codepage):
+    if codepage in (0, 1252):
+        return "cp1252"
+    if codepage == 65001:
+        return "utf-8"
+    try:
+        return codecs.lookup(f"cp{codepage}").name
+    except LookupError:
+        return "latin-1"
+
+
+def _string_pool(pool, data):
+    """MSI 字符串表，返回 (字符串列表（下标为字符串编号）, 字符串引用的字节数)"""
+    if len(pool) < 4:
+        raise MetadataError("字符串表损坏")
+    low, high = struct.unpack_from("<HH", pool, 0)
+    codec = _codec(low | ((high & 0x7FFF) << 16))
+    ref_size = 3 if high & 0x8000 else 2
+    words = struct.unpack_from(f"<{len(pool) // 2 - 2}H", pool, 4)
+    strings = [""]
+    offset = 0
+    i = 0
+    while i + 1 < len(words):
+        length, refs = words[i], words[i + 1]
+        if length == 0 and refs == 0:
+            strings.append("")
+            i += 2
+            continue
+        if length == 0:
+            # 超过 64K 的字符串：长度的高 16 位在本项引用计数中，低 16 位在下一项
+            if i + 3 >= len(words):
+                break
+            length = (words[i + 3] << 16) + words[i + 2]
+            i += 4
+        else:
+            i += 2
+        strings.append(data[offset:offset + length].decode(codec, "replace"))
+        offset += length
+    return strings, ref_size
+
+
+def _msi_properties(cf):
+    pool = cf.read_stream(msi_stream_name("_StringPool"))
+    data = cf.read_stream(msi_stream_name("_StringData"))
+    table = cf.read_stream(msi_stream_name("Property"))
+    if pool is None or data is None or table is None:
+        return {}
+    strings, ref_size = _string_pool(pool, data)
+    rows = len(table) // (2 * ref_size)
+
+    def column(index):
+        base = index * rows * ref_size
+        for row in range(rows):
+            raw = table[base + row * ref_size:base + (row + 1) * ref_size]
+            yield int.from_bytes(raw, "little")
+
+    properties = {}
+    for name_id, value_id in zip(column(0), column(1)):
+        if 0 < name_id < len(strings) and 0 < value_id < len(strings):
+            properties[strings[name_id]] = strings[value_id]
+    return properties
+
+
+def _summary_information(data):
+    """SummaryInformation 属性集，返回 {属性号: 字符串}"""
+    if data is None or len(data) < 48:
+        return {}
+    section, = struct.unpack_from("<I", data, 44)
+    if section + 8 > len(data):
+        return {}
+    count, = struct.unpack_from("<I", data, section + 4)
+    codepage = 1252
+    raw = {}
+    for i in range(min(count, 64)):
+        if section + 16 + i * 8 > len(data):
+            break
+        pid, offset = struct.unpack_from("<II", data, section + 8 + i * 8)
+        position = section + offset
+        if position + 8 > len(data):
+            continue
+        kind, = struct.unpack_from("<I", data, position)
+        if kind == 2 and pid == 1:
+            codepage = struct.unpack_from("<h", data, position + 4)[0] & 0xFFFF
+        elif kind == 30:
+            length, = struct.unpack_from("<I", data, position + 4)
+            raw[pid] = data[position + 8:position + 8 + length].split(b"\0", 1)[0]
+    codec = "utf-16-le" if codepage == 1200 else _codec(codepage)
+    return {pid: value.decode(codec, "replace") for pid, value in raw.items()}
+
+
+def read_msi_info(reader):
+    cf = CompoundFile(reader)
+    summary = _summary_information(cf.read_stream("\x05SummaryInformation"))
+    try:
+        properties = _msi_properties(cf)
+    except MetadataError:
+        properties = {}
+    # 模板属性形如 “x64;1033”
+    platform = summary.get(7, "").split(";", 1)[0].strip() or None
+    return PackageInfo(product=properties.get("ProductName") or summary.get(3) or None,
+                       version=properties.get("ProductVersion") or None,
+                       publisher=properties.get("Manufacturer") or summary.get(4) or None,
+                       upgrade_code=(properties.get("UpgradeCode") or "").upper() or None,
+                       platform=platform)
+
+
+def extract_info(file_path):
+    """（阻塞）读取安装包的产品信息；结构无法解析时只使用文件名中的版本号"""
+    info = PackageInfo()
+    try:
+        size = package_stat(file_path).st_size
+        with open_package(file_path) as f:
+            reader = _Reader(f, size)
+            if file_path.lower().endswith(".msi"):
+                info = read_msi_info(reader)
+            else:
+                info = read_pe_info(reader)
+    except (OSError, MetadataError, struct.error, UnicodeDecodeError):
+        pass
+    if parse_version(info.version) is None:
+        info.version = name_version(file_path)[1]
+    return info
+
+
+# --------------------------
+# 缓存与新旧版本
+# --------------------------
+class MetadataCache:
+    """按 (路径, 大小, 修改时间) 缓存的安装包产品信息（线程安全，JSON 文件）"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._entries = {}
+        self._dirty = False
+        self.load()
+
+    def load(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != CACHE_VERSION:
+            return
+        self._entries = data.get("packages", {})
+
+    def save(self):
+        """原子写入（先写临时文件再替换）"""
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                payload = json.dumps({"version": CACHE_VERSION, "packages": self._entries},
+                                     ensure_ascii=False, separators=(",", ":"))
+                self._dirty = False
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp_path, self.path)
+
+    def get(self, file_path):
+        """（阻塞）安装包的 PackageInfo，文件未变时使用缓存"""
+        key = os.path.normcase(os.path.abspath(file_path))
+        try:
+            stat = package_stat(file_path)
+        except OSError:
+            return extract_info(file_path)
+        with self._lock:
+            cached = self._entries.get(key)
+        if cached is not None and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return PackageInfo.from_dict(cached[2])
+        info = extract_info(file_path)
+        with self._lock:
+            self._entries[key] = [stat.st_size, stat.st_mtime_ns, info.to_dict()]
+            self._dirty = True
+        return info
+
+    def read_all(self, files, max_workers=MAX_WORKERS):
+        """（阻塞）并发读取全部安装包的产品信息，返回 {路径: PackageInfo}，有新读取的结果时写回缓存"""
+        files = list(files)
+        if not files:
+            return {}
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(files))),
+                                thread_name_prefix="metadata") as pool:
+            infos = dict(zip(files, pool.map(self.get, files)))
+        try:
+            self.save()
+        except OSError:
+            pass
+        return infos
+
+
+def product_key(file_path, info):
+    """同一产品不同版本的安装包得到相同的键；无法可靠判断时返回 None（总是安装）
+
+    - MSI 按 UpgradeCode + 平台，其次按发布者 + 产品名，都没有时按同一目录下去掉版本号的文件名；
+    - EXE 只按版本资源中的发布者 + 产品名 + 平台（setup-1.2.exe 这类文件名在不同厂商的安装包中很常见）。
+    """
+    kind = os.path.splitext(file_path)[1].lower()
+    if info is not None and info.upgrade_code:
+        return (kind, "upgrade", info.upgrade_code, info.platform or "")
+    if info is not None and info.product and info.publisher:
+        return (kind, "product", _normalize(info.publisher), _normalize(info.product), info.platform or "")
+    if kind == ".exe":
+        return None
+    return (kind, "name", os.path.normcase(os.path.dirname(file_path)), name_version(file_path)[0])
+
+
+def select_latest(files, infos):
+    """按产品分组，每组只保留版本最新的安装包
+
+    返回 (保留的安装包（原顺序）, {被取代的安装包: 取代它的安装包})；版本无法解析或无法识别产品的安装包总是保留，
+    同一产品中最新版本有多个时全部保留。
+    """
+    groups = {}
+    for file_path in files:
+        info = infos.get(file_path)
+        version = parse_version(info.version if info is not None else None)
+        key = product_key(file_path, info)
+        if version is not None and key is not None:
+            groups.setdefault(key, []).append((version, file_path))
+    superseded = {}
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        newest = max(version for version, _ in members)
+        winner = next(file_path for version, file_path in members if version == newest)
+        for version, file_path in members:
+            if version < newest:
+                superseded[file_path] = winner
+    return [file_path for file_path in files if file_path not in superseded], superseded
+
@@ -0,0 +1,198 @@
+"""安装历史指标（SQLite）：每次参数尝试与每个安装包的耗时、返回码、命令和大小
+
+RuntimeHistory 只保留成功安装的最近耗时用于计算超时，MetricsStore 记录全部尝试与最终结果，用于：
+
+- estimate_all(files)：估算每个安装包的安装耗时，优先使用以往成功安装耗时的中位数，
+  没有记录时按以往安装的每 MB 耗时与安装包大小推算，都没有时为 DEFAULT_ESTIMATE；
+- BatchProgress：按估算耗时加权的批次进度与剩余时间（安装包耗时可相差上百倍，按个数计算的进度没有参考价值）；
+- scheduler.order_priority()：短作业优先 / 长作业优先的调度顺序。
+
+安装包的键与 RuntimeHistory 相同（文件名 + 大小），与所在文件夹无关。
+"""
+import os
+import threading
+import time
+
+from .bundles import package_stat
+from .timeouts import MAX_SAMPLES, percentile, runtime_key
+
+SCHEMA_VERSION = 1
+# 没有任何记录时的估算耗时（秒）
+DEFAULT_ESTIMATE = 60.0
+# 正在安装的包最多计入估算耗时的比例（超出估算时进度停在这里，不会倒退）
+RUNNING_CAP = 0.95
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempts (
+    id INTEGER PRIMARY KEY,
+    batch TEXT NOT NULL,
+    package TEXT NOT NULL,
+    name TEXT NOT NULL,
+    started REAL NOT NULL,
+    duration REAL NOT NULL,
+    returncode INTEGER,
+    command TEXT,
+    bytes INTEGER
+);
+CREATE TABLE IF NOT EXISTS packages (
+    id INTEGER PRIMARY KEY,
+    batch TEXT NOT NULL,
+    package TEXT NOT NULL,
+    name TEXT NOT NULL,
+    started REAL NOT NULL,
+    duration REAL NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    returncode INTEGER,
+    bytes INTEGER
+);
+CREATE INDEX IF NOT EXISTS packages_by_key ON packages (package, status);
+"""
+
+
+class MetricsError(OSError):
+    """指标数据库无法读写"""
+
+
+def new_batch_id():
+    return time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}"
+
+
+def _package_info(file_path):
+    """(键, 大小)；安装包不可读时为 (文件名, None)"""
+    try:
+        return runtime_key(file_path), package_stat(file_path).st_size
+    except OSError:
+        return os.path.basename(file_path).lower(), None
+
+
+class MetricsStore:
+    """安装指标数据库（线程安全，写入后立即提交）"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        # 打开数据库时才导入 sqlite3（命令行启动时不需要）
+        import sqlite3
+        try:
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            version = self._db.execute("PRAGMA user_version").fetchone()[0]
+            if version not in (0, SCHEMA_VERSION):
+                # 旧版本的记录只影响估算，直接重建
+                self._db.executescript("DROP TABLE IF EXISTS attempts; DROP TABLE IF EXISTS packages;")
+            self._db.executescript(SCHEMA)
+            self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        except sqlite3.Error as e:
+            raise MetricsError(f"无法打开指标数据库 {path}：{e}")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _execute(self, sql, params=()):
+        import sqlite3
+        with self._lock:
+            try:
+                return self._db.execute(sql, params).fetchall()
+            except sqlite3.Error as e:
+                raise MetricsError(f"指标数据库读写失败：{e}")
+
+    def record_attempt(self, batch, file_path, command, returncode, duration, started):
+        """记录一次参数尝试"""
+        key, size = _package_info(file_path)
+        self._execute(
+            "INSERT INTO attempts (batch, package, name, started, duration, returncode, command, bytes)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (batch, key, os.path.basename(file_path), started, round(duration, 3), returncode,
+             " ".join(command) if command else None, size))
+
+    def record_package(self, batch, outcome, started):
+        """记录一个安装包的最终结果（InstallOutcome）"""
+        key, size = _package_info(outcome.file_path)
+        self._execute(
+            "INSERT INTO packages (batch, package, name, started, duration, status, attempts, returncode, bytes)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (batch, key, os.path.basename(outcome.file_path), started, round(outcome.duration, 3),
+             outcome.status, outcome.attempts, outcome.returncode, size))
+
+    def durations(self, file_path):
+        """该安装包最近成功安装的耗时（新的在前）"""
+        key, _ = _package_info(file_path)
+        rows = self._execute(
+            "SELECT duration FROM packages WHERE package = ? AND status = 'succeeded' ORDER BY id DESC LIMIT ?",
+            (key, MAX_SAMPLES))
+        return [row[0] for row in rows]
+
+    def estimate_all(self, files, default=DEFAULT_ESTIMATE):
+        """（阻塞）估算每个安装包的安装耗时（秒），返回 {路径: 秒}"""
+        samples = {}
+        rates = []
+        for key, duration, size in self._execute(
+                "SELECT package, duration, bytes FROM packages WHERE status = 'succeeded' ORDER BY id DESC LIMIT 20000"):
+            keyed = samples.setdefault(key, [])
+            if len(keyed) < MAX_SAMPLES:
+                keyed.append(duration)
+            if size and len(rates) < 1000:
+                rates.append(duration / max(size, 1024 * 1024))
+        rate = percentile(rates, 0.5) if rates else None
+        estimates = {}
+        for file_path in files:
+            key, size = _package_info(file_path)
+            if key in samples:
+                estimates[file_path] = percentile(samples[key], 0.5)
+            elif rate is not None and size:
+                estimates[file_path] = rate * max(size, 1024 * 1024)
+            else:
+                estimates[file_path] = default
+        return estimates
+
+
+class BatchProgress:
+    """按估算耗时加权的批次进度（在单个线程中更新）
+
+    已结束的包（无论成败）计入全部估算耗时，正在安装的包按已用时间计入，最多计入估算耗时的 RUNNING_CAP；
+    剩余时间按目前的进度速度外推，并发安装时同样适用。
+    """
+
+    def __init__(self, estimates, now=None):
+        self.estimates = dict(estimates)
+        self.total = sum(self.estimates.values())
+        self.done = 0.0
+        self.running = {}
+        self.started = time.monotonic() if now is None else now
+
+    def start(self, file_path, now=None):
+        self.running[file_path] = time.monotonic() if now is None else now
+
+    def finish(self, file_path):
+        self.running.pop(file_path, None)
+        self.done += self.estimates.get(file_path, 0.0)
+
+    def fraction(self, now=None):
+        """进度（0–1）"""
+        if self.total <= 0:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        partial = sum(min(now - started, self.estimates.get(file_path, 0.0) * RUNNING_CAP)
+                      for file_path, started in self.running.items())
+        return min(1.0, (self.done + partial) / self.total)
+
+    def eta(self, now=None):
+        """预计剩余秒数，刚开始、还无法估计时为 None"""
+        now = time.monotonic() if now is None else now
+        fraction = self.fraction(now)
+        elapsed = now - self.started
+        if fraction < 0.01 or elapsed < 1.0:
+            return None
+        return elapsed * (1.0 - fraction) / fraction
+
+
+def format_eta(seconds):
+    if seconds is None:
+        return "正在估算剩余时间"
+    seconds = int(seconds + 0.5)
+    if seconds < 60:
+        return f"预计剩余 {seconds} 秒"
+    if seconds < 3600:
+        return f"预计剩余 {seconds // 60} 分 {seconds % 60} 秒"
+    return f"预计剩余 {seconds // 3600} 小时 {seconds % 3600 // 60} 分"
@@ -0,0 +1,198 @@
+"""安装列表数据模型（不依赖 tkinter，界面只负责显示其中的可见部分）
+
+PackageListModel 保存每个安装包的路径、大小、类型、版本、发布者、状态和以往安装耗时，
+按扫描顺序保存全部条目，view 为当前筛选与排序后的结果：
+
+- 筛选：按显示名称（不区分大小写）包含关键字；关键字在上一次的基础上追加字符时只在当前结果中继续筛选；
+- 排序：扫描顺序、名称、大小、以往耗时，没有大小或耗时的条目排在最后；
+- 安装过程中 set_status 返回条目在 view 中的行号，界面只刷新这一行。
+"""
+import os
+
+from .bundles import package_stat
+from .timeouts import percentile
+
+PENDING = "pending"
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+UNCHANGED = "unchanged"
+SUPERSEDED = "superseded"
+
+STATUS_LABELS = {
+    PENDING: "",
+    QUEUED: "排队中",
+    RUNNING: "安装中",
+    SUCCEEDED: "成功",
+    FAILED: "失败",
+    UNCHANGED: "未变化",
+    SUPERSEDED: "旧版本",
+}
+
+# 排序方式 → 显示名称
+SORT_KEYS = {"order": "扫描顺序", "name": "名称", "size": "大小", "duration": "以往耗时"}
+
+
+class PackageEntry:
+    """安装列表中的一项"""
+
+    def __init__(self, path, name, size=None, duration=None, version=None, publisher=None):
+        self.path = path
+        self.name = name
+        self.size = size
+        self.duration = duration
+        self.version = version
+        self.publisher = publisher
+        self.kind = os.path.splitext(path)[1].lower().lstrip(".")
+        self.status = PENDING
+        self.order = 0
+        self.search_key = name.lower()
+
+    def text(self):
+        """列表中显示的一行"""
+        parts = [self.name]
+        if self.version:
+            parts.append(self.version)
+        if self.publisher:
+            parts.append(self.publisher)
+        if self.size is not None:
+            parts.append(format_size(self.size))
+        if self.status != PENDING:
+            parts.append(STATUS_LABELS.get(self.status, self.status))
+        return "    ".join(parts)
+
+
+def format_size(size):
+    if size >= 1024 * 1024 * 1024:
+        return f"{size / (1024 * 1024 * 1024):.1f} GB"
+    if size >= 1024 * 1024:
+        return f"{size / (1024 * 1024):.1f} MB"
+    return f"{size / 1024:.0f} KB"
+
+
+def make_entries(paths, root, history=None, metadata=None):
+    """（阻塞，可在后台线程调用）读取大小、以往耗时与版本信息（metadata 为 MetadataCache），生成列表项；
+    名称为相对 root 的路径"""
+    infos = metadata.read_all(paths) if metadata is not None else {}
+    entries = []
+    for path in paths:
+        try:
+            size = package_stat(path).st_size
+        except OSError:
+            size = None
+        duration = None
+        if history is not None:
+            samples = history.samples(path)
+            if samples:
+                duration = percentile(samples, 0.5)
+        info = infos.get(path)
+        entries.append(PackageEntry(path, os.path.relpath(path, root), size=size, duration=duration,
+                                    version=info.version if info is not None else None,
+                                    publisher=info.publisher if info is not None else None))
+    return entries
+
+
+class PackageListModel:
+    """安装列表：全部条目（扫描顺序）+ 当前筛选排序后的 view"""
+
+    def __init__(self):
+        self.entries = []
+        self.view = []
+        self.filter_text = ""
+        self.sort_by = "order"
+        self.reverse = False
+        self._by_path = {}
+        self._rows = None
+        self._paths = None
+
+    def __len__(self):
+        return len(self.view)
+
+    def clear(self):
+        self.entries = []
+        self.view = []
+        self._by_path = {}
+        self._rows = None
+        self._paths = None
+
+    def paths(self):
+        """全部安装包路径（扫描顺序，不受筛选影响）"""
+        if self._paths is None:
+            self._paths = [entry.path for entry in self.entries]
+        return self._paths
+
+    def get(self, path):
+        return self._by_path.get(path)
+
+    def extend(self, entries):
+        """追加一批条目，符合当前筛选的加入 view"""
+        for entry in entries:
+            entry.order = len(self.entries)
+            self.entries.append(entry)
+            self._by_path[entry.path] = entry
+        self._paths = None
+        matched = [entry for entry in entries if self.filter_text in entry.search_key]
+        if not matched:
+            return
+        self.view.extend(matched)
+        if self.sort_by != "order" or self.reverse:
+            self._sort()
+        self._rows = None
+
+    def set_filter(self, text):
+        """按名称筛选；在上一次关键字后追加字符时只筛选当前结果"""
+        text = text.strip().lower()
+        if text == self.filter_text:
+            return
+        source = self.view if text.startswith(self.filter_text) else self.entries
+        self.filter_text = text
+        self.view = [entry for entry in source if text in entry.search_key]
+        if source is self.entries:
+            self._sort()
+        self._rows = None
+
+    def set_sort(self, sort_by, reverse=False):
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f"未知的排序方式：{sort_by}")
+        self.sort_by = sort_by
+        self.reverse = reverse
+        self._sort()
+        self._rows = None
+
+    def _sort(self):
+        if self.sort_by in ("size", "duration"):
+            # 没有大小或耗时的条目（正序、倒序都）排在最后
+            attr = self.sort_by
+            known = [entry for entry in self.view if getattr(entry, attr) is not None]
+            known.sort(key=lambda entry: getattr(entry, attr), reverse=self.reverse)
+            self.view = known + sorted((entry for entry in self.view if getattr(entry, attr) is None),
+                                       key=lambda entry: entry.order)
+        elif self.sort_by == "name":
+            self.view.sort(key=lambda entry: entry.search_key, reverse=self.reverse)
+        else:
+            self.view.sort(key=lambda entry: entry.order, reverse=self.reverse)
+
+    def window(self, first, count):
+        """view 中从 first 开始的 count 个条目（界面只渲染这一部分）"""
+        return self.view[first:first + count]
+
+    def row_of(self, path):
+        """条目在 view 中的行号，不在 view 中时返回 None"""
+        if self._rows is None:
+            self._rows = {entry.path: row for row, entry in enumerate(self.view)}
+        return self._rows.get(path)
+
+    def set_status(self, path, status):
+        """更新状态，返回需要刷新的行号（不在 view 中时为 None）"""
+        entry = self._by_path.get(path)
+        if entry is None or entry.status == status:
+            return None
+        entry.status = status
+        return self.row_of(path)
+
+    def reset_status(self, only=None):
+        """把状态恢复为 pending；only 指定时只恢复处于这些状态的条目（如取消后仍在排队的）"""
+        for entry in self.entries:
+            if only is None or entry.status in only:
+                entry.status = PENDING
@@ -0,0 +1,27 @@
+"""程序目录与数据目录（适配 exe/源码运行）"""
+import os
+import sys
+
+# 数据目录名：与 package 文件夹并列，存放缓存、日志等运行数据
+DATA_DIR_NAME = ".flyinstaller"
+
+
+def app_base_path():
+    """程序所在目录"""
+    if getattr(sys, 'frozen', False):
+        # exe运行时：获取exe文件所在目录（而非临时解压目录）
+        return os.path.dirname(os.path.abspath(sys.executable))
+    # 源码运行时：获取 installer.py 所在目录
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def default_package_path():
+    """应用目录下的 package 文件夹"""
+    return os.path.join(app_base_path(), "package")
+
+
+def data_path(*parts, base=None):
+    """数据目录下的路径（目录不存在时自动创建）"""
+    root = os.path.join(base or app_base_path(), DATA_DIR_NAME)
+    os.makedirs(root, exist_ok=True)
+    return os.path.join(root, *parts)
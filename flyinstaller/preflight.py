@@ -0,0 +1,202 @@
+"""安装前预检：在开始安装前并发检查所有安装包，一次性给出问题清单
+
+截断的下载、0 字节的 .msi、没有管理员权限、目标磁盘已满等问题原本要等批次执行到对应的包才暴露，
+还可能先白等几轮超时。预检在线程池中并发读取每个安装包的文件头（不读取整个文件）：
+
+- .exe：MZ/PE 头有效，节表描述的数据没有超出文件末尾（否则为下载不完整）；
+- .msi：OLE 复合文档头有效，文件头中列出的 FAT/目录扇区没有超出文件末尾；
+- 文件可读、非空；
+- 整批检查一次：有 .msi 时是否有管理员权限，目标目录所在磁盘的剩余空间是否足够。
+
+错误（ERROR）会导致对应安装包无法安装，警告（WARNING）只提示。
+"""
+import os
+import shutil
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .bundles import open_package, package_stat
+from .detect import read_pe_layout
+from .metadata import OLE_MAGIC, OLE_SPECIAL_SECTOR
+
+ERROR = "error"
+WARNING = "warning"
+
+# 每个安装包读取的文件头字节数（足够容纳 PE 节表 / 复合文档头）
+HEADER_BYTES = 64 * 1024
+MAX_WORKERS = 16
+# 剩余空间低于安装包总大小的该倍数时提示（安装后的体积通常大于安装包）
+SPACE_WARNING_FACTOR = 3
+
+
+class PreflightIssue:
+    """预检发现的一个问题；file_path 为 None 时是整批的问题（权限、磁盘空间）"""
+
+    def __init__(self, severity, file_path, message):
+        self.severity = severity
+        self.file_path = file_path
+        self.message = message
+
+    def __str__(self):
+        prefix = "❌" if self.severity == ERROR else "⚠️"
+        if self.file_path is None:
+            return f"{prefix} {self.message}"
+        return f"{prefix} {os.path.basename(self.file_path)}：{self.message}"
+
+
+class PreflightReport:
+    """预检结果"""
+
+    def __init__(self, files, issues, total_size, elapsed):
+        self.files = files
+        self.issues = issues
+        self.total_size = total_size
+        self.elapsed = elapsed
+
+    @property
+    def errors(self):
+        return [issue for issue in self.issues if issue.severity == ERROR]
+
+    @property
+    def warnings(self):
+        return [issue for issue in self.issues if issue.severity == WARNING]
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def bad_files(self):
+        """有错误的安装包"""
+        return {issue.file_path for issue in self.errors if issue.file_path is not None}
+
+    def batch_errors(self):
+        """与具体安装包无关、整批都无法进行的错误"""
+        return [issue for issue in self.errors if issue.file_path is None]
+
+    def lines(self):
+        """日志输出：汇总一行 + 每个问题一行"""
+        summary = (f"🩺 预检 {len(self.files)} 个安装包，用时 {self.elapsed * 1000:.0f} ms："
+                   f"{len(self.errors)} 个错误，{len(self.warnings)} 个警告")
+        return [summary] + [str(issue) for issue in self.issues]
+
+
+def _read_head(file_path):
+    with open_package(file_path) as f:
+        return f.read(HEADER_BYTES)
+
+
+def check_pe(head, size):
+    """检查 .exe 文件头，返回问题描述或 None"""
+    if len(head) < 0x40 or head[:2] != b"MZ":
+        return "不是有效的 Windows 程序（缺少 MZ 头）"
+    layout = read_pe_layout(head)
+    if layout is None:
+        return "PE 头损坏"
+    sections, data_end = layout
+    if not sections:
+        return "PE 节表为空或超出文件头范围"
+    if data_end > size:
+        return f"文件不完整：节数据应至少 {data_end} 字节，实际只有 {size} 字节（下载可能被截断）"
+    return None
+
+
+def check_msi(head, size):
+    """检查 .msi（OLE 复合文档）文件头，返回问题描述或 None"""
+    if len(head) < 512 or head[:8] != OLE_MAGIC:
+        return "不是有效的 MSI（复合文档头错误）"
+    sector_shift, = struct.unpack_from("<H", head, 30)
+    if sector_shift not in (9, 12):
+        return f"复合文档扇区大小异常（2^{sector_shift}）"
+    sector_size = 1 << sector_shift
+    directory_start, = struct.unpack_from("<I", head, 48)
+    sectors = [sector for sector in struct.unpack_from("<109I", head, 76) if sector < OLE_SPECIAL_SECTOR]
+    if directory_start < OLE_SPECIAL_SECTOR:
+        sectors.append(directory_start)
+    if not sectors:
+        return "复合文档没有 FAT 扇区"
+    # 扇区 n 位于文件偏移 (n + 1) × 扇区大小（第一个扇区是文件头）
+    needed = (max(sectors) + 2) * sector_size
+    if needed > size:
+        return f"文件不完整：应至少 {needed} 字节，实际只有 {size} 字节（下载可能被截断）"
+    return None
+
+
+def check_package(file_path):
+    """（阻塞）检查单个安装包，返回 (大小, 问题列表)"""
+    try:
+        size = package_stat(file_path).st_size
+    except OSError as e:
+        return 0, [PreflightIssue(ERROR, file_path, f"无法读取文件信息：{e}")]
+    if size == 0:
+        return 0, [PreflightIssue(ERROR, file_path, "文件为空（0 字节）")]
+    try:
+        head = _read_head(file_path)
+    except OSError as e:
+        return size, [PreflightIssue(ERROR, file_path, f"无法读取：{e}")]
+    if file_path.lower().endswith(".msi"):
+        problem = check_msi(head, size)
+    else:
+        problem = check_pe(head, size)
+    issues = [PreflightIssue(ERROR, file_path, problem)] if problem else []
+    return size, issues
+
+
+def _existing_parent(path):
+    path = os.path.abspath(path)
+    while not os.path.isdir(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+    return path
+
+
+def check_space(target_path, total_size):
+    """目标目录所在磁盘的剩余空间，返回问题列表"""
+    folder = _existing_parent(target_path) if target_path else None
+    if folder is None:
+        return [PreflightIssue(WARNING, None, f"目标目录 {target_path} 所在的磁盘不存在，无法检查剩余空间")]
+    try:
+        free = shutil.disk_usage(folder).free
+    except OSError as e:
+        return [PreflightIssue(WARNING, None, f"无法读取 {folder} 的剩余空间：{e}")]
+    need = total_size / (1024 * 1024)
+    left = free / (1024 * 1024)
+    if free < total_size:
+        return [PreflightIssue(ERROR, None, f"目标磁盘剩余 {left:.0f} MB，不足以容纳安装包总大小 {need:.0f} MB")]
+    if free < total_size * SPACE_WARNING_FACTOR:
+        return [PreflightIssue(WARNING, None, f"目标磁盘剩余 {left:.0f} MB，安装包总大小 {need:.0f} MB，安装后可能不足")]
+    return []
+
+
+def check_admin_rights(files, admin_check):
+    """有 .msi 时检查管理员权限（无法检测时不报告）"""
+    if admin_check is None or not any(file_path.lower().endswith(".msi") for file_path in files):
+        return []
+    try:
+        is_admin = admin_check()
+    except Exception:
+        return []
+    if is_admin:
+        return []
+    return [PreflightIssue(ERROR, None, "当前没有管理员权限，MSI 安装包无法安装（请右键程序 → 以管理员身份运行）")]
+
+
+def run_preflight(files, target_path, admin_check=None, max_workers=MAX_WORKERS):
+    """（阻塞）并发检查全部安装包，返回 PreflightReport；issues 按 files 的顺序排列，整批的问题在最前"""
+    start = time.perf_counter()
+    files = list(files)
+    issues = check_admin_rights(files, admin_check)
+    total_size = 0
+    if files:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(files))),
+                                thread_name_prefix="preflight") as pool:
+            results = list(pool.map(check_package, files))
+        package_issues = []
+        for size, found in results:
+            total_size += size
+            package_issues.extend(found)
+        issues.extend(check_space(target_path, total_size))
+        issues.extend(package_issues)
+    return PreflightReport(files, issues, total_size, time.perf_counter() - start)
@@ -0,0 +1,182 @@
+"""安装进程的启动与输出采集
+
+安装程序的 stdout/stderr 按块增量读取：编码只在第一块数据上判断一次，
+之后使用增量解码器逐块解码，完整行实时转发给日志，内存中只保留有限长度的尾部用于失败摘要。
+"""
+import asyncio
+import codecs
+import subprocess
+
+from .proctree import InstallCancelled, ProcessTracker, popen_kwargs, terminate_trees
+from .timeouts import InstallHung, SAMPLE_INTERVAL, idle_watch
+
+# 单次读取的块大小
+READ_CHUNK = 64 * 1024
+# 每个输出流保留的尾部字符数
+TAIL_CHARS = 4096
+# 不含换行的超长行达到该长度时强制输出
+MAX_LINE_CHARS = 4096
+# 进程退出后等待输出读完的时间（子进程可能继承管道而迟迟不关闭）
+DRAIN_GRACE = 2.0
+# 编码候选（gb2312 是 gbk 的子集，无需单独尝试）
+CANDIDATE_ENCODINGS = ("utf-8", "gbk")
+
+
+def detect_encoding(chunk):
+    """根据第一块数据判断编码"""
+    if chunk.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if chunk.startswith(codecs.BOM_UTF16_LE):
+        return "utf-16"
+    # 无 BOM 的 UTF-16LE：ASCII 字符的高字节全为 0
+    if len(chunk) >= 4 and chunk[1::2].count(0) >= len(chunk) // 4:
+        return "utf-16-le"
+    for encoding in CANDIDATE_ENCODINGS:
+        try:
+            # final=False：块末尾被截断的多字节字符不算解码失败
+            codecs.getincrementaldecoder(encoding)().decode(chunk, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return "latin-1"
+
+
+class StreamCapture:
+    """单个输出流的增量解码器：转发完整行，保留有限尾部"""
+
+    def __init__(self, on_line=None, tail_chars=TAIL_CHARS):
+        self.on_line = on_line
+        self.tail_chars = tail_chars
+        self.encoding = None
+        self.bytes_read = 0
+        self._decoder = None
+        self._partial = ""
+        self._tail = ""
+
+    @property
+    def tail(self):
+        return self._tail
+
+    def feed(self, chunk, final=False):
+        """写入一块原始字节"""
+        if chunk and self._decoder is None:
+            self.encoding = detect_encoding(chunk)
+            self._decoder = codecs.getincrementaldecoder(self.encoding)(errors="replace")
+        self.bytes_read += len(chunk)
+        text = self._decoder.decode(chunk, final=final) if self._decoder else ""
+        if text:
+            self._tail = (self._tail + text)[-self.tail_chars:]
+            self._emit(text, final)
+        elif final:
+            self._emit("", True)
+
+    def _emit(self, text, final):
+        data = self._partial + text
+        lines = data.splitlines(keepends=True)
+        self._partial = ""
+        if lines and not final and not lines[-1].endswith(("\n", "\r")):
+            self._partial = lines.pop()
+            if len(self._partial) > MAX_LINE_CHARS:
+                lines.append(self._partial)
+                self._partial = ""
+        if self.on_line is None:
+            return
+        for line in lines:
+            line = line.rstrip("\r\n")
+            if line.strip():
+                self.on_line(line)
+
+
+async def _pump(stream, capture):
+    """逐块读取输出流直到 EOF"""
+    try:
+        while True:
+            chunk = await stream.read(READ_CHUNK)
+            if not chunk:
+                break
+            capture.feed(chunk)
+    except (OSError, ValueError):
+        pass
+    finally:
+        capture.feed(b"", final=True)
+
+
+class AsyncLauncher:
+    """默认进程启动器：asyncio.create_subprocess_exec 直接启动安装程序（不经过 shell）
+
+    调用方式 ``await launcher(cmd, timeout, new_console=False, on_output=None, idle_window=None)``，
+    on_output(stream, line) 实时接收每一行（stream 为 "stdout"/"stderr"）。
+    返回 (返回码, stdout尾部, stderr尾部)。超时时结束整个进程树并抛出 subprocess.TimeoutExpired；
+    指定 idle_window 时进程树连续空闲（无 CPU/I/O）该秒数即结束进程树并抛出 InstallHung（TimeoutExpired 的子类）；
+    被取消（ProcessTracker.cancel 或任务被 cancel）时结束进程树并抛出 InstallCancelled / CancelledError。
+    """
+
+    def __init__(self, tracker=None, sample_interval=SAMPLE_INTERVAL):
+        self.tracker = tracker or ProcessTracker()
+        self.sample_interval = sample_interval
+
+    async def _terminate(self, proc, grace):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, terminate_trees, [proc], grace)
+
+    async def _wait(self, proc, timeout, idle_window):
+        """等待进程退出；超时抛出 asyncio.TimeoutError，挂起返回 None"""
+        if not idle_window:
+            return await asyncio.wait_for(proc.wait(), timeout)
+        waiter = asyncio.ensure_future(proc.wait())
+        watcher = asyncio.ensure_future(idle_watch(proc.pid, idle_window, self.sample_interval))
+        try:
+            done, _ = await asyncio.wait((waiter, watcher), timeout=timeout,
+                                         return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            watcher.cancel()
+            if not waiter.done():
+                waiter.cancel()
+        if waiter in done:
+            return waiter.result()
+        if watcher in done:
+            return None
+        raise asyncio.TimeoutError()
+
+    async def __call__(self, cmd, timeout, new_console=False, on_output=None, idle_window=None):
+        self.tracker.check()
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            stdin=asyncio.subprocess.DEVNULL,
+            **popen_kwargs(new_console)
+        )
+        try:
+            self.tracker.register(proc)
+        except InstallCancelled:
+            await proc.wait()
+            raise
+        captures = {}
+        readers = []
+        try:
+            for name, stream in (("stdout", proc.stdout), ("stderr", proc.stderr)):
+                on_line = (lambda line, name=name: on_output(name, line)) if on_output else None
+                captures[name] = StreamCapture(on_line)
+                readers.append(asyncio.ensure_future(_pump(stream, captures[name])))
+            try:
+                returncode = await self._wait(proc, timeout, idle_window)
+            except asyncio.TimeoutError:
+                await self._terminate(proc, 0)
+                await proc.wait()
+                raise subprocess.TimeoutExpired(cmd, timeout)
+            except asyncio.CancelledError:
+                await asyncio.shield(self._terminate(proc, self.tracker.grace))
+                raise
+            if returncode is None:
+                await self._terminate(proc, 0)
+                await proc.wait()
+                raise InstallHung(cmd, idle_window)
+            # 子进程可能继承了管道而迟迟不关闭，输出只再等待有限时间
+            await asyncio.wait(readers, timeout=DRAIN_GRACE)
+        finally:
+            for reader in readers:
+                reader.cancel()
+            self.tracker.unregister(proc)
+        self.tracker.check()
+        return returncode, captures["stdout"].tail, captures["stderr"].tail
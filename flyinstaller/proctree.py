@@ -0,0 +1,348 @@
+"""进程树的跟踪与终止
+
+取消安装时需要结束安装程序本身以及它启动的所有子孙进程：
+先发送温和的结束信号（POSIX 为 SIGTERM，Windows 为不带 /F 的 taskkill），
+等待有限的宽限期后仍存活的进程再强制结束（SIGKILL / taskkill /F）。
+
+POSIX 下安装进程以新会话启动，整个进程组一起结束，父进程已退出的孙进程也不会遗漏。
+"""
+import os
+import signal
+import subprocess
+import threading
+import time
+
+# 温和结束后等待进程退出的宽限期（秒）
+CANCEL_GRACE = 3.0
+# 等待进程退出时的轮询间隔（秒）
+POLL_INTERVAL = 0.02
+
+
+class InstallCancelled(BaseException):
+    """安装已被取消
+
+    与 asyncio.CancelledError 一样继承 BaseException，避免被各处的 ``except Exception`` 当作普通失败吞掉。
+    """
+
+
+# --------------------------
+# 进程表（pid → ppid）
+# --------------------------
+def _proc_table_linux():
+    table = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", "rb") as f:
+                data = f.read()
+        except OSError:
+            continue
+        # 进程名可能包含空格和括号，从最后一个 ')' 之后解析
+        fields = data[data.rindex(b")") + 2:].split()
+        if fields[0] != b"Z":
+            table[int(name)] = int(fields[1])
+    return table
+
+
+def _proc_table_ps():
+    output = subprocess.run(["ps", "-A", "-o", "pid=,ppid=,stat="],
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL).stdout
+    table = {}
+    for line in output.decode("ascii", "ignore").splitlines():
+        parts = line.split()
+        if len(parts) >= 3 and not parts[2].startswith("Z"):
+            table[int(parts[0])] = int(parts[1])
+    return table
+
+
+def _proc_table_windows():
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESSENTRY32W(ctypes.Structure):
+        _fields_ = [
+            ("dwSize", wintypes.DWORD),
+            ("cntUsage", wintypes.DWORD),
+            ("th32ProcessID", wintypes.DWORD),
+            ("th32DefaultHeapID", ctypes.c_void_p),
+            ("th32ModuleID", wintypes.DWORD),
+            ("cntThreads", wintypes.DWORD),
+            ("th32ParentProcessID", wintypes.DWORD),
+            ("pcPriClassBase", ctypes.c_long),
+            ("dwFlags", wintypes.DWORD),
+            ("szExeFile", ctypes.c_wchar * 260),
+        ]
+
+    kernel32 = ctypes.windll.kernel32
+    kernel32.CreateToolhelp32Snapshot.restype = wintypes.HANDLE
+    snapshot = kernel32.CreateToolhelp32Snapshot(0x00000002, 0)  # TH32CS_SNAPPROCESS
+    table = {}
+    try:
+        entry = PROCESSENTRY32W()
+        entry.dwSize = ctypes.sizeof(PROCESSENTRY32W)
+        ok = kernel32.Process32FirstW(snapshot, ctypes.byref(entry))
+        while ok:
+            table[entry.th32ProcessID] = entry.th32ParentProcessID
+            ok = kernel32.Process32NextW(snapshot, ctypes.byref(entry))
+    finally:
+        kernel32.CloseHandle(snapshot)
+    return table
+
+
+def process_table():
+    """当前所有存活进程的 pid → ppid 映射"""
+    if os.name == "nt":
+        return _proc_table_windows()
+    if os.path.isdir("/proc"):
+        return _proc_table_linux()
+    return _proc_table_ps()
+
+
+def descendants(root_pid, table=None):
+    """root_pid 的所有子孙进程（不含自身）"""
+    table = process_table() if table is None else table
+    children = {}
+    for pid, ppid in table.items():
+        children.setdefault(ppid, []).append(pid)
+    found = []
+    stack = [root_pid]
+    while stack:
+        for child in children.get(stack.pop(), ()):
+            if child not in found and child != root_pid:
+                found.append(child)
+                stack.append(child)
+    return found
+
+
+# --------------------------
+# 进程树活动量（CPU 时间 + I/O 字节数），用于判断安装程序是否挂起
+# --------------------------
+def _tree_activity_linux(root_pid):
+    ticks = os.sysconf("SC_CLK_TCK")
+    stats = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", "rb") as f:
+                data = f.read()
+        except OSError:
+            continue
+        fields = data[data.rindex(b")") + 2:].split()
+        # fields: state ppid pgrp session ... utime(11) stime(12)
+        stats[int(name)] = (int(fields[1]), int(fields[3]), int(fields[11]) + int(fields[12]))
+    if root_pid not in stats:
+        return None
+    # 安装进程是新会话的首进程：同一会话中的进程（包括父进程已退出的孙进程）都算在内
+    members = {pid for pid, (_, session, _) in stats.items() if session == root_pid}
+    members.add(root_pid)
+    members.update(descendants(root_pid, {pid: ppid for pid, (ppid, _, _) in stats.items()}))
+    cpu = 0
+    io = 0
+    for pid in members:
+        cpu += stats[pid][2]
+        try:
+            with open(f"/proc/{pid}/io", "rb") as f:
+                for line in f:
+                    # rchar/wchar 包含管道、网络等所有读写
+                    if line.startswith((b"rchar:", b"wchar:")):
+                        io += int(line.split()[1])
+        except (OSError, ValueError):
+            pass
+    return cpu / ticks, io
+
+
+def _tree_activity_windows(root_pid):
+    import ctypes
+    from ctypes import wintypes
+
+    class IO_COUNTERS(ctypes.Structure):
+        _fields_ = [(name, ctypes.c_ulonglong) for name in (
+            "ReadOperationCount", "WriteOperationCount", "OtherOperationCount",
+            "ReadTransferCount", "WriteTransferCount", "OtherTransferCount")]
+
+    kernel32 = ctypes.windll.kernel32
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    table = _proc_table_windows()
+    if root_pid not in table:
+        return None
+    cpu = 0
+    io = 0
+    for pid in [root_pid] + descendants(root_pid, table):
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            continue
+        try:
+            times = [wintypes.FILETIME() for _ in range(4)]
+            if kernel32.GetProcessTimes(handle, *[ctypes.byref(t) for t in times]):
+                for t in times[2:]:  # 内核态 + 用户态，单位 100ns
+                    cpu += (t.dwHighDateTime << 32) | t.dwLowDateTime
+            counters = IO_COUNTERS()
+            if kernel32.GetProcessIoCounters(handle, ctypes.byref(counters)):
+                io += counters.ReadTransferCount + counters.WriteTransferCount + counters.OtherTransferCount
+        finally:
+            kernel32.CloseHandle(handle)
+    return cpu / 1e7, io
+
+
+def tree_activity(root_pid):
+    """进程树累计的 (CPU 秒, I/O 字节)；进程已不存在或当前平台无法采样时返回 None"""
+    try:
+        if os.name == "nt":
+            return _tree_activity_windows(root_pid)
+        if os.path.isdir("/proc"):
+            return _tree_activity_linux(root_pid)
+    except OSError:
+        pass
+    return None
+
+
+# --------------------------
+# 结束进程
+# --------------------------
+def _taskkill(pids, force):
+    if not pids:
+        return
+    cmd = ["taskkill"] + (["/F"] if force else [])
+    for pid in pids:
+        cmd += ["/PID", str(pid)]
+    subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                   creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0))
+
+
+def _signal(pids, groups, sig):
+    for pgid in groups:
+        try:
+            os.killpg(pgid, sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+    for pid in pids:
+        try:
+            os.kill(pid, sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+
+def terminate_trees(procs, grace=CANCEL_GRACE):
+    """结束若干进程（Popen 或 asyncio 子进程，只用到 pid）及其全部子孙进程
+
+    grace 为 0 时直接强制结束。返回 (结束的进程数, 耗时秒)；进程的回收由调用方负责。
+    """
+    start = time.perf_counter()
+    roots = [proc.pid for proc in procs]
+    if not roots:
+        return 0, 0.0
+    table = process_table()
+    pids = {pid for pid in roots if pid in table}
+    for pid in roots:
+        pids.update(descendants(pid, table))
+    # POSIX 下安装进程是新会话的组长，pgid 即 pid
+    groups = roots if os.name != "nt" else []
+
+    def alive():
+        current = process_table()
+        return any(pid in current for pid in pids) or bool(groups and _live_groups().intersection(groups))
+
+    if grace > 0:
+        if os.name == "nt":
+            _taskkill(sorted(pids), force=False)
+        else:
+            _signal(pids, groups, signal.SIGTERM)
+        deadline = time.perf_counter() + grace
+        while time.perf_counter() < deadline:
+            if not alive():
+                return len(pids), time.perf_counter() - start
+            time.sleep(POLL_INTERVAL)
+
+    current = process_table()
+    remaining = {pid for pid in pids if pid in current}
+    if os.name == "nt":
+        _taskkill(sorted(remaining), force=True)
+    else:
+        _signal(remaining, groups, signal.SIGKILL)
+    return len(pids), time.perf_counter() - start
+
+
+def _live_groups():
+    """存活进程（不含僵尸进程）所在的进程组
+
+    调用方尚未回收的组长是僵尸进程，os.killpg(pgid, 0) 对它仍然成功，不能用来判断组内是否还有进程。
+    """
+    groups = set()
+    if os.path.isdir("/proc"):
+        for name in os.listdir("/proc"):
+            if not name.isdigit():
+                continue
+            try:
+                with open(f"/proc/{name}/stat", "rb") as f:
+                    data = f.read()
+            except OSError:
+                continue
+            fields = data[data.rindex(b")") + 2:].split()
+            if fields[0] != b"Z":
+                groups.add(int(fields[2]))
+        return groups
+    output = subprocess.run(["ps", "-A", "-o", "pgid=,stat="],
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL).stdout
+    for line in output.decode("ascii", "ignore").splitlines():
+        parts = line.split()
+        if len(parts) >= 2 and not parts[1].startswith("Z"):
+            groups.add(int(parts[0]))
+    return groups
+
+
+class ProcessTracker:
+    """跟踪正在运行的安装进程，取消时结束全部进程树
+
+    多个并发通道共用同一个 tracker；cancel() 之后新启动的进程会被立即结束。
+    """
+
+    def __init__(self, cancel_event=None, grace=CANCEL_GRACE):
+        self.cancel_event = cancel_event or threading.Event()
+        self.grace = grace
+        self._lock = threading.Lock()
+        self._procs = set()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    @property
+    def running(self):
+        with self._lock:
+            return list(self._procs)
+
+    def register(self, proc):
+        """登记新启动的进程（Popen 或 asyncio 子进程）；已取消时立即结束并抛出 InstallCancelled"""
+        with self._lock:
+            if not self.cancel_event.is_set():
+                self._procs.add(proc)
+                return
+        terminate_trees([proc], grace=0)
+        raise InstallCancelled()
+
+    def unregister(self, proc):
+        with self._lock:
+            self._procs.discard(proc)
+
+    def check(self):
+        """已取消时抛出 InstallCancelled"""
+        if self.cancel_event.is_set():
+            raise InstallCancelled()
+
+    def cancel(self):
+        """设置取消标志并结束所有正在运行的进程树，返回 (结束的进程数, 耗时秒)"""
+        with self._lock:
+            self.cancel_event.set()
+            procs = list(self._procs)
+        return terminate_trees(procs, grace=self.grace)
+
+
+def popen_kwargs(new_console=False):
+    """启动安装进程的平台参数：POSIX 下使用新会话，便于按进程组结束"""
+    if os.name == "nt":
+        flags = subprocess.CREATE_NEW_CONSOLE if new_console else 0
+        return {"creationflags": flags}
+    return {"start_new_session": True}
+
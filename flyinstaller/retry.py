@@ -0,0 +1,145 @@
+"""安装返回码分类与暂时性错误的退避重试
+
+每次尝试的返回码分为五类：
+
+- SUCCESS 成功；
+- REBOOT 成功但需要重启（1641/3010）；
+- TRANSIENT 暂时性错误：另一个安装正在进行（1618）、Windows Installer 服务暂时不可用（1601）、
+  与其他安装同时更新共享组件时的 1603 等，等待一段时间后用同一条命令重试即可成功；
+- WRONG_SWITCH 参数不被接受，换下一个参数（默认分类）；
+- FATAL 换什么参数都无法安装（安装包损坏、平台不支持、策略禁止、已安装其他版本等），不再尝试。
+
+暂时性错误按指数退避加随机抖动等待后重试，每个返回码有单个安装包的重试上限，
+整批共用一个重试预算（RetryBudget），机器持续繁忙时不会无限等待。
+部署清单中可按安装包声明 transient_codes / fatal_codes / max_retries 覆盖默认分类（见 manifest.py）。
+"""
+import random
+
+SUCCESS = "success"
+REBOOT = "reboot"
+TRANSIENT = "transient"
+WRONG_SWITCH = "wrong_switch"
+FATAL = "fatal"
+
+# 表示安装成功但需要重启的返回码
+REBOOT_CODES = (1641, 3010)
+
+# 暂时性错误：返回码 → 单个安装包最多重试次数
+TRANSIENT_CODES = {
+    1618: 5,   # 另一个安装正在进行
+    1500: 5,   # 另一个安装正在进行（旧版 Windows Installer）
+    1601: 3,   # 无法访问 Windows Installer 服务
+    1603: 1,   # 安装过程中的致命错误（常见于同时更新共享组件，只重试一次）
+}
+
+# 机器正忙：重试用完后换其他参数同样会失败，不再尝试
+BUSY_CODES = (1618, 1500, 1601)
+
+# 换参数也无法安装的返回码
+FATAL_CODES = (
+    1602,  # 用户取消了安装
+    1619,  # 无法打开安装包
+    1620,  # 安装包无效
+    1625,  # 系统策略禁止安装
+    1633,  # 不支持当前平台
+    1638,  # 已安装该产品的其他版本
+    1643,  # 系统策略禁止安装补丁
+)
+
+RETURN_CODE_NAMES = {
+    1618: "另一个安装正在进行",
+    1500: "另一个安装正在进行",
+    1601: "无法访问 Windows Installer 服务",
+    1603: "安装过程中发生致命错误",
+    1602: "用户取消了安装",
+    1619: "无法打开安装包",
+    1620: "安装包无效",
+    1625: "系统策略禁止安装",
+    1633: "不支持当前平台",
+    1638: "已安装该产品的其他版本",
+    1643: "系统策略禁止安装补丁",
+}
+
+# 清单中声明的暂时性返回码默认重试次数
+DEFAULT_MAX_RETRIES = 3
+# 第一次重试前的等待时间与最长等待时间（秒）
+BASE_DELAY = 5.0
+MAX_DELAY = 120.0
+# 每批最多重试次数（所有安装包共用）
+DEFAULT_RETRY_BUDGET = 20
+
+
+def describe_code(returncode):
+    """返回码的说明（未知时为空字符串）"""
+    return RETURN_CODE_NAMES.get(returncode, "")
+
+
+def backoff_delay(retry, base=BASE_DELAY, cap=MAX_DELAY, rng=random):
+    """第 retry 次重试（从 1 开始）前的等待秒数：按 2 的幂增长，在一半到全部之间随机，
+    同时遇到 1618 的多个通道、多台机器不会在同一时刻再次争抢"""
+    delay = min(cap, base * 2 ** (retry - 1))
+    return delay / 2 + rng.random() * delay / 2
+
+
+class RetryPolicy:
+    """单个安装包的返回码分类规则"""
+
+    def __init__(self, success_codes, reboot_codes=REBOOT_CODES, transient_codes=None, fatal_codes=FATAL_CODES):
+        self.success_codes = tuple(success_codes)
+        self.reboot_codes = tuple(reboot_codes)
+        self.transient_codes = dict(TRANSIENT_CODES if transient_codes is None else transient_codes)
+        self.fatal_codes = tuple(fatal_codes)
+
+    @classmethod
+    def for_package(cls, settings, success_codes):
+        """按部署清单规则（manifest.PackageRule，可为 None）生成；清单中的成功返回码优先于其他分类"""
+        if settings is None:
+            return cls(success_codes)
+        success_codes = settings.success_codes or success_codes
+        transient = dict(TRANSIENT_CODES)
+        if settings.max_retries is not None:
+            transient = {code: settings.max_retries for code in transient}
+        for code in settings.transient_codes or ():
+            transient[code] = settings.max_retries if settings.max_retries is not None else DEFAULT_MAX_RETRIES
+        fatal = tuple(code for code in FATAL_CODES if code not in transient) + tuple(settings.fatal_codes or ())
+        for code in settings.fatal_codes or ():
+            transient.pop(code, None)
+        return cls(success_codes, transient_codes=transient, fatal_codes=fatal)
+
+    def classify(self, returncode):
+        """返回 SUCCESS / REBOOT / TRANSIENT / WRONG_SWITCH / FATAL；没有返回码（未执行）时为 WRONG_SWITCH"""
+        if returncode is None:
+            return WRONG_SWITCH
+        if returncode in self.success_codes:
+            return REBOOT if returncode in self.reboot_codes else SUCCESS
+        if returncode in self.transient_codes:
+            return TRANSIENT
+        if returncode in self.fatal_codes:
+            return FATAL
+        return WRONG_SWITCH
+
+    def max_retries(self, returncode):
+        """该暂时性返回码单个安装包最多重试的次数"""
+        return self.transient_codes.get(returncode, 0)
+
+
+class RetryBudget:
+    """一批安装中所有安装包共用的重试次数"""
+
+    def __init__(self, total=DEFAULT_RETRY_BUDGET):
+        self.total = max(0, int(total))
+        self.used = 0
+
+    @property
+    def remaining(self):
+        return self.total - self.used
+
+    def take(self):
+        """占用一次重试，预算用完时返回 False"""
+        if self.used >= self.total:
+            return False
+        self.used += 1
+        return True
+
+    def reset(self):
+        self.used = 0
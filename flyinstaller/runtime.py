@@ -0,0 +1,90 @@
+"""安装引擎的运行时：在独立线程中运行 asyncio 事件循环
+
+GUI 与其他同步代码只通过本模块提交任务；引擎产生的进度、结果、批次结束等事件
+通过 emit(kind, payload) 交给调用方提供的线程安全通道（GUI 中为 LogPipeline.post）。
+"""
+import asyncio
+import threading
+
+from .scheduler import InstallScheduler
+
+
+class InstallRuntime:
+    """后台事件循环 + 当前批次的调度器"""
+
+    def __init__(self, emit=None):
+        self.emit = emit or (lambda kind, payload: None)
+        self.loop = asyncio.new_event_loop()
+        self.scheduler = None
+        self._thread = threading.Thread(target=self._run_loop, name="install-loop", daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    @property
+    def busy(self):
+        return self.scheduler is not None
+
+    def submit(self, coro):
+        """提交协程到后台事件循环，返回 concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def start_batch(self, engine, files, lanes=None, plan=None, options=None):
+        """开始一批安装，完成后发出 ("finished", 结果列表) 事件
+
+        plan(files) 为可选的阻塞函数（如需要计算哈希的增量筛选），在线程池中执行，返回实际要安装的列表；
+        plan 或批次准备抛出异常时记录日志，不安装任何包，同样发出 ("finished", []) 事件。
+        options 为传给调度器的依赖、优先级与并发组（见 ExecutionPlan.scheduler_options()）。
+        """
+        return self.submit(self._batch(engine, list(files), lanes, plan, options))
+
+    async def _batch(self, engine, files, lanes, plan=None, options=None):
+        loop = asyncio.get_running_loop()
+        try:
+            if plan is not None:
+                files = await loop.run_in_executor(None, plan, files)
+            engine.begin_batch(files)
+        except Exception as e:
+            # 筛选或批次准备失败（如读取安装包出错）时同样发出 finished，调用方才能恢复界面
+            engine.log(f"❌ 准备安装批次失败，未开始安装：{e}")
+            self.emit("finished", [])
+            return []
+        scheduler = InstallScheduler(
+            engine.install_file,
+            lanes=lanes,
+            cancel_event=engine.cancel_event,
+            on_progress=lambda done, total: self.emit("progress", (done, total)),
+            on_start=lambda file_path: self.emit("started", file_path),
+            on_result=lambda file_path, success: self.emit("result", (file_path, success)),
+            # 结束进程树需要等待宽限期，放到线程池中执行
+            on_cancel=lambda: loop.run_in_executor(None, engine.cancel),
+            on_blocked=engine.block,
+            tracer=engine.tracer,
+            **(options or {})
+        )
+        self.scheduler = scheduler
+        try:
+            results = await scheduler.run(files)
+        finally:
+            self.scheduler = None
+            engine.end_batch()
+        self.emit("finished", results)
+        return results
+
+    def cancel(self):
+        """取消当前批次，完成后发出 ("cancelled", (结束的进程数, 耗时秒)) 事件"""
+        return self.submit(self._cancel())
+
+    async def _cancel(self):
+        report = (0, 0.0)
+        if self.scheduler is not None:
+            report = await self.scheduler.cancel() or report
+        self.emit("cancelled", report)
+        return report
+
+    def close(self):
+        """停止事件循环"""
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(2.0)
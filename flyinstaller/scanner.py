@@ -0,0 +1,174 @@
+"""安装包文件夹扫描
+
+PackageScanner 用 os.scandir 遍历目录树（max_depth 限制深度，0 只扫描所选文件夹本身），
+include/exclude 为 glob 规则：不含 “/” 的规则匹配文件名，含 “/” 的匹配相对路径，排除规则同样作用于子目录。
+
+每个目录的子目录与候选文件按目录修改时间缓存在索引文件中（压缩包的成员按压缩包大小与修改时间缓存），
+再次扫描时修改时间未变的目录不再列出，只有新增、删除、重命名过条目的目录才会重新读取。
+"""
+import fnmatch
+import json
+import os
+import threading
+
+# 识别为安装包的文件后缀
+PACKAGE_SUFFIXES = (".exe", ".msi")
+# 扫描时记录的候选文件（安装包与压缩包）
+SCAN_SUFFIXES = PACKAGE_SUFFIXES + (".zip",)
+INDEX_VERSION = 1
+# 每批交给调用方的安装包个数
+DEFAULT_BATCH = 200
+
+
+def _match(patterns, relpath):
+    relpath = relpath.lower()
+    name = relpath.rpartition("/")[2]
+    return any(fnmatch.fnmatchcase(relpath if "/" in pattern else name, pattern.lower()) for pattern in patterns)
+
+
+class PackageScanner:
+    """带目录索引缓存的安装包扫描器（同一时间只执行一次扫描）"""
+
+    def __init__(self, index_path=None, max_depth=0, include=None, exclude=None):
+        self.index_path = index_path
+        self.max_depth = max_depth
+        self.include = list(include or [])
+        self.exclude = list(exclude or [])
+        self._lock = threading.Lock()
+        self._dirs = {}
+        self._bundles = {}
+        self._dirty = False
+        # 最近一次扫描：使用缓存的目录数、重新读取的目录数
+        self.hits = 0
+        self.misses = 0
+        self.load()
+
+    def load(self):
+        if not self.index_path:
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != INDEX_VERSION:
+            return
+        self._dirs = data.get("dirs", {})
+        self._bundles = data.get("bundles", {})
+
+    def save(self):
+        """原子写入（先写临时文件再替换）"""
+        if not self.index_path or not self._dirty:
+            return
+        payload = json.dumps({"version": INDEX_VERSION, "dirs": self._dirs, "bundles": self._bundles},
+                             ensure_ascii=False, separators=(",", ":"))
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(payload)
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+
+    def list_dir(self, path):
+        """返回目录的 (子目录名列表, 候选文件名列表)，目录修改时间未变时使用缓存"""
+        key = os.path.normcase(os.path.abspath(path))
+        mtime_ns = os.stat(path).st_mtime_ns
+        cached = self._dirs.get(key)
+        if cached is not None and cached["mtime_ns"] == mtime_ns:
+            self.hits += 1
+            return cached["dirs"], cached["files"]
+        self.misses += 1
+        dirs, files = [], []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        dirs.append(entry.name)
+                    elif entry.name.lower().endswith(SCAN_SUFFIXES):
+                        files.append(entry.name)
+                except OSError:
+                    continue
+        dirs.sort(key=str.lower)
+        files.sort(key=str.lower)
+        self._dirs[key] = {"mtime_ns": mtime_ns, "dirs": dirs, "files": files}
+        self._dirty = True
+        return dirs, files
+
+    def list_bundle(self, archive):
+        """压缩包中的安装包成员名（按压缩包大小与修改时间缓存）"""
+        from .bundles import archive_index
+        key = os.path.normcase(os.path.abspath(archive))
+        stat = os.stat(archive)
+        cached = self._bundles.get(key)
+        if cached is not None and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        members = [name for name in archive_index(archive) if name.lower().endswith(PACKAGE_SUFFIXES)]
+        self._bundles[key] = [stat.st_size, stat.st_mtime_ns, members]
+        self._dirty = True
+        return members
+
+    def wanted(self, relpath):
+        if self.include and not _match(self.include, relpath):
+            return False
+        return not (self.exclude and _match(self.exclude, relpath))
+
+    def scan(self, folder, on_batch=None, batch_size=DEFAULT_BATCH, cancel_event=None, log=None):
+        """扫描 folder，返回安装包路径列表（文件夹内按名称排序，先文件后子目录）
+
+        on_batch(paths) 每找到 batch_size 个安装包调用一次；cancel_event 置位时停止并返回已找到的部分。
+        所选文件夹本身无法读取时抛出 OSError，子目录、压缩包读取失败只记录日志。
+        """
+        log = log or (lambda message: None)
+        found = []
+        pending = []
+
+        def emit(paths):
+            found.extend(paths)
+            pending.extend(paths)
+            if on_batch is not None and len(pending) >= batch_size:
+                on_batch(list(pending))
+                pending.clear()
+
+        with self._lock:
+            self.hits = self.misses = 0
+            stack = [(folder, "", 0)]
+            while stack:
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                path, prefix, depth = stack.pop()
+                try:
+                    dirs, files = self.list_dir(path)
+                except OSError as e:
+                    if depth == 0:
+                        raise
+                    log(f"⚠️ 无法读取文件夹 {prefix}：{str(e)}")
+                    continue
+                for name in files:
+                    relpath = prefix + name
+                    full = os.path.join(path, name)
+                    if name.lower().endswith(PACKAGE_SUFFIXES):
+                        if self.wanted(relpath):
+                            emit([full])
+                        continue
+                    try:
+                        members = self.list_bundle(full)
+                    except OSError as e:
+                        log(f"⚠️ 无法读取压缩包 {relpath}：{str(e)}")
+                        continue
+                    emit([os.path.join(full, *member.split("/")) for member in members
+                          if self.wanted(f"{relpath}/{member}")])
+                if self.max_depth is None or depth < self.max_depth:
+                    for name in reversed(dirs):
+                        if not (self.exclude and _match(self.exclude, prefix + name)):
+                            stack.append((os.path.join(path, name), f"{prefix}{name}/", depth + 1))
+            if pending and on_batch is not None:
+                on_batch(list(pending))
+            try:
+                self.save()
+            except OSError:
+                pass
+        return found
+
+
+def find_packages(folder, log=None):
+    """列出文件夹中的 .exe/.msi 安装包（不递归，不使用索引缓存）；.zip 压缩包展开为其中的安装包"""
+    return PackageScanner().scan(folder, log=log)
@@ -0,0 +1,198 @@
+"""按安装包类型分道并发的批量安装调度器（asyncio）"""
+import asyncio
+import inspect
+import os
+import threading
+
+from .tracing import NULL_TRACER
+
+# 默认并发通道：Windows Installer 持有全局互斥锁，MSI 只能串行；EXE 之间基本独立
+DEFAULT_LANES = {"msi": 1, "exe": 4}
+
+# 调度顺序：auto 有部署清单时按关键路径，否则与 scan 相同（扫描顺序）；
+# sjf 短作业优先（尽快装好可用的程序），ljf 长作业优先（并发时缩短总耗时）
+ORDER_POLICIES = {"auto": "自动", "scan": "扫描顺序", "sjf": "短作业优先", "ljf": "长作业优先"}
+
+
+def package_lane(file_path):
+    """根据文件后缀确定所属通道"""
+    suffix = os.path.splitext(file_path)[1].lower().lstrip(".")
+    return suffix or "exe"
+
+
+def order_priority(policy, estimates):
+    """按估算耗时（{路径: 秒}）生成调度优先级函数；auto/scan 返回 None（使用默认顺序）"""
+    if policy == "sjf":
+        return lambda file_path: estimates.get(file_path, 0.0)
+    if policy == "ljf":
+        return lambda file_path: -estimates.get(file_path, 0.0)
+    if policy not in ORDER_POLICIES:
+        raise ValueError(f"未知的调度顺序：{policy}")
+    return None
+
+
+class Admission:
+    """按优先级分配通道与并发组名额
+
+    等待者按 (优先级, 序号) 排列，每次有名额释放或新的等待者时，依次放行所需名额都有空余的等待者；
+    被并发组挡住的安装包不占用通道，排在它后面的安装包可以先执行。
+    新的等待者到下一轮事件循环才分配，同时就绪的安装包（如批次开始时的全部安装包）一起按优先级排序。
+    """
+
+    def __init__(self, limits):
+        self.limits = dict(limits)
+        self.used = {}
+        self._waiters = []
+        self._pending = False
+
+    async def acquire(self, resources, key):
+        future = asyncio.get_running_loop().create_future()
+        waiter = (key, resources, future)
+        self._waiters.append(waiter)
+        if not self._pending:
+            self._pending = True
+            asyncio.get_running_loop().call_soon(self._dispatch)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif future.done() and not future.cancelled():
+                # 已分配到名额后才被取消
+                self.release(resources)
+            raise
+
+    def release(self, resources):
+        for resource in resources:
+            self.used[resource] -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        self._pending = False
+        self._waiters.sort(key=lambda waiter: waiter[0])
+        for waiter in list(self._waiters):
+            key, resources, future = waiter
+            if future.done():
+                self._waiters.remove(waiter)
+                continue
+            if all(self.used.get(resource, 0) < self.limits.get(resource, 1) for resource in resources):
+                for resource in resources:
+                    self.used[resource] = self.used.get(resource, 0) + 1
+                self._waiters.remove(waiter)
+                future.set_result(None)
+
+
+class InstallScheduler:
+    """批量安装调度器
+
+    install_func(file_path) 为协程，返回是否安装成功；每个通道限制并发数，默认按原始顺序领取任务。
+    以下参数通常来自部署清单（manifest.ExecutionPlan.scheduler_options()）：
+    depends 为 {安装包: [依赖的安装包]}，依赖全部成功后才开始，任一依赖失败时不再安装并回调 on_blocked(file_path, 依赖)；
+    priority(file_path) 返回排序值（越小越先领取）；groups 为 {安装包: 并发组}，group_limits 为各组的并发数。
+    on_start(file_path) 在安装包领取到通道、开始安装时回调，on_progress(done, total) 在每个安装包结束后回调。
+    on_cancel() 在 cancel() 时调用（可以是协程），用于立即结束正在运行的安装进程，其返回值作为 cancel() 的结果。
+    每个安装包是一个以文件名命名的任务，tracer 中按任务分行显示，并记录在通道中排队等待的时间。
+    """
+
+    def __init__(self, install_func, lanes=None, cancel_event=None,
+                 on_progress=None, on_result=None, lane_of=package_lane, on_cancel=None, tracer=None,
+                 on_start=None, depends=None, priority=None, groups=None, group_limits=None, on_blocked=None):
+        self.install_func = install_func
+        self.lanes = dict(DEFAULT_LANES if lanes is None else lanes)
+        self.cancel_event = cancel_event or threading.Event()
+        self.on_progress = on_progress or (lambda done, total: None)
+        self.on_result = on_result or (lambda file_path, success: None)
+        self.on_start = on_start or (lambda file_path: None)
+        self.lane_of = lane_of
+        self.on_cancel = on_cancel
+        self.tracer = tracer or NULL_TRACER
+        self.depends = depends or {}
+        self.priority = priority or (lambda file_path: 0)
+        self.groups = groups or {}
+        self.group_limits = dict(group_limits or {})
+        self.on_blocked = on_blocked or (lambda file_path, dependency: None)
+        self._tasks = []
+        self._done = 0
+        self._total = 0
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    async def cancel(self):
+        """取消整批：结束正在运行的进程，并取消尚未开始的安装包"""
+        self.cancel_event.set()
+        report = None
+        if self.on_cancel is not None:
+            report = self.on_cancel()
+            if inspect.isawaitable(report):
+                report = await report
+        for task in self._tasks:
+            if not task.done():
+                task.cancel()
+        return report
+
+    async def run(self, files):
+        """执行整批安装，返回与 files 等长的结果列表（未执行的为 None）"""
+        files = list(files)
+        results = [None] * len(files)
+        self._done = 0
+        self._total = len(files)
+
+        limits = {("lane", lane): max(1, int(limit)) for lane, limit in self.lanes.items()}
+        limits.setdefault(("lane", "exe"), 1)
+        limits.update({("group", group): max(1, int(limit)) for group, limit in self.group_limits.items()})
+        admission = Admission(limits)
+        positions = {file_path: index for index, file_path in enumerate(files)}
+        finished = {file_path: asyncio.Event() for file_path in files}
+
+        loop = asyncio.get_running_loop()
+        self._tasks = []
+        for index, file_path in enumerate(files):
+            lane = self.lane_of(file_path)
+            resources = [("lane", lane if ("lane", lane) in limits else "exe")]
+            group = self.groups.get(file_path)
+            if group is not None:
+                resources.append(("group", group))
+            # 不在本批中的依赖（已安装、未变化或已在上次完成）视为已满足
+            depends = [(positions[dep], dep) for dep in self.depends.get(file_path, ()) if dep in positions]
+            self._tasks.append(loop.create_task(
+                self._run_one(index, file_path, resources, depends, admission, results, finished),
+                name=os.path.basename(file_path)))
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        return results
+
+    async def _run_one(self, index, file_path, resources, depends, admission, results, finished):
+        try:
+            for position, dependency in depends:
+                await finished[dependency].wait()
+                if self.cancelled:
+                    return
+                if not results[position]:
+                    self.on_blocked(file_path, dependency)
+                    self._finish(index, file_path, False, results)
+                    return
+            with self.tracer.span("queue_wait", lane=self.lane_of(file_path)):
+                await admission.acquire(resources, (self.priority(file_path), index))
+            try:
+                if self.cancelled:
+                    return
+                self.on_start(file_path)
+                try:
+                    success = bool(await self.install_func(file_path))
+                except asyncio.CancelledError:
+                    return
+                except Exception:
+                    success = False
+            finally:
+                admission.release(resources)
+            self._finish(index, file_path, success, results)
+        finally:
+            finished[file_path].set()
+
+    def _finish(self, index, file_path, success, results):
+        results[index] = success
+        self._done += 1
+        self.on_result(file_path, success)
+        self.on_progress(self._done, self._total)
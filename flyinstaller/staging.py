@@ -0,0 +1,352 @@
+"""安装包预取：当前包安装时，把后面的安装包复制到本地缓存目录
+
+安装包文件夹在较慢的 SMB 共享上时，安装程序边运行边通过网络读取自身数据，安装耗时主要花在网络 I/O 上。
+Stager 在安装开始前按顺序预先复制接下来的 depth 个安装包（同一时间只复制一个，保持对共享的顺序读），
+安装程序改为从本地副本运行。
+
+StagingCache 管理本地缓存：大块顺序复制，复制过程中计算 SHA-256，完成后核对大小并重新读取本地副本校验哈希；
+按字节预算做 LRU 淘汰，正在使用或等待安装的副本不会被删除。缓存按 源路径 + 大小 + 修改时间 识别，跨运行复用。
+"""
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+# 复制块大小
+COPY_BLOCK = 8 * 1024 * 1024
+# 默认预取深度与缓存预算
+DEFAULT_DEPTH = 2
+DEFAULT_BUDGET = 10 * 1024 * 1024 * 1024
+INDEX_VERSION = 1
+
+# 安装程序可能从自身所在目录读取的外部数据文件（见 external_files）
+SIDECAR_SUFFIXES = (".cab", ".mst", ".msp", ".dat", ".bin", ".ini", ".xml", ".dll", ".7z")
+# 这类通用名称的 EXE 通常是引导程序，会读取同目录下的任意数据文件（如 InstallShield 的 setup.exe + Data1.cab）
+BOOTSTRAPPER_NAMES = ("setup", "install", "installer", "autorun")
+
+# 视为网络文件系统的类型（Linux /proc/self/mountinfo）
+REMOTE_FS_TYPES = ("cifs", "smb3", "smbfs", "nfs", "nfs4", "9p", "afs", "ceph", "glusterfs", "fuse.sshfs")
+
+
+class StagingError(OSError):
+    """无法预取（空间不足、复制校验失败等），调用方改为直接从原路径安装"""
+
+
+def default_staging_dir():
+    """本地临时目录下的缓存目录（数据目录可能和安装包一样位于共享上）"""
+    return os.path.join(tempfile.gettempdir(), "flyinstaller-staging")
+
+
+def is_remote_path(path):
+    """路径是否位于网络文件系统（UNC 路径、映射的网络驱动器、CIFS/NFS 挂载）"""
+    path = os.path.abspath(path)
+    if os.name == "nt":
+        if path.startswith("\\\\"):
+            return True
+        try:
+            import ctypes
+            return ctypes.windll.kernel32.GetDriveTypeW(os.path.splitdrive(path)[0] + "\\") == 4  # DRIVE_REMOTE
+        except (AttributeError, OSError):
+            return False
+    try:
+        with open("/proc/self/mountinfo", encoding="utf-8", errors="replace") as f:
+            mounts = f.read().splitlines()
+    except OSError:
+        return False
+    path = os.path.realpath(path)
+    best, fstype = "", None
+    for line in mounts:
+        left, _, right = line.partition(" - ")
+        fields = left.split()
+        if len(fields) < 5 or not right:
+            continue
+        mount_point = fields[4].replace("\\040", " ")
+        if (path == mount_point or path.startswith(mount_point.rstrip("/") + "/")) and len(mount_point) > len(best):
+            best, fstype = mount_point, right.split()[0]
+    return fstype in REMOTE_FS_TYPES
+
+
+def external_files(file_path, names):
+    """names（安装包所在目录的文件名）中可能被该安装包引用的外部数据文件，有这些文件时不预取
+
+    - 与安装包同名的数据文件（如 app.msi 旁的 app.cab、app.mst，tool.exe 旁的 tool.ini）；
+    - MSI 的外置 CAB（名称由 Media 表决定，与安装包无关，同目录的 .cab 都算）；
+    - setup.exe 等引导程序同目录的全部数据文件。
+    共享目录中与安装包无关的 .ini、.xml、.dll 等不影响其他安装包预取。
+    """
+    base = os.path.basename(file_path)
+    stem, suffix = os.path.splitext(base.lower())
+    bootstrapper = suffix == ".exe" and stem in BOOTSTRAPPER_NAMES
+    found = []
+    for name in names:
+        lowered = name.lower()
+        if lowered == base.lower() or not lowered.endswith(SIDECAR_SUFFIXES):
+            continue
+        if bootstrapper or os.path.splitext(lowered)[0] == stem or (suffix == ".msi" and lowered.endswith(".cab")):
+            found.append(name)
+    return sorted(found)
+
+
+def _entry_key(source, stat):
+    identity = f"{os.path.abspath(source)}|{stat.st_size}|{stat.st_mtime_ns}"
+    return hashlib.sha1(identity.encode("utf-8")).hexdigest()[:16]
+
+
+class StagingCache:
+    """本地安装包缓存（线程安全）"""
+
+    def __init__(self, root, budget=DEFAULT_BUDGET, block_size=COPY_BLOCK):
+        self.root = root
+        self.budget = budget
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._pins = {}
+        self._reserved = 0
+        os.makedirs(root, exist_ok=True)
+        self.load()
+        self._remove_orphans()
+
+    @property
+    def index_path(self):
+        return os.path.join(self.root, "index.json")
+
+    def load(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != INDEX_VERSION:
+            return
+        for key, entry in data.get("entries", {}).items():
+            try:
+                if os.path.getsize(entry["path"]) == entry["size"]:
+                    self._entries[key] = entry
+            except (OSError, KeyError, TypeError):
+                continue
+
+    def save(self):
+        """原子写入索引（调用方持有锁）"""
+        payload = json.dumps({"version": INDEX_VERSION, "entries": self._entries},
+                             ensure_ascii=False, separators=(",", ":"))
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(payload)
+        os.replace(tmp_path, self.index_path)
+
+    def _remove_orphans(self):
+        """删除索引中没有的目录（上次复制到一半时崩溃留下的）"""
+        known = {key for key in self._entries}
+        for name in os.listdir(self.root):
+            full = os.path.join(self.root, name)
+            if os.path.isdir(full) and name not in known:
+                shutil.rmtree(full, ignore_errors=True)
+
+    @property
+    def used_bytes(self):
+        with self._lock:
+            return sum(entry["size"] for entry in self._entries.values()) + self._reserved
+
+    def stage(self, source, cancel_event=None):
+        """把 source 复制到缓存并锁定，返回 (本地路径, SHA-256)；已缓存时直接返回"""
+        stat = os.stat(source)
+        key = _entry_key(source, stat)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and os.path.exists(entry["path"]):
+                entry["used"] = time.time()
+                self._pins[key] = self._pins.get(key, 0) + 1
+                return entry["path"], entry["sha256"]
+            self._reserve(stat.st_size)
+        try:
+            local_path, digest = self._copy(source, key, stat, cancel_event)
+        except BaseException:
+            with self._lock:
+                self._reserved -= stat.st_size
+            shutil.rmtree(os.path.join(self.root, key), ignore_errors=True)
+            raise
+        with self._lock:
+            self._reserved -= stat.st_size
+            self._entries[key] = {"path": local_path, "source": os.path.abspath(source), "size": stat.st_size,
+                                  "sha256": digest, "used": time.time()}
+            self._pins[key] = self._pins.get(key, 0) + 1
+            self.save()
+        return local_path, digest
+
+    def release(self, local_path):
+        """安装结束，副本可以被淘汰"""
+        key = os.path.basename(os.path.dirname(local_path))
+        with self._lock:
+            count = self._pins.get(key, 0) - 1
+            if count > 0:
+                self._pins[key] = count
+            else:
+                self._pins.pop(key, None)
+
+    def _reserve(self, size):
+        """按 LRU 淘汰未锁定的副本，直到能放下 size 字节（调用方持有锁）"""
+        if size > self.budget:
+            raise StagingError(f"安装包大小超过缓存预算（{self.budget // (1024 * 1024)} MB）")
+        used = sum(entry["size"] for entry in self._entries.values()) + self._reserved
+        evictable = sorted((entry["used"], key) for key, entry in self._entries.items() if key not in self._pins)
+        while used + size > self.budget and evictable:
+            _, key = evictable.pop(0)
+            entry = self._entries.pop(key)
+            shutil.rmtree(os.path.join(self.root, key), ignore_errors=True)
+            used -= entry["size"]
+        if used + size > self.budget:
+            raise StagingError("缓存预算已被等待安装的副本占满")
+        self._reserved += size
+        self.save()
+
+    def _copy(self, source, key, stat, cancel_event):
+        """大块顺序复制并校验：大小一致、本地副本的哈希与读取源文件时计算的一致"""
+        folder = os.path.join(self.root, key)
+        os.makedirs(folder, exist_ok=True)
+        # 保留原文件名（部分安装程序会检查自身文件名）
+        local_path = os.path.join(folder, os.path.basename(source))
+        tmp_path = local_path + ".part"
+        source_hash = hashlib.sha256()
+        with open(source, "rb", buffering=0) as src, open(tmp_path, "wb") as dst:
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise StagingError("已取消")
+                block = src.read(self.block_size)
+                if not block:
+                    break
+                source_hash.update(block)
+                dst.write(block)
+        if os.path.getsize(tmp_path) != stat.st_size or os.stat(source).st_mtime_ns != stat.st_mtime_ns:
+            raise StagingError("复制过程中源文件发生变化")
+        local_hash = hashlib.sha256()
+        with open(tmp_path, "rb", buffering=0) as f:
+            for block in iter(lambda: f.read(self.block_size), b""):
+                local_hash.update(block)
+        if local_hash.hexdigest() != source_hash.hexdigest():
+            raise StagingError("本地副本校验失败")
+        shutil.copymode(source, tmp_path)
+        os.replace(tmp_path, local_path)
+        return local_path, source_hash.hexdigest()
+
+
+class Stager:
+    """批次内的预取流水线（在安装事件循环中使用）
+
+    schedule(files) 设置本批次的安装顺序；acquire(file_path) 返回可以用来安装的路径
+    （本地副本，无法预取时为原路径），同时开始复制其后 depth 个安装包；安装结束后调用 release(file_path)。
+    on_staged(file_path, local_path, sha256) 在每个副本就绪后调用，可用于复用已算出的哈希。
+    """
+
+    def __init__(self, cache, depth=DEFAULT_DEPTH, log=None, cancel_event=None, on_staged=None):
+        self.cache = cache
+        self.depth = max(0, int(depth))
+        self.log = log or (lambda message: None)
+        self.cancel_event = cancel_event
+        self.on_staged = on_staged
+        self.order = []
+        self.position = {}
+        # 目录 → 列出文件名的 Future（每批每个目录只列一次）
+        self._listings = {}
+        self._jobs = {}
+        self._local = {}
+        self._copy_slot = None
+
+    def schedule(self, files):
+        self.order = list(files)
+        self.position = {file_path: index for index, file_path in enumerate(self.order)}
+        self._listings = {}
+
+    async def _listing(self, folder):
+        """目录中的文件名（在线程池中读取共享目录，不阻塞事件循环）"""
+        listing = self._listings.get(folder)
+        if listing is None:
+            listing = self._listings[folder] = asyncio.get_running_loop().run_in_executor(None, os.listdir, folder)
+        return await asyncio.shield(listing)
+
+    async def acquire(self, file_path):
+        index = self.position.get(file_path)
+        if index is None:
+            return file_path
+        if self._copy_slot is None:
+            self._copy_slot = asyncio.Semaphore(1)
+        for upcoming in self.order[index:index + self.depth + 1]:
+            self._start(upcoming)
+        local_path = await asyncio.shield(self._jobs[file_path])
+        return local_path or file_path
+
+    def _start(self, file_path):
+        if file_path not in self._jobs:
+            self._jobs[file_path] = asyncio.ensure_future(self._stage(file_path))
+
+    async def _stage(self, file_path):
+        try:
+            names = await self._listing(os.path.dirname(os.path.abspath(file_path)))
+        except OSError as e:
+            self.log(f"⚠️ 无法读取安装包所在目录，直接从原路径安装：{os.path.basename(file_path)}（{str(e)}）")
+            return None
+        sidecars = external_files(file_path, names)
+        if sidecars:
+            shown = "、".join(sidecars[:3]) + (f" 等 {len(sidecars)} 个文件" if len(sidecars) > 3 else "")
+            self.log(f"ℹ️ 不预取 {os.path.basename(file_path)}：安装时可能读取同目录的 {shown}，直接从原路径安装")
+            return None
+        async with self._copy_slot:
+            if self.cancel_event is not None and self.cancel_event.is_set():
+                return None
+            loop = asyncio.get_running_loop()
+            start = time.perf_counter()
+            copy = loop.run_in_executor(None, self.cache.stage, file_path, self.cancel_event)
+            try:
+                local_path, digest = await asyncio.shield(copy)
+            except asyncio.CancelledError:
+                # 批次已结束，复制仍在线程池中进行：完成后解除锁定
+                copy.add_done_callback(self._release_abandoned)
+                raise
+            except OSError as e:
+                self.log(f"⚠️ 预取失败，直接从原路径安装：{os.path.basename(file_path)}（{str(e)}）")
+                return None
+        self._local[file_path] = local_path
+        elapsed = time.perf_counter() - start
+        if elapsed > 0.05:
+            size_mb = os.path.getsize(local_path) / (1024 * 1024)
+            self.log(f"📥 已预取到本地：{os.path.basename(file_path)}（{size_mb:.1f} MB，{elapsed:.1f} 秒）")
+        if self.on_staged is not None:
+            self.on_staged(file_path, local_path, digest)
+        return local_path
+
+    def _release_abandoned(self, copy):
+        if not copy.cancelled() and copy.exception() is None:
+            self.cache.release(copy.result()[0])
+
+    def release(self, file_path):
+        local_path = self._local.pop(file_path, None)
+        if local_path is not None:
+            self.cache.release(local_path)
+
+    def close(self):
+        """批次结束：释放所有副本（未开始的复制不再进行）"""
+        for job in self._jobs.values():
+            job.cancel()
+        self._jobs = {}
+        for file_path in list(self._local):
+            self.release(file_path)
+
+
+def create_stager(package_dir, mode="auto", depth=DEFAULT_DEPTH, budget=DEFAULT_BUDGET, root=None,
+                  log=None, cancel_event=None):
+    """按配置创建 Stager；mode 为 auto（安装包文件夹在网络共享上时启用）/ on / off，不启用时返回 None"""
+    if mode == "off" or (mode == "auto" and not is_remote_path(package_dir)):
+        return None
+    log = log or (lambda message: None)
+    try:
+        cache = StagingCache(root or default_staging_dir(), budget=budget)
+    except OSError as e:
+        log(f"⚠️ 本地预取缓存不可用，直接从原路径安装：{str(e)}")
+        return None
+
+    log(f"📥 已启用本地预取（提前复制 {depth} 个安装包，缓存上限 {budget // (1024 * 1024)} MB）")
+    return Stager(cache, depth=depth, log=log, cancel_event=cancel_event)
@@ -0,0 +1,149 @@
+"""已验证静默参数的持久化缓存（按安装包内容哈希索引）
+
+缓存文件为紧凑的 JSON 索引：
+- files：路径 → (大小, 修改时间, 哈希)，大小与修改时间未变时直接复用哈希，不再读取文件；
+- switches：内容哈希 → 成功的命令模板与返回码。
+
+命令模板中安装包路径记为 ``{file}``、目标目录记为 ``{target}``，换机器、换目录后仍可复用。
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from .bundles import open_package, package_stat
+# 版本 2：命令改为不经过 shell 执行，旧版本中带引号的 MSI 模板不再可用
+CACHE_VERSION = 2
+HASH_CHUNK_SIZE = 4 * 1024 * 1024
+# 预取副本与压缩包解压目录（见 staging.default_staging_dir、bundles.BundleExtractor）：其中的文件安装后即删除
+TEMPORARY_DIRS = ("flyinstaller-staging", "flyinstaller-bundle-")
+
+
+def hash_file(file_path, chunk_size=HASH_CHUNK_SIZE):
+    """分块流式计算 SHA-256（压缩包中的安装包边解压边计算）"""
+    digest = hashlib.sha256()
+    with open_package(file_path) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_template(cmd, file_path, target_path):
+    """把实际命令转换为与路径无关的模板"""
+    abs_path = os.path.abspath(file_path)
+    template = []
+    for arg in cmd:
+        arg = arg.replace(abs_path, "{file}")
+        if abs_path != file_path:
+            arg = arg.replace(file_path, "{file}")
+        if target_path:
+            arg = arg.replace(target_path, "{target}")
+        template.append(arg)
+    return template
+
+
+def expand_template(template, file_path, target_path):
+    """用当前安装包路径与目标目录展开命令模板"""
+    abs_path = os.path.abspath(file_path)
+    return [arg.replace("{file}", abs_path).replace("{target}", target_path or "") for arg in template]
+
+
+def is_temporary(path):
+    """路径是否位于预取或解压用的临时目录中"""
+    return any(part.startswith(TEMPORARY_DIRS) for part in path.split(os.sep))
+
+
+class SwitchCache:
+    """安装包内容哈希 → 成功静默参数的缓存（线程安全）"""
+
+    def __init__(self, cache_path):
+        self.cache_path = cache_path
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._files = {}
+        # 预取副本、解压出的临时文件：只在内存中记录哈希，安装后即删除，不写入缓存文件
+        self._temporary = {}
+        self._switches = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != CACHE_VERSION:
+            return
+        # 旧版本会把预取副本的哈希也写入文件，这些路径不会再出现
+        self._files = {key: value for key, value in data.get("files", {}).items() if not is_temporary(key)}
+        self._switches = data.get("switches", {})
+
+    def save(self):
+        """原子写入（先写临时文件再替换）"""
+        with self._save_lock:
+            with self._lock:
+                data = {"version": CACHE_VERSION, "files": self._files, "switches": self._switches}
+                payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+            tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp_path, self.cache_path)
+
+    def content_hash(self, file_path):
+        """安装包内容哈希；大小与修改时间未变时直接使用记录值"""
+        key = os.path.abspath(file_path)
+        stat = package_stat(key)
+        with self._lock:
+            known = self._files.get(key) or self._temporary.get(key)
+        if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+            return known[2]
+        digest = hash_file(key)
+        with self._lock:
+            (self._temporary if is_temporary(key) else self._files)[key] = [stat.st_size, stat.st_mtime_ns, digest]
+        return digest
+
+    def note_hash(self, file_path, digest, temporary=False):
+        """记录已在别处算出的哈希（如预取复制时），之后不再重新读取文件；temporary 时只保存在内存中"""
+        key = os.path.abspath(file_path)
+        stat = package_stat(key)
+        with self._lock:
+            (self._temporary if temporary else self._files)[key] = [stat.st_size, stat.st_mtime_ns, digest]
+
+    def lookup(self, file_path):
+        """返回缓存的 {"cmd": 模板, "returncode": 返回码}，没有记录时返回 None"""
+        try:
+            digest = self.content_hash(file_path)
+        except OSError:
+            return None
+        with self._lock:
+            return self._switches.get(digest)
+
+    def remember(self, file_path, cmd, target_path, returncode):
+        """记录成功的命令"""
+        try:
+            digest = self.content_hash(file_path)
+        except OSError:
+            return
+        with self._lock:
+            self._switches[digest] = {
+                "cmd": make_template(cmd, file_path, target_path),
+                "returncode": returncode,
+                "name": os.path.basename(file_path),
+                "updated": int(time.time()),
+            }
+        self.save()
+
+    def forget(self, file_path):
+        """缓存的命令失效时删除记录"""
+        try:
+            digest = self.content_hash(file_path)
+        except OSError:
+            return
+        with self._lock:
+            removed = self._switches.pop(digest, None)
+        if removed is not None:
+            self.save()
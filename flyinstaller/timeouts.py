@@ -0,0 +1,139 @@
+"""自适应超时与挂起检测
+
+固定 300 秒超时对两类安装包都不合适：隐藏对话框卡住的小安装包白等 5 分钟，
+正常需要 20 分钟的大型套件却被提前结束再换参数重试。这里分两部分处理：
+
+- RuntimeHistory：记录每个安装包（文件名 + 大小）以往成功安装的耗时，
+  样本足够时超时取 p95 × 余量，否则使用默认超时；
+- idle_watch：定期采样进程树的 CPU 时间和 I/O 字节数，连续 idle_window 秒没有变化即判定挂起。
+"""
+import asyncio
+import json
+import math
+import os
+import subprocess
+import threading
+import time
+
+from .bundles import package_stat
+from .proctree import tree_activity
+
+# 耗时记录文件格式版本
+HISTORY_VERSION = 1
+
+# 使用历史耗时所需的最少样本数
+MIN_SAMPLES = 3
+# 每个安装包保留的样本数
+MAX_SAMPLES = 20
+# 超时 = p95 × 余量，并限制在 [MIN_TIMEOUT, MAX_TIMEOUT] 之间（秒）
+TIMEOUT_MARGIN = 3.0
+MIN_TIMEOUT = 120
+MAX_TIMEOUT = 4 * 3600
+
+# 挂起检测：默认空闲窗口与采样间隔（秒）
+DEFAULT_IDLE_WINDOW = 180
+SAMPLE_INTERVAL = 5.0
+# 两次采样之间 CPU 时间增量低于该值视为空闲（秒）
+CPU_EPSILON = 0.02
+
+
+class InstallHung(subprocess.TimeoutExpired):
+    """进程树在空闲窗口内没有任何 CPU/I/O 活动（按超时处理：结束进程树，换下一个参数）"""
+
+    def __init__(self, cmd, idle_window):
+        super().__init__(cmd, idle_window)
+        self.idle_window = idle_window
+
+    def __str__(self):
+        return f"进程树 {self.idle_window:g} 秒内无 CPU/磁盘活动，判定为挂起"
+
+
+def percentile(samples, fraction):
+    """最近秩法分位数"""
+    ordered = sorted(samples)
+    index = min(len(ordered), max(1, math.ceil(fraction * len(ordered)))) - 1
+    return ordered[index]
+
+
+def runtime_key(file_path):
+    """历史耗时的键：文件名（不区分大小写）+ 文件大小，与所在文件夹无关"""
+    return f"{os.path.basename(file_path).lower()}|{package_stat(file_path).st_size}"
+
+
+class RuntimeHistory:
+    """各安装包成功安装的耗时记录（线程安全，JSON 文件）"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._packages = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != HISTORY_VERSION:
+            return
+        self._packages = data.get("packages", {})
+
+    def save(self):
+        """原子写入（先写临时文件再替换）"""
+        with self._save_lock:
+            with self._lock:
+                payload = json.dumps({"version": HISTORY_VERSION, "packages": self._packages},
+                                     ensure_ascii=False, separators=(",", ":"))
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp_path, self.path)
+
+    def samples(self, file_path):
+        try:
+            key = runtime_key(file_path)
+        except OSError:
+            return []
+        with self._lock:
+            return list(self._packages.get(key, ()))
+
+    def deadline(self, file_path, default):
+        """该安装包单次尝试的超时：样本足够时为 p95 × 余量，否则为 default"""
+        samples = self.samples(file_path)
+        if len(samples) < MIN_SAMPLES:
+            return default
+        return min(MAX_TIMEOUT, max(MIN_TIMEOUT, percentile(samples, 0.95) * TIMEOUT_MARGIN))
+
+    def record(self, file_path, seconds):
+        """记录一次成功安装的耗时并保存"""
+        try:
+            key = runtime_key(file_path)
+        except OSError:
+            return
+        with self._lock:
+            samples = self._packages.setdefault(key, [])
+            samples.append(round(seconds, 3))
+            del samples[:-MAX_SAMPLES]
+        self.save()
+
+
+async def idle_watch(pid, idle_window, interval=SAMPLE_INTERVAL):
+    """采样进程树活动量，连续 idle_window 秒无变化时返回；无法采样时一直等待（不判定挂起）"""
+    loop = asyncio.get_running_loop()
+    interval = min(interval, idle_window / 3)
+    last = None
+    last_active = time.monotonic()
+    while True:
+        await asyncio.sleep(interval)
+        sample = await loop.run_in_executor(None, tree_activity, pid)
+        now = time.monotonic()
+        if sample is None:
+            last_active = now
+            continue
+        if last is None or sample[0] - last[0] >= CPU_EPSILON or sample[1] != last[1]:
+            last_active = now
+        last = sample
+        if now - last_active >= idle_window:
+            return now - last_active
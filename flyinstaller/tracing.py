@@ -0,0 +1,191 @@
+"""轻量级耗时追踪：记录扫描、每次参数尝试、管理员检测、重试、界面刷新等阶段
+
+每个 span 结束时只做一次加锁追加，JSON 序列化和写盘都在后台线程完成，可以在生产环境常开。
+事件文件是 JSON Lines，每行已经是 Chrome trace 事件格式（ph/ts/dur/tid 等字段），
+导出为 Chrome trace / Perfetto 可直接打开的文件：
+
+    python -m flyinstaller --export-trace trace.jsonl trace.json
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from . import paths
+
+# 写盘线程单次最多合并的事件数
+WRITE_BATCH = 1024
+# 数据目录中保留的追踪文件数（每次运行一个文件）
+KEEP_TRACES = 20
+
+
+class _NullSpan:
+    """追踪关闭时使用的空 span"""
+
+    @property
+    def args(self):
+        return {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """一个计时区间；args 可在区间内补充（如返回码）"""
+    __slots__ = ("tracer", "name", "cat", "args", "start", "tid")
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.tid = self.tracer.current_tid()
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.record({
+            "ph": "X", "name": self.name, "cat": self.cat,
+            "ts": self.tracer.to_us(self.start), "dur": (end - self.start) // 1000,
+            "pid": self.tracer.pid, "tid": self.tid, "args": self.args,
+        })
+        return False
+
+
+class Tracer:
+    """span 记录器；path 为 None 时不记录任何内容"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.pid = os.getpid()
+        # perf_counter 与墙上时间的偏移，使 ts 为 Unix 微秒时间戳（多台机器的追踪可对齐）
+        self._offset_ns = time.time_ns() - time.perf_counter_ns()
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._events = deque()
+        self._tids = {}
+        self._closed = False
+        self._writer = None
+        if path:
+            self._writer = threading.Thread(target=self._write_loop, name="trace-writer", daemon=True)
+            self._writer.start()
+
+    @property
+    def enabled(self):
+        return self._writer is not None
+
+    def to_us(self, perf_ns):
+        return (perf_ns + self._offset_ns) // 1000
+
+    def current_tid(self):
+        """当前 asyncio 任务（否则为当前线程）对应的小整数 tid，首次出现时写入名称元数据"""
+        try:
+            owner = asyncio.current_task()
+        except RuntimeError:
+            owner = None
+        if owner is not None:
+            key, label = id(owner), owner.get_name()
+        else:
+            thread = threading.current_thread()
+            key, label = thread.ident, thread.name
+        tid = self._tids.get(key)
+        if tid is None:
+            with self._lock:
+                tid = self._tids.setdefault(key, len(self._tids) + 1)
+            self.record({"ph": "M", "name": "thread_name", "pid": self.pid, "tid": tid, "args": {"name": label}})
+        return tid
+
+    def span(self, name, cat="install", **args):
+        """计时区间：``with tracer.span("attempt", cmd=...) as span: ...``"""
+        if self._writer is None:
+            return _NULL_SPAN
+        return Span(self, name, cat, args)
+
+    def instant(self, name, cat="install", **args):
+        """瞬时事件"""
+        if self._writer is None:
+            return
+        self.record({"ph": "i", "s": "t", "name": name, "cat": cat, "ts": self.to_us(time.perf_counter_ns()),
+                     "pid": self.pid, "tid": self.current_tid(), "args": args})
+
+    def record(self, event):
+        if self._writer is None:
+            return
+        with self._lock:
+            self._events.append(event)
+            self._ready.notify()
+
+    def close(self, timeout=2.0):
+        """写完剩余事件后停止写盘线程"""
+        if self._writer is None:
+            return
+        with self._lock:
+            self._closed = True
+            self._ready.notify()
+        self._writer.join(timeout)
+
+    def _write_loop(self):
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                with self._lock:
+                    while not self._events and not self._closed:
+                        self._ready.wait()
+                    batch = []
+                    while self._events and len(batch) < WRITE_BATCH:
+                        batch.append(self._events.popleft())
+                    finished = self._closed and not self._events
+                if batch:
+                    f.write("".join(json.dumps(event, ensure_ascii=False, default=str) + "\n" for event in batch))
+                    f.flush()
+                if finished:
+                    return
+
+
+# 追踪关闭时使用的默认实例
+NULL_TRACER = Tracer()
+
+
+def open_tracer(base=None, keep=KEEP_TRACES):
+    """在数据目录 traces/ 下为本次运行新建追踪文件，并删除较早的文件"""
+    folder = paths.data_path("traces", base=base)
+    os.makedirs(folder, exist_ok=True)
+    old = sorted(name for name in os.listdir(folder) if name.endswith(".jsonl"))
+    for name in old[:max(0, len(old) - keep + 1)]:
+        try:
+            os.remove(os.path.join(folder, name))
+        except OSError:
+            pass
+    name = time.strftime("trace-%Y%m%d-%H%M%S") + f"-{os.getpid()}.jsonl"
+    return Tracer(os.path.join(folder, name))
+
+
+def export_chrome(jsonl_path, out_path):
+    """把 JSON Lines 事件文件导出为 Chrome trace（Perfetto 也可打开），返回事件数"""
+    events = []
+    with open(jsonl_path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                # 进程异常退出时最后一行可能不完整
+                continue
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+    return len(events)
+
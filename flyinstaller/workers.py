@@ -0,0 +1,411 @@
+"""安装工作进程池：在独立进程中启动安装程序、采集输出、检测挂起
+
+默认情况下安装程序的输出读取、解码、挂起检测都在界面进程的事件循环线程中执行，与 Tk 共用一个解释器和 GIL，
+某个环节出错或卡死会拖累整个窗口。WorkerPool 把这部分工作放到若干个工作进程中：
+
+- WorkerPool 实现 launcher 接口（见 engine.InstallEngine），同时作为 tracker（cancel()），
+  引擎、调度器、缓存、日志文件仍在主进程中，每次参数尝试交给一个空闲的工作进程执行；
+- 工作进程每 FLUSH_INTERVAL 秒把积累的输出行合并为一条消息发回，并定期发送心跳；
+- 工作进程退出（崩溃）或心跳超过 wedge_timeout 秒没有更新（卡死）时，结束它及其启动的安装进程，
+  启动新的工作进程重新执行这次尝试（连续两次失败时抛出 WorkerCrashed，引擎按这次尝试失败处理），批次继续进行。
+
+工作进程使用 spawn 方式启动（与 Windows 相同），打包为 exe 时入口需要调用 multiprocessing.freeze_support()。
+"""
+import asyncio
+import multiprocessing
+import queue
+import subprocess
+import threading
+import time
+
+from .process import AsyncLauncher
+from .proctree import CANCEL_GRACE, InstallCancelled, ProcessTracker, terminate_trees
+from .timeouts import InstallHung
+
+# 输出合并发送的间隔（秒）
+FLUSH_INTERVAL = 0.05
+# 心跳间隔与判定卡死的时间（秒）
+HEARTBEAT_INTERVAL = 1.0
+WEDGE_TIMEOUT = 30.0
+# 单条消息最多携带的输出行数（超出的部分下一条发送）
+MAX_BATCH_LINES = 500
+
+
+class WorkerLost(Exception):
+    """执行中的工作进程崩溃或卡死（内部使用，触发重试）"""
+
+
+class WorkerCrashed(OSError):
+    """同一次尝试在两个工作进程中都没有完成"""
+
+
+# --------------------------
+# 工作进程
+# --------------------------
+class _ReportingTracker(ProcessTracker):
+    """登记安装进程时把 pid 报告给主进程，工作进程崩溃后由主进程结束这些进程"""
+
+    def __init__(self, cancel_event, report, grace=CANCEL_GRACE):
+        super().__init__(cancel_event, grace=grace)
+        self.report = report
+
+    def register(self, proc):
+        super().register(proc)
+        self.report(proc.pid)
+
+
+def worker_main(serial, tasks, events, cancel_event, flush_interval, heartbeat_interval, grace=CANCEL_GRACE):
+    """工作进程入口"""
+    asyncio.run(_serve(serial, tasks, events, cancel_event, flush_interval, heartbeat_interval, grace))
+
+
+async def _serve(serial, tasks, events, cancel_event, flush_interval, heartbeat_interval, grace):
+    loop = asyncio.get_running_loop()
+    state = {"job": None}
+    buffer = []
+
+    def flush():
+        while buffer:
+            batch = buffer[:MAX_BATCH_LINES]
+            del buffer[:MAX_BATCH_LINES]
+            events.put(("output", serial, state["job"], batch))
+
+    tracker = _ReportingTracker(cancel_event, lambda pid: events.put(("started", serial, state["job"], pid)),
+                                grace=grace)
+    launcher = AsyncLauncher(tracker)
+
+    async def pump():
+        last_beat = 0.0
+        while True:
+            await asyncio.sleep(flush_interval)
+            flush()
+            now = time.monotonic()
+            if now - last_beat >= heartbeat_interval:
+                events.put(("heartbeat", serial))
+                last_beat = now
+
+    async def run_job(job, cmd, timeout, new_console, idle_window):
+        try:
+            result = await launcher(cmd, timeout, new_console=new_console,
+                                    on_output=lambda stream, line: buffer.append((stream, line)),
+                                    idle_window=idle_window)
+            reply = ("done", serial, job, result)
+        except InstallHung:
+            reply = ("failed", serial, job, "hung", None)
+        except subprocess.TimeoutExpired:
+            reply = ("failed", serial, job, "timeout", None)
+        except (InstallCancelled, asyncio.CancelledError):
+            reply = ("failed", serial, job, "cancelled", None)
+        except Exception as e:
+            reply = ("failed", serial, job, "error", f"{type(e).__name__}: {e}")
+        # 输出先于结果到达
+        flush()
+        state["job"] = None
+        events.put(reply)
+
+    pumper = loop.create_task(pump())
+    current = None
+    while True:
+        message = await loop.run_in_executor(None, tasks.get)
+        kind = message[0]
+        if kind == "stop":
+            break
+        if kind == "launch":
+            _, job, cmd, timeout, new_console, idle_window = message
+            state["job"] = job
+            current = loop.create_task(run_job(job, cmd, timeout, new_console, idle_window))
+        elif kind == "abort":
+            if current is not None and state["job"] == message[1]:
+                current.cancel()
+        elif kind == "cancel":
+            report = await loop.run_in_executor(None, tracker.cancel)
+            events.put(("cancelled", serial, report))
+    pumper.cancel()
+    if current is not None and not current.done():
+        current.cancel()
+        await asyncio.gather(current, return_exceptions=True)
+
+
+# --------------------------
+# 主进程
+# --------------------------
+class _Pid:
+    """terminate_trees 只用到 pid"""
+
+    def __init__(self, pid):
+        self.pid = pid
+
+
+class _Worker:
+    def __init__(self, serial, process, tasks):
+        self.serial = serial
+        self.process = process
+        self.tasks = tasks
+        self.job = None
+        self.last_seen = time.monotonic()
+
+
+class _Job:
+    def __init__(self, job_id, cmd, on_output, future):
+        self.job_id = job_id
+        self.cmd = cmd
+        self.on_output = on_output
+        self.future = future
+        self.pids = []
+
+
+class WorkerPool:
+    """安装工作进程池（launcher + tracker 接口）
+
+    size 为最多同时运行的工作进程数（应不小于各通道并发数之和），工作进程在需要时才启动并一直复用；
+    cancel_event 与引擎共用，新批次开始时清除即可继续使用。
+    """
+
+    def __init__(self, size=2, cancel_event=None, grace=CANCEL_GRACE, flush_interval=FLUSH_INTERVAL,
+                 heartbeat_interval=HEARTBEAT_INTERVAL, wedge_timeout=WEDGE_TIMEOUT, log=None):
+        self.size = max(1, int(size))
+        self.cancel_event = cancel_event or threading.Event()
+        self.grace = grace
+        self.flush_interval = flush_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.wedge_timeout = wedge_timeout
+        self.log = log or (lambda message: None)
+        self._context = multiprocessing.get_context("spawn")
+        # 工作进程中的 ProcessTracker 共用的取消标志
+        self._cancel = self._context.Event()
+        self._events = self._context.Queue()
+        self._cancel_replies = queue.Queue()
+        self._workers = [None] * self.size
+        self._jobs = {}
+        self._next_serial = 0
+        self._next_job = 0
+        self._waiters = []
+        self._loop = None
+        self._monitor = None
+        self._receiver = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    @property
+    def pids(self):
+        """正在运行的工作进程 pid"""
+        return [worker.process.pid for worker in self._workers if isinstance(worker, _Worker)]
+
+    def check(self):
+        if self.cancel_event.is_set():
+            raise InstallCancelled()
+
+    # ---------- 工作进程管理 ----------
+    def _spawn(self):
+        """（阻塞）启动一个工作进程"""
+        with self._lock:
+            self._next_serial += 1
+            serial = self._next_serial
+        tasks = self._context.Queue()
+        process = self._context.Process(
+            target=worker_main, name=f"install-worker-{serial}", daemon=True,
+            args=(serial, tasks, self._events, self._cancel, self.flush_interval, self.heartbeat_interval,
+                  self.grace))
+        process.start()
+        return _Worker(serial, process, tasks)
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._waiters = []
+        self._monitor = loop.create_task(self._watch())
+        if self._receiver is None:
+            self._receiver = threading.Thread(target=self._receive, name="install-worker-events", daemon=True)
+            self._receiver.start()
+
+    async def _acquire(self):
+        """占用一个空闲的工作进程（没有时启动新的，已达上限时等待）"""
+        while True:
+            for slot, worker in enumerate(self._workers):
+                if worker is None:
+                    self._workers[slot] = "starting"
+                    try:
+                        worker = await self._loop.run_in_executor(None, self._spawn)
+                    except BaseException:
+                        self._workers[slot] = None
+                        raise
+                    self._workers[slot] = worker
+                if isinstance(worker, _Worker) and worker.job is None:
+                    if not worker.process.is_alive():
+                        self._workers[slot] = None
+                        continue
+                    return worker
+            waiter = self._loop.create_future()
+            self._waiters.append(waiter)
+            await waiter
+
+    def _wake(self):
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    async def _watch(self):
+        """检查执行中的工作进程是否崩溃或卡死"""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            now = time.monotonic()
+            for worker in list(self._workers):
+                if not isinstance(worker, _Worker) or worker.job is None:
+                    continue
+                if not worker.process.is_alive():
+                    reason = f"工作进程 {worker.process.pid} 意外退出（退出码 {worker.process.exitcode}）"
+                elif now - worker.last_seen > self.wedge_timeout:
+                    reason = f"工作进程 {worker.process.pid} 超过 {self.wedge_timeout:g} 秒无响应"
+                else:
+                    continue
+                await self._replace(worker, reason)
+
+    async def _replace(self, worker, reason):
+        """结束出问题的工作进程及其启动的安装进程，空出位置给新的工作进程"""
+        slot = self._workers.index(worker)
+        self._workers[slot] = None
+        job = worker.job
+        worker.job = None
+        targets = [worker.process] + [_Pid(pid) for pid in (job.pids if job else [])]
+        await self._loop.run_in_executor(None, terminate_trees, targets, 0)
+        worker.process.join(0)
+        if job is not None:
+            self._jobs.pop(job.job_id, None)
+            if not job.future.done():
+                job.future.set_exception(WorkerLost(reason))
+        self._wake()
+
+    # ---------- 消息 ----------
+    def _receive(self):
+        """（后台线程）接收工作进程的消息，交给事件循环处理"""
+        while True:
+            message = self._events.get()
+            if message[0] == "closed":
+                return
+            if message[0] == "cancelled":
+                self._cancel_replies.put(message[2])
+                continue
+            loop = self._loop
+            if loop is not None and not loop.is_closed():
+                try:
+                    loop.call_soon_threadsafe(self._on_message, message)
+                except RuntimeError:
+                    pass
+
+    def _worker_by_serial(self, serial):
+        for worker in self._workers:
+            if isinstance(worker, _Worker) and worker.serial == serial:
+                return worker
+        return None
+
+    def _on_message(self, message):
+        kind, serial = message[0], message[1]
+        worker = self._worker_by_serial(serial)
+        if worker is None:
+            # 已被替换的工作进程残留的消息
+            return
+        worker.last_seen = time.monotonic()
+        if kind == "heartbeat":
+            return
+        job = self._jobs.get(message[2])
+        if job is None:
+            return
+        if kind == "output":
+            if job.on_output is not None:
+                for stream, line in message[3]:
+                    job.on_output(stream, line)
+        elif kind == "started":
+            job.pids.append(message[3])
+        elif kind in ("done", "failed"):
+            self._jobs.pop(job.job_id, None)
+            worker.job = None
+            if not job.future.done():
+                job.future.set_result((kind,) + tuple(message[3:]))
+            self._wake()
+
+    # ---------- launcher 接口 ----------
+    async def __call__(self, cmd, timeout, new_console=False, on_output=None, idle_window=None):
+        self.check()
+        if self._cancel.is_set():
+            # 上一批次取消后的新批次
+            self._cancel.clear()
+        self._bind_loop()
+        for attempt in range(2):
+            worker = await self._acquire()
+            try:
+                return await self._launch(worker, list(cmd), timeout, new_console, on_output, idle_window)
+            except WorkerLost as e:
+                self.check()
+                if attempt:
+                    raise WorkerCrashed(f"{e}，重新执行后仍未完成")
+                self.log(f"⚠️ {e}，已结束该进程，在新的工作进程中重新执行")
+
+    async def _launch(self, worker, cmd, timeout, new_console, on_output, idle_window):
+        self._next_job += 1
+        job = _Job(self._next_job, cmd, on_output, self._loop.create_future())
+        self._jobs[job.job_id] = job
+        worker.job = job
+        worker.last_seen = time.monotonic()
+        worker.tasks.put(("launch", job.job_id, cmd, timeout, new_console, idle_window))
+        try:
+            reply = await job.future
+        except asyncio.CancelledError:
+            # 由工作进程结束安装进程树，结束后回复 failed 并释放该工作进程
+            worker.tasks.put(("abort", job.job_id))
+            raise
+        if reply[0] == "done":
+            return tuple(reply[1])
+        _, reason, detail = reply
+        if reason == "hung":
+            raise InstallHung(cmd, idle_window)
+        if reason == "timeout":
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        if reason == "cancelled":
+            raise InstallCancelled()
+        raise OSError(detail)
+
+    # ---------- tracker 接口 ----------
+    def cancel(self):
+        """（阻塞）设置取消标志，让所有工作进程结束正在运行的安装进程树，返回 (结束的进程数, 耗时秒)"""
+        start = time.perf_counter()
+        self.cancel_event.set()
+        self._cancel.set()
+        workers = [worker for worker in self._workers if isinstance(worker, _Worker) and worker.process.is_alive()]
+        for worker in workers:
+            worker.tasks.put(("cancel",))
+        count = 0
+        deadline = time.monotonic() + self.grace + 2.0
+        for _ in workers:
+            try:
+                killed, _ = self._cancel_replies.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            count += killed
+        return count, time.perf_counter() - start
+
+    def close(self, timeout=2.0):
+        """停止全部工作进程"""
+        if self._closed:
+            return
+        self._closed = True
+        workers = [worker for worker in self._workers if isinstance(worker, _Worker)]
+        for worker in workers:
+            worker.tasks.put(("stop",))
+        deadline = time.monotonic() + timeout
+        for worker in workers:
+            worker.process.join(max(0.0, deadline - time.monotonic()))
+            if worker.process.is_alive():
+                worker.process.terminate()
+        self._workers = [None] * self.size
+        if self._receiver is not None:
+            self._events.put(("closed",))
+            self._receiver.join(timeout)
+        if self._monitor is not None and self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._monitor.cancel)
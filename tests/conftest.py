@@ -0,0 +1,7 @@
+"""测试从仓库根目录导入 flyinstaller（与 benchmarks 相同，不需要安装）"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
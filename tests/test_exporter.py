@@ -0,0 +1,96 @@
+import urllib.error
+import urllib.request
+
+import pytest
+
+from flyinstaller.engine import InstallOutcome
+from flyinstaller.exporter import BatchStats, MetricsExporter, CONTENT_TYPE, address_from_env, render
+
+
+def outcome(file_path, status, duration):
+    result = InstallOutcome(file_path)
+    result.status = status
+    result.duration = duration
+    return result
+
+
+def sample_lines(text):
+    """{指标行（不含值）: 值}，跳过 HELP/TYPE 注释"""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, _, value = line.rpartition(" ")
+            samples[name] = float(value)
+    return samples
+
+
+def test_render_counts_a_batch():
+    stats = BatchStats()
+    stats.begin(["a.exe", "b.exe", "c\"d.msi"])
+    stats.start("a.exe")
+    stats.attempt()
+    stats.attempt()
+    stats.timed_out()
+    stats.finish(outcome("a.exe", "succeeded", 1.5))
+    stats.start("b.exe")
+    stats.attempt()
+    stats.finish(outcome("b.exe", "failed", 2.0))
+    stats.start("c\"d.msi")
+
+    samples = sample_lines(render(stats.snapshot, backlog=lambda: 7))
+    assert samples["flyinstaller_packages_succeeded_total"] == 1
+    assert samples["flyinstaller_packages_failed_total"] == 1
+    assert samples["flyinstaller_packages_pending"] == 0
+    assert samples["flyinstaller_packages_running"] == 1
+    assert samples["flyinstaller_attempts_total"] == 3
+    assert samples["flyinstaller_timeouts_total"] == 1
+    assert samples["flyinstaller_install_seconds_total"] == 3.5
+    assert samples["flyinstaller_log_backlog"] == 7
+    assert 'flyinstaller_current_package{package="c\\"d.msi"}' in samples
+
+    # 计数器跨批次累计，pending/running 每批重新开始
+    stats.begin(["e.exe"])
+    samples = sample_lines(render(stats.snapshot))
+    assert samples["flyinstaller_packages_succeeded_total"] == 1
+    assert samples["flyinstaller_packages_pending"] == 1
+    assert samples["flyinstaller_packages_running"] == 0
+    assert "flyinstaller_log_backlog" not in samples
+
+
+def test_http_endpoint_on_localhost():
+    stats = BatchStats()
+    stats.begin(["a.exe", "b.exe"])
+    exporter = MetricsExporter(stats, 0, backlog=lambda: 0).start()
+    try:
+        assert exporter.port != 0
+        url = f"http://127.0.0.1:{exporter.port}"
+        with urllib.request.urlopen(url + "/metrics", timeout=5) as response:
+            assert response.status == 200
+            assert response.headers["Content-Type"] == CONTENT_TYPE
+            assert sample_lines(response.read().decode("utf-8"))["flyinstaller_packages_pending"] == 2
+
+        # 导出的是最新的 snapshot
+        stats.start("a.exe")
+        stats.finish(outcome("a.exe", "succeeded", 0.25))
+        with urllib.request.urlopen(url + "/metrics?x=1", timeout=5) as response:
+            samples = sample_lines(response.read().decode("utf-8"))
+        assert samples["flyinstaller_packages_succeeded_total"] == 1
+        assert samples["flyinstaller_packages_pending"] == 1
+
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(url + "/other", timeout=5)
+        assert error.value.code == 404
+    finally:
+        exporter.close()
+
+
+def test_address_from_env(monkeypatch):
+    monkeypatch.delenv("FLYINSTALLER_METRICS_HOST", raising=False)
+    monkeypatch.delenv("FLYINSTALLER_METRICS_PORT", raising=False)
+    assert address_from_env() is None
+    monkeypatch.setenv("FLYINSTALLER_METRICS_PORT", "9100")
+    assert address_from_env() == ("127.0.0.1", 9100)
+    monkeypatch.setenv("FLYINSTALLER_METRICS_HOST", "0.0.0.0")
+    assert address_from_env() == ("0.0.0.0", 9100)
+    monkeypatch.setenv("FLYINSTALLER_METRICS_PORT", "off")
+    assert address_from_env() is None
@@ -0,0 +1,142 @@
+import asyncio
+import socket
+
+from flyinstaller.engine import InstallEngine
+from flyinstaller.fleet import FleetAgent, FleetController, parse_address
+from flyinstaller.install_state import InstallState
+
+
+class StubInstallers:
+    """假安装程序：每次启动等待片刻后返回 0，统计整个机群同时运行的安装程序数"""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.running = 0
+        self.peak = 0
+        self.commands = []
+
+    async def __call__(self, cmd, timeout, new_console=False, on_output=None, idle_window=None):
+        self.commands.append(cmd)
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.running -= 1
+        return 0, b"", b""
+
+
+def make_packages(tmp_path, count):
+    folder = tmp_path / "share"
+    folder.mkdir()
+    files = []
+    for index in range(count):
+        package = folder / f"app{index}.exe"
+        package.write_bytes(b"MZ" + bytes([index]) * 62)
+        files.append(str(package))
+    return str(folder), files
+
+
+def agent_factory(installers, state_path):
+    def make_engine(plan, cancel_event):
+        return InstallEngine(plan.get("target"), launcher=installers, cancel_event=cancel_event,
+                             admin_check=lambda: True, fingerprint=False, idle_window=None,
+                             install_state=InstallState(state_path))
+    return make_engine
+
+
+async def start_agents(installers, tmp_path, count, token=None):
+    agents = []
+    for index in range(count):
+        agent = FleetAgent(agent_factory(installers, str(tmp_path / f"state{index}.json")), token=token)
+        await agent.start("127.0.0.1", 0)
+        agents.append(agent)
+    return agents
+
+
+def test_two_agents_share_fleet_concurrency(tmp_path):
+    packages_dir, files = make_packages(tmp_path, 4)
+    installers = StubInstallers()
+    reported = []
+
+    async def main():
+        agents = await start_agents(installers, tmp_path, 2, token="secret")
+        addresses = [f"127.0.0.1:{agent.port}" for agent in agents]
+        try:
+            first = await FleetController(addresses, files, "D:\\Apps", packages_dir=packages_dir,
+                                          concurrency=3, token="secret", lanes={"exe": 4},
+                                          on_result=lambda agent, outcome: reported.append(agent)).run()
+            # 再次推送同一计划：各代理端按本机的安装状态跳过未变化的安装包
+            second = await FleetController(addresses, files, "D:\\Apps", token="secret").run()
+        finally:
+            for agent in agents:
+                agent.close()
+        return addresses, first, second
+
+    addresses, first, second = asyncio.run(main())
+    assert set(first) == set(addresses)
+    for agent in addresses:
+        assert {path: outcome["status"] for path, outcome in first[agent].items()} == \
+            {path: "succeeded" for path in files}
+        assert {path: outcome["status"] for path, outcome in second[agent].items()} == \
+            {path: "unchanged" for path in files}
+    assert len(installers.commands) == 2 * len(files)
+    # 每台机器可同时安装 4 个，整个机群不超过 3 个
+    assert installers.peak == 3
+    assert sorted(reported) == sorted(addresses * len(files))
+
+
+def test_wrong_token_and_unreachable_agent_are_lost(tmp_path):
+    _, files = make_packages(tmp_path, 2)
+    installers = StubInstallers(delay=0)
+    # 取一个当前没有监听的端口
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        closed_port = probe.getsockname()[1]
+
+    async def main():
+        agents = await start_agents(installers, tmp_path, 1, token="secret")
+        addresses = [f"127.0.0.1:{agents[0].port}", f"127.0.0.1:{closed_port}"]
+        try:
+            return addresses, await FleetController(addresses, files, "D:\\Apps", token="wrong").run()
+        finally:
+            agents[0].close()
+
+    addresses, results = asyncio.run(main())
+    for agent in addresses:
+        assert {outcome["status"] for outcome in results[agent].values()} == {"lost"}
+    assert installers.commands == []
+
+
+def test_parse_address():
+    assert parse_address("pc01:9500") == ("pc01", 9500)
+    assert parse_address("pc01") == ("pc01", 9470)
+    assert parse_address("9500") == ("127.0.0.1", 9500)
+    assert parse_address("[::1]:9500") == ("::1", 9500)
+
+
+def test_agent_reports_failed_plan(tmp_path):
+    _, files = make_packages(tmp_path, 2)
+    installers = StubInstallers(delay=0)
+    agent_log = []
+    controller_log = []
+
+    async def main():
+        agent = FleetAgent(agent_factory(installers, str(tmp_path / "state.json")), log=agent_log.append)
+        await agent.start("127.0.0.1", 0)
+        address = f"127.0.0.1:{agent.port}"
+        try:
+            # 并发数无法解析：代理端回报错误，之后仍可执行新的计划
+            failed = await FleetController([address], files, "D:\\Apps", lanes={"exe": "x"},
+                                           log=controller_log.append).run()
+            retried = await FleetController([address], files, "D:\\Apps").run()
+        finally:
+            agent.close()
+        return address, failed, retried
+
+    address, failed, retried = asyncio.run(main())
+    assert {outcome["status"] for outcome in failed[address].values()} == {"lost"}
+    assert any(line.startswith(f"❌ [{address}] 代理端执行安装计划失败：ValueError") for line in controller_log)
+    assert any(line.startswith("❌ 执行") and "ValueError" in line for line in agent_log)
+    assert {outcome["status"] for outcome in retried[address].values()} == {"succeeded"}
+    assert len(installers.commands) == len(files)
@@ -0,0 +1,79 @@
+import json
+import os
+import zipfile
+
+from flyinstaller.bundles import list_bundle
+from flyinstaller.install_state import InstallState, NEW, CHANGED, UNCHANGED, STATE_VERSION
+
+TARGET = "D:\\Apps"
+
+
+def write(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return str(path)
+
+
+def test_plan_classifies_new_changed_unchanged(tmp_path):
+    same = write(tmp_path / "pk" / "same.exe", b"same")
+    touched = write(tmp_path / "pk" / "touched.exe", b"touched")
+    edited = write(tmp_path / "pk" / "edited.exe", b"edited")
+    fresh = write(tmp_path / "pk" / "fresh.exe", b"fresh")
+    state = InstallState(str(tmp_path / "state.json"))
+    for file_path in (same, touched, edited):
+        state.record(file_path, TARGET)
+
+    # 只改修改时间（内容不变）、内容改变但大小不变
+    stat = os.stat(touched)
+    os.utime(touched, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+    stat = os.stat(edited)
+    with open(edited, "wb") as f:
+        f.write(b"EDITED")
+    os.utime(edited, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+
+    files = [same, touched, edited, fresh]
+    pending, kinds = state.plan(files, TARGET)
+    assert kinds == {same: UNCHANGED, touched: UNCHANGED, edited: CHANGED, fresh: NEW}
+    assert pending == [edited, fresh]
+    pending, _ = state.plan(files, TARGET, force=True)
+    assert pending == files
+    # 同一安装包安装到其他目录视为新安装
+    _, kinds = state.plan([same], "E:\\Apps")
+    assert kinds == {same: NEW}
+
+
+def test_same_name_in_different_folders(tmp_path):
+    first = write(tmp_path / "a" / "setup.exe", b"vendor a")
+    second = write(tmp_path / "b" / "setup.exe", b"vendor b")
+    state = InstallState(str(tmp_path / "state.json"))
+    state.record(first, TARGET)
+    pending, kinds = state.plan([first, second], TARGET)
+    assert kinds == {first: UNCHANGED, second: NEW}
+    assert pending == [second]
+
+
+def test_same_name_in_different_bundles(tmp_path):
+    members = []
+    for name in ("a.zip", "b.zip"):
+        archive = str(tmp_path / name)
+        with zipfile.ZipFile(archive, "w") as bundle:
+            bundle.writestr("app/setup.exe", name)
+        members += list_bundle(archive)
+    state = InstallState(str(tmp_path / "state.json"))
+    state.record(members[0], TARGET)
+    _, kinds = state.plan(members, TARGET)
+    assert kinds == {members[0]: UNCHANGED, members[1]: NEW}
+
+
+def test_state_persists_and_ignores_old_versions(tmp_path):
+    package = write(tmp_path / "pk" / "app.msi", b"msi")
+    path = str(tmp_path / "state.json")
+    InstallState(path).record(package, TARGET)
+    assert InstallState(path).classify(package, TARGET) == UNCHANGED
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    data["version"] = STATE_VERSION - 1
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    assert InstallState(path).classify(package, TARGET) == NEW
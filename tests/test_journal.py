@@ -0,0 +1,88 @@
+import asyncio
+
+from flyinstaller.engine import InstallEngine
+from flyinstaller.journal import open_batch, read_journal
+
+FILES = ["a.exe", "b.exe", "c.msi"]
+
+
+def test_resume_after_crash(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal, resume = open_batch(path, FILES, "D:\\Apps")
+    assert resume is None
+    journal.attempt("a.exe", 1)
+    journal.finish("a.exe", "succeeded")
+    journal.attempt("b.exe", 1)
+    journal.attempt("b.exe", 2)
+    # 模拟崩溃：不调用 complete()，最后一行只写了一半
+    journal.close()
+    with open(path, "ab") as f:
+        f.write(b'{"i":1,"s":"succ')
+
+    journal, resume = open_batch(path, list(reversed(FILES)), "D:\\Apps")
+    try:
+        assert resume is not None and resume.interrupted
+        assert resume.statuses == {"a.exe": "succeeded"}
+        assert resume.attempts == {"a.exe": 1, "b.exe": 2}
+        assert resume.remaining() == ["b.exe", "c.msi"]
+        assert resume.status("b.exe") == "running"
+        assert resume.status("c.msi") == "queued"
+    finally:
+        journal.close()
+    # 续装的批次重新写入时保留上次的进度，再次中断仍可续装
+    state = read_journal(path)
+    assert state.statuses == {"a.exe": "succeeded"}
+    assert state.attempts == {"a.exe": 1, "b.exe": 2}
+
+
+def test_completed_or_different_batch_starts_fresh(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal, _ = open_batch(path, FILES, "D:\\Apps")
+    journal.finish("a.exe", "failed")
+    journal.complete()
+    state = read_journal(path)
+    assert state.complete and state.statuses == {"a.exe": "failed"}
+
+    journal, resume = open_batch(path, FILES, "D:\\Apps")
+    assert resume is None
+    journal.finish("a.exe", "succeeded")
+    journal.close()
+
+    for files, target in ((FILES[:2], "D:\\Apps"), (FILES, "E:\\Apps")):
+        journal, resume = open_batch(path, files, target)
+        journal.close()
+        assert resume is None
+    journal, resume = open_batch(path, FILES, "D:\\Apps", resume=False)
+    journal.close()
+    assert resume is None
+
+
+def test_engine_skips_attempts_made_before_crash(tmp_path):
+    """续装时上次已开始的参数不再执行，从下一个参数继续"""
+    package = tmp_path / "app.exe"
+    package.write_bytes(b"MZ" + b"\0" * 62)
+    commands = []
+
+    async def launcher(cmd, timeout, new_console=False, on_output=None, idle_window=None):
+        commands.append(cmd)
+        return 0, b"", b""
+
+    path = str(tmp_path / "journal.jsonl")
+    journal, _ = open_batch(path, [str(package)], "D:\\Apps")
+    engine = InstallEngine("D:\\Apps", launcher=launcher, admin_check=lambda: True, fingerprint=False,
+                           journal=journal, resume_attempts={str(package): 1})
+
+    async def run():
+        engine.begin_batch([str(package)])
+        try:
+            return await engine.install_file(str(package))
+        finally:
+            engine.end_batch()
+
+    assert asyncio.run(run())
+    journal.close()
+    # 第 1 次尝试（/S /DIR=）已在上次执行过，本次从第 2 次尝试开始
+    assert commands == [[str(package), "/S", "/INSTALLDIR=D:\\Apps"]]
+    state = read_journal(path)
+    assert state.statuses == {str(package): "succeeded"}
+    assert state.attempts == {str(package): 2}
@@ -0,0 +1,127 @@
+import os
+import struct
+
+from flyinstaller.metadata import MetadataCache, PackageInfo, select_latest
+from flyinstaller.preflight import check_pe
+
+PSF = "Python Software Foundation"
+
+
+def _align(data):
+    return data + b"\0" * (-len(data) % 4)
+
+
+def _block(key, value=b"", value_type=0, children=b"", value_length=None):
+    """VS_VERSIONINFO 中的一个节点（wLength, wValueLength, wType, szKey, Value, Children）"""
+    header = struct.pack("<HHH", 0, 0, 0) + (key + "\0").encode("utf-16-le")
+    body = _align(header)[6:] + _align(value) + children
+    if value_length is None:
+        value_length = len(value) // 2 if value_type == 1 else len(value)
+    return _align(struct.pack("<HHH", 6 + len(body), value_length, value_type) + body)
+
+
+def version_resource(product, company, version):
+    parts = [int(part) for part in version.split(".")] + [0] * 4
+    ms, ls = (parts[0] << 16) | parts[1], (parts[2] << 16) | parts[3]
+    fixed = struct.pack("<13I", 0xFEEF04BD, 0x10000, ms, ls, ms, ls, 0x3F, 0, 4, 1, 0, 0, 0)
+    strings = b"".join(_block(key, (text + "\0").encode("utf-16-le"), 1)
+                       for key, text in (("CompanyName", company), ("ProductName", product),
+                                         ("ProductVersion", version)))
+    table = _block("040904b0", value_type=1, children=strings, value_length=0)
+    return _block("VS_VERSION_INFO", fixed, 0, _block("StringFileInfo", value_type=1, children=table, value_length=0))
+
+
+def write_pe(path, resource, machine=0x14C):
+    """只有一个 .rsrc 节、其中只有版本资源的最小 PE 文件（machine 为 PE 头的 Machine 字段）"""
+    rva, offset = 0x1000, 0x200
+
+    def directory(entries):
+        return struct.pack("<IIHHHH", 0, 0, 0, 0, 0, 1) + entries
+
+    tree = (directory(struct.pack("<II", 16, 0x80000000 | 24))
+            + directory(struct.pack("<II", 1, 0x80000000 | 48))
+            + directory(struct.pack("<II", 0x409, 72))
+            + struct.pack("<IIII", rva + 88, len(resource), 0, 0))
+    rsrc = tree + b"\0" * (88 - len(tree)) + resource
+    rsrc += b"\0" * (-len(rsrc) % 0x200)
+    optional = bytearray(224)
+    struct.pack_into("<H", optional, 0, 0x10B)
+    struct.pack_into("<I", optional, 92, 16)
+    struct.pack_into("<II", optional, 96 + 16, rva, len(rsrc))
+    head = (b"MZ" + b"\0" * 58 + struct.pack("<I", 0x40)
+            + b"PE\0\0" + struct.pack("<HHIIIHH", machine, 1, 0, 0, 0, 224, 0x102) + bytes(optional)
+            + b".rsrc\0\0\0" + struct.pack("<IIIIIIHHI", len(rsrc), rva, len(rsrc), offset, 0, 0, 0, 0, 0x40000040))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(head + b"\0" * (offset - len(head)) + rsrc)
+    return str(path)
+
+
+def write_plain(path):
+    """没有版本资源、无法解析的安装包（只能从文件名取版本号）"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"not a real installer")
+    return str(path)
+
+
+def test_newest_version_of_same_product(tmp_path):
+    old = write_pe(tmp_path / "app-1.2.exe", version_resource("Acme Tool", "Acme", "1.2.0.0"))
+    new = write_pe(tmp_path / "setup_latest.exe", version_resource("Acme Tool", "Acme", "1.4.0.0"))
+    other = write_pe(tmp_path / "other.exe", version_resource("Other Tool", "Acme", "0.9.0.0"))
+    infos = MetadataCache().read_all([old, new, other])
+    assert (infos[new].product, infos[new].publisher, infos[new].version) == ("Acme Tool", "Acme", "1.4.0.0")
+
+    latest, superseded = select_latest([old, new, other], infos)
+    assert latest == [new, other]
+    assert superseded == {old: new}
+
+
+def test_x86_and_x64_builds_are_kept(tmp_path):
+    resource = version_resource("Acme Tool", "Acme", "1.4.0.0")
+    x86 = write_pe(tmp_path / "acme-1.4-x86.exe", resource)
+    x64 = write_pe(tmp_path / "acme-1.4-x64.exe", resource, machine=0x8664)
+    old_x64 = write_pe(tmp_path / "acme-1.2-x64.exe", version_resource("Acme Tool", "Acme", "1.2.0.0"), machine=0x8664)
+    files = [x86, x64, old_x64]
+    infos = MetadataCache().read_all(files)
+    assert [infos[file_path].platform for file_path in files] == ["x86", "x64", "x64"]
+    latest, superseded = select_latest(files, infos)
+    assert latest == [x86, x64]
+    assert superseded == {old_x64: x64}
+    # 预检与框架识别共用同一个 PE 头解析
+    assert check_pe((tmp_path / "acme-1.4-x64.exe").read_bytes(), os.path.getsize(x64)) is None
+
+
+def test_python_minor_versions_are_different_products():
+    files = ["python-3.11.4-amd64.exe", "python-3.12.0-amd64.exe", "python-3.12.1-amd64.exe"]
+    infos = {
+        files[0]: PackageInfo("Python 3.11.4 (64-bit)", "3.11.4150.0", PSF),
+        files[1]: PackageInfo("Python 3.12.0 (64-bit)", "3.12.150.0", PSF),
+        files[2]: PackageInfo("Python 3.12.1 (64-bit)", "3.12.1150.0", PSF),
+    }
+    latest, superseded = select_latest(files, infos)
+    assert latest == files[0:1] + files[2:]
+    assert superseded == {files[1]: files[2]}
+
+
+def test_generic_exe_names_from_different_vendors(tmp_path):
+    intel = write_plain(tmp_path / "intel" / "setup-1.2.exe")
+    nvidia = write_plain(tmp_path / "nvidia" / "setup-3.0.exe")
+    files = [intel, nvidia]
+    latest, superseded = select_latest(files, MetadataCache().read_all(files))
+    assert latest == files
+    assert superseded == {}
+
+
+def test_msi_file_name_fallback_only_within_one_folder(tmp_path):
+    old = write_plain(tmp_path / "a" / "tool-1.2.msi")
+    new = write_plain(tmp_path / "a" / "tool-1.4.msi")
+    elsewhere = write_plain(tmp_path / "b" / "tool-2.0.msi")
+    files = [old, new, elsewhere]
+    latest, superseded = select_latest(files, MetadataCache().read_all(files))
+    assert latest == [new, elsewhere]
+    assert superseded == {old: new}
+
+
+def test_unknown_versions_are_kept():
+    files = ["a.exe", "b.exe"]
+    infos = {"a.exe": PackageInfo("Tool", None, "Acme"), "b.exe": PackageInfo("Tool", "2.0", "Acme")}
+    assert select_latest(files, infos) == (files, {})
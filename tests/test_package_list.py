@@ -0,0 +1,155 @@
+import os
+import random
+import time
+
+import pytest
+
+from flyinstaller.package_list import (
+    PackageEntry, PackageListModel, make_entries, format_size,
+    PENDING, QUEUED, RUNNING, SUCCEEDED, FAILED,
+)
+from flyinstaller.scanner import DEFAULT_BATCH
+from flyinstaller.timeouts import RuntimeHistory
+
+# 单项操作不超过一帧界面刷新（与 flyinstaller.gui.UI_TICK_MS 相同，不导入界面模块）
+UI_TICK_MS = 50
+
+
+def sample_model():
+    model = PackageListModel()
+    model.extend([
+        PackageEntry("/pkg/Zoom.exe", "Zoom.exe", size=300, duration=30.0),
+        PackageEntry("/pkg/git.exe", "git.exe", size=None, duration=90.0),
+        PackageEntry("/pkg/Chrome.msi", "Chrome.msi", size=100, duration=None),
+        PackageEntry("/pkg/7zip.exe", "7zip.exe", size=200, duration=10.0),
+    ])
+    return model
+
+
+def names(model):
+    return [entry.name for entry in model.view]
+
+
+def test_sort():
+    model = sample_model()
+    assert names(model) == ["Zoom.exe", "git.exe", "Chrome.msi", "7zip.exe"]
+    model.set_sort("name")
+    assert names(model) == ["7zip.exe", "Chrome.msi", "git.exe", "Zoom.exe"]
+    model.set_sort("name", reverse=True)
+    assert names(model) == ["Zoom.exe", "git.exe", "Chrome.msi", "7zip.exe"]
+    # 没有大小或耗时的条目正序、倒序都排在最后
+    model.set_sort("size")
+    assert names(model) == ["Chrome.msi", "7zip.exe", "Zoom.exe", "git.exe"]
+    model.set_sort("size", reverse=True)
+    assert names(model) == ["Zoom.exe", "7zip.exe", "Chrome.msi", "git.exe"]
+    model.set_sort("duration")
+    assert names(model) == ["7zip.exe", "Zoom.exe", "git.exe", "Chrome.msi"]
+    model.set_sort("duration", reverse=True)
+    assert names(model) == ["git.exe", "Zoom.exe", "7zip.exe", "Chrome.msi"]
+    model.set_sort("order", reverse=True)
+    assert names(model) == ["7zip.exe", "Chrome.msi", "git.exe", "Zoom.exe"]
+    with pytest.raises(ValueError):
+        model.set_sort("publisher")
+
+
+def test_filter():
+    model = sample_model()
+    model.set_sort("size")
+    model.set_filter(" .EXE ")
+    assert names(model) == ["7zip.exe", "Zoom.exe", "git.exe"]
+    # 追加字符只在当前结果中筛选，删除字符时从全部条目重新筛选并排序
+    model.set_filter("z")
+    assert names(model) == ["7zip.exe", "Zoom.exe"]
+    model.set_filter("zo")
+    assert names(model) == ["Zoom.exe"]
+    model.set_filter("o")
+    assert names(model) == ["Chrome.msi", "Zoom.exe"]
+    model.set_filter("")
+    assert names(model) == ["Chrome.msi", "7zip.exe", "Zoom.exe", "git.exe"]
+    assert len(model) == 4
+    # 筛选时扫描到的新条目也按当前筛选与排序加入
+    model.set_filter("exe")
+    model.extend([PackageEntry("/pkg/app.exe", "app.exe", size=50), PackageEntry("/pkg/b.msi", "b.msi", size=1)])
+    assert names(model) == ["app.exe", "7zip.exe", "Zoom.exe", "git.exe"]
+    assert model.paths()[-2:] == ["/pkg/app.exe", "/pkg/b.msi"]
+    assert model.get("/pkg/b.msi").kind == "msi"
+
+
+def test_set_status_returns_row():
+    model = sample_model()
+    model.set_sort("name")
+    assert model.set_status("/pkg/git.exe", RUNNING) == 2
+    # 状态未变化或路径未知时不需要刷新
+    assert model.set_status("/pkg/git.exe", RUNNING) is None
+    assert model.set_status("/pkg/missing.exe", RUNNING) is None
+    # 筛选掉的条目更新状态但没有行号
+    model.set_filter("zip")
+    assert model.set_status("/pkg/Zoom.exe", QUEUED) is None
+    assert model.get("/pkg/Zoom.exe").status == QUEUED
+    assert model.set_status("/pkg/7zip.exe", FAILED) == 0
+    assert model.get("/pkg/7zip.exe").text().endswith("失败")
+    model.set_filter("")
+    assert model.row_of("/pkg/Zoom.exe") == 3
+
+
+def test_reset_status():
+    model = sample_model()
+    for path, status in (("/pkg/Zoom.exe", SUCCEEDED), ("/pkg/git.exe", QUEUED), ("/pkg/Chrome.msi", RUNNING)):
+        model.set_status(path, status)
+    # 取消后只把仍在排队、安装中的恢复为 pending
+    model.reset_status(only=(QUEUED, RUNNING))
+    assert [entry.status for entry in model.entries] == [SUCCEEDED, PENDING, PENDING, PENDING]
+    model.reset_status()
+    assert {entry.status for entry in model.entries} == {PENDING}
+
+
+def test_make_entries(tmp_path):
+    package = tmp_path / "tools" / "app.exe"
+    package.parent.mkdir()
+    package.write_bytes(b"MZ" * 1024)
+    history = RuntimeHistory(str(tmp_path / "runtime.json"))
+    for seconds in (30, 10, 20):
+        history.record(str(package), seconds)
+    missing = str(tmp_path / "gone.msi")
+    entries = make_entries([str(package), missing], str(tmp_path), history=history)
+    assert [entry.name for entry in entries] == [os.path.join("tools", "app.exe"), "gone.msi"]
+    assert entries[0].size == 2048 and entries[0].duration == 20
+    assert entries[1].size is None and entries[1].duration is None
+    assert format_size(2048) == "2 KB"
+    assert format_size(3 * 1024 * 1024) == "3.0 MB"
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def test_ten_thousand_entries_within_ui_tick():
+    """1 万个安装包：追加、排序、逐字筛选、更新一行状态都在一帧之内"""
+    count = 10000
+    rng = random.Random(1)
+    vendors = ["adobe", "google", "mozilla", "7zip", "python", "nodejs", "vscode", "git"]
+    entries = [PackageEntry(f"/pkg/{vendor}/{vendor}-{i}.exe", f"{vendor}/{vendor}-{i}.exe",
+                            size=rng.randint(1 << 20, 1 << 31), duration=rng.choice([None, rng.uniform(5, 900)]))
+               for i, vendor in ((i, rng.choice(vendors)) for i in range(count))]
+    model = PackageListModel()
+
+    results = {}
+    results["追加（每批）"] = max(timed(lambda: model.extend(entries[k:k + DEFAULT_BATCH]))
+                              for k in range(0, count, DEFAULT_BATCH))
+    results["按大小排序"] = timed(lambda: model.set_sort("size", reverse=True))
+    results["逐字筛选（每个字符）"] = max(timed(lambda: model.set_filter(text)) for text in ("g", "go", "goo", "goog"))
+    filtered = list(model.view)
+    results["清除筛选"] = timed(lambda: model.set_filter(""))
+    results["更新一行状态"] = max(timed(lambda: model.set_status(entry.path, RUNNING)) for entry in entries[:200])
+    results["取可见窗口"] = timed(lambda: model.window(count // 2, 40))
+
+    assert {name: elapsed for name, elapsed in results.items() if elapsed > UI_TICK_MS} == {}
+    # 增量筛选与排序的结果与从头计算一致
+    expected = [entry for entry in entries if "goog" in entry.search_key]
+    known = sorted((entry for entry in expected if entry.size is not None), key=lambda entry: entry.size,
+                   reverse=True)
+    assert filtered == known + [entry for entry in expected if entry.size is None]
+    assert len(model) == count
+    assert [entry.size for entry in model.window(0, 3)] == sorted((entry.size for entry in entries), reverse=True)[:3]
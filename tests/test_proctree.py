@@ -0,0 +1,111 @@
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import textwrap
+import time
+
+import pytest
+
+from flyinstaller.proctree import InstallCancelled, ProcessTracker, popen_kwargs, process_table
+from flyinstaller.workers import WorkerPool
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="假安装程序使用 POSIX 信号")
+
+GRACE = 0.5
+# 宽限期之外允许的额外耗时（SIGKILL、进程表轮询、工作进程往返）
+SLACK = 2.0
+
+# 假安装程序：子进程与孙进程都忽略 SIGTERM，孙进程把自己的 pid 写入文件后一直等待
+FAKE_INSTALLER = textwrap.dedent("""
+    import os, signal, subprocess, sys, time
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    role, pid_file = sys.argv[1], sys.argv[2]
+    if role == "child":
+        subprocess.Popen([sys.executable, __file__, "grandchild", pid_file])
+    else:
+        with open(pid_file + ".tmp", "w") as f:
+            f.write(str(os.getpid()))
+        os.replace(pid_file + ".tmp", pid_file)
+    while True:
+        time.sleep(0.05)
+""")
+
+
+def write_installer(tmp_path):
+    script = tmp_path / "stubborn.py"
+    script.write_text(FAKE_INSTALLER)
+    return [sys.executable, str(script), "child", str(tmp_path / "grandchild.pid")]
+
+
+def read_grandchild(tmp_path, timeout=10.0):
+    pid_file = tmp_path / "grandchild.pid"
+    deadline = time.monotonic() + timeout
+    while not pid_file.exists():
+        assert time.monotonic() < deadline, "孙进程没有启动"
+        time.sleep(0.02)
+    return int(pid_file.read_text())
+
+
+def test_cancel_kills_tree_that_ignores_sigterm(tmp_path):
+    cmd = write_installer(tmp_path)
+    tracker = ProcessTracker(grace=GRACE)
+    proc = subprocess.Popen(cmd, **popen_kwargs())
+    tracker.register(proc)
+    try:
+        grandchild = read_grandchild(tmp_path)
+        killed, elapsed = tracker.cancel()
+        # 子进程忽略 SIGTERM，宽限期结束后由 SIGKILL 结束
+        assert proc.wait(timeout=5) == -signal.SIGKILL
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+    assert killed == 2
+    assert GRACE <= elapsed < GRACE + SLACK
+    assert grandchild not in process_table()
+    # 取消之后新启动的进程立即结束
+    late = subprocess.Popen(cmd, **popen_kwargs())
+    with pytest.raises(InstallCancelled):
+        tracker.register(late)
+    assert late.wait(timeout=5) == -signal.SIGKILL
+
+
+def test_cancel_returns_early_when_tree_exits(tmp_path):
+    tracker = ProcessTracker(grace=5.0)
+    proc = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"], **popen_kwargs())
+    tracker.register(proc)
+    try:
+        killed, elapsed = tracker.cancel()
+        assert proc.wait(timeout=5) == -signal.SIGTERM
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+    assert killed == 1
+    assert elapsed < 2.0
+
+
+def test_worker_pool_forwards_cancel(tmp_path):
+    cmd = write_installer(tmp_path)
+    pool = WorkerPool(size=1, grace=GRACE)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        install = asyncio.ensure_future(pool(cmd, timeout=60))
+        grandchild = await loop.run_in_executor(None, read_grandchild, tmp_path, 30.0)
+        start = time.perf_counter()
+        killed, elapsed = await loop.run_in_executor(None, pool.cancel)
+        with pytest.raises(InstallCancelled):
+            await asyncio.wait_for(install, timeout=10)
+        return grandchild, killed, elapsed, time.perf_counter() - start
+
+    try:
+        grandchild, killed, elapsed, latency = asyncio.run(main())
+    finally:
+        pool.close()
+    assert killed == 2
+    assert GRACE <= elapsed < GRACE + SLACK
+    assert latency < GRACE + SLACK
+    assert grandchild not in process_table()
@@ -0,0 +1,93 @@
+import asyncio
+import random
+
+from flyinstaller.engine import InstallEngine
+from flyinstaller.manifest import PackageRule
+from flyinstaller.retry import (
+    RetryBudget, RetryPolicy, backoff_delay, BASE_DELAY, MAX_DELAY, DEFAULT_MAX_RETRIES,
+    SUCCESS, REBOOT, TRANSIENT, WRONG_SWITCH, FATAL,
+)
+
+DEFAULT_SUCCESS = (0, 259, 1641, 3010)
+
+
+def test_default_classification():
+    policy = RetryPolicy.for_package(None, DEFAULT_SUCCESS)
+    assert policy.classify(0) == SUCCESS
+    assert policy.classify(3010) == REBOOT
+    assert policy.classify(1618) == TRANSIENT
+    assert policy.classify(1603) == TRANSIENT
+    assert policy.classify(1638) == FATAL
+    assert policy.classify(2) == WRONG_SWITCH
+    assert policy.classify(None) == WRONG_SWITCH
+    assert policy.max_retries(1618) == 5
+    assert policy.max_retries(1603) == 1
+    assert policy.max_retries(2) == 0
+
+
+def test_manifest_rule_overrides_classification():
+    rule = PackageRule("app.msi", {"success_codes": [0, 1638], "transient_codes": [1], "fatal_codes": [1603],
+                                   "max_retries": 2})
+    policy = RetryPolicy.for_package(rule, DEFAULT_SUCCESS)
+    assert policy.classify(1638) == SUCCESS
+    assert policy.classify(3010) == WRONG_SWITCH
+    assert policy.classify(1) == TRANSIENT
+    assert policy.classify(1603) == FATAL
+    assert policy.max_retries(1) == 2
+    assert policy.max_retries(1618) == 2
+
+    policy = RetryPolicy.for_package(PackageRule("app.msi", {"transient_codes": [1]}), DEFAULT_SUCCESS)
+    assert policy.success_codes == DEFAULT_SUCCESS
+    assert policy.max_retries(1) == DEFAULT_MAX_RETRIES
+    assert policy.max_retries(1618) == 5
+
+
+def test_backoff_delay_bounds():
+    rng = random.Random(1)
+    for retry in range(1, 12):
+        full = min(MAX_DELAY, BASE_DELAY * 2 ** (retry - 1))
+        for _ in range(50):
+            delay = backoff_delay(retry, rng=rng)
+            assert full / 2 <= delay <= full
+    assert backoff_delay(30, base=1.0, cap=10.0, rng=rng) <= 10.0
+
+
+def test_retry_budget():
+    budget = RetryBudget(2)
+    assert budget.take() and budget.take()
+    assert not budget.take()
+    assert budget.remaining == 0
+    budget.reset()
+    assert budget.remaining == 2
+    assert not RetryBudget(-3).take()
+
+
+def test_manifest_success_codes_apply_to_every_package_type(tmp_path):
+    """清单声明的成功返回码对 EXE 参数尝试、识别出框架的 EXE 和 MSI 都生效"""
+    commands = []
+
+    async def launcher(cmd, timeout, new_console=False, on_output=None, idle_window=None):
+        commands.append(cmd)
+        return 1638, b"", b""
+
+    files = []
+    for name in ("tool.exe", "app.msi"):
+        package = tmp_path / name
+        package.write_bytes(b"MZ" + b"\0" * 62)
+        files.append(str(package))
+    rule = PackageRule("*", {"success_codes": [0, 1638]})
+    engine = InstallEngine("D:\\Apps", launcher=launcher, admin_check=lambda: True, fingerprint=False,
+                           package_settings={file_path: rule for file_path in files})
+
+    async def run():
+        return [await engine.install_file(file_path) for file_path in files]
+
+    assert asyncio.run(run()) == [True, True]
+    assert len(commands) == 2
+    assert [engine.outcomes[file_path].attempts for file_path in files] == [1, 1]
+
+    # 没有清单规则时 1638 为致命错误：MSI 不再去掉目标目录重试
+    commands.clear()
+    engine = InstallEngine("D:\\Apps", launcher=launcher, admin_check=lambda: True, fingerprint=False)
+    assert asyncio.run(run()) == [False, False]
+    assert len(commands) == 2
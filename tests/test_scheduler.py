@@ -0,0 +1,104 @@
+import asyncio
+
+from flyinstaller.scheduler import Admission, InstallScheduler
+
+LANE = ("lane", "exe")
+GROUP = ("group", "drivers")
+
+
+def test_admission_grants_by_priority():
+    """同时就绪的等待者按 (优先级, 序号) 放行，而不是按申请顺序"""
+    order = []
+
+    async def main():
+        admission = Admission({LANE: 1})
+
+        async def worker(name, key):
+            await admission.acquire([LANE], key)
+            order.append(name)
+            await asyncio.sleep(0)
+            admission.release([LANE])
+
+        await asyncio.gather(worker("c", (2, 0)), worker("a", (0, 1)), worker("b", (1, 2)))
+
+    asyncio.run(main())
+    assert order == ["a", "b", "c"]
+
+
+def test_admission_group_does_not_block_lane():
+    """被并发组挡住的等待者不占用通道，排在后面的可以先执行"""
+    started = []
+
+    async def main():
+        admission = Admission({LANE: 2, GROUP: 1})
+        release = asyncio.Event()
+
+        async def worker(name, resources, key):
+            await admission.acquire(resources, key)
+            started.append(name)
+            await release.wait()
+            admission.release(resources)
+
+        tasks = [asyncio.ensure_future(worker("driver1", [LANE, GROUP], (0, 0))),
+                 asyncio.ensure_future(worker("driver2", [LANE, GROUP], (0, 1))),
+                 asyncio.ensure_future(worker("app", [LANE], (0, 2)))]
+        for _ in range(5):
+            await asyncio.sleep(0)
+        assert started == ["driver1", "app"]
+        assert admission.used == {LANE: 2, GROUP: 1}
+        release.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    assert started == ["driver1", "app", "driver2"]
+
+
+def test_admission_cancel_returns_slot():
+    """等待中或已分配名额后被取消的等待者都不会占用名额"""
+
+    async def main():
+        admission = Admission({LANE: 1})
+        await admission.acquire([LANE], (0, 0))
+        waiting = asyncio.ensure_future(admission.acquire([LANE], (0, 1)))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        admission.release([LANE])
+        assert admission.used == {LANE: 0}
+        await asyncio.wait_for(admission.acquire([LANE], (0, 2)), 1)
+        assert admission.used == {LANE: 1}
+
+    asyncio.run(main())
+
+
+def test_scheduler_lanes_dependencies_and_priority():
+    running = {"exe": 0, "msi": 0}
+    peak = {"exe": 0, "msi": 0}
+    started = []
+    blocked = []
+
+    async def install(file_path):
+        lane = file_path.rsplit(".", 1)[1]
+        started.append(file_path)
+        running[lane] += 1
+        peak[lane] = max(peak[lane], running[lane])
+        await asyncio.sleep(0.01)
+        running[lane] -= 1
+        return file_path != "bad.exe"
+
+    files = ["a.exe", "b.exe", "c.exe", "x.msi", "y.msi", "bad.exe", "after_bad.exe"]
+    scheduler = InstallScheduler(
+        install,
+        lanes={"exe": 2, "msi": 1},
+        depends={"after_bad.exe": ["bad.exe"], "y.msi": ["a.exe"]},
+        priority=lambda file_path: 0 if file_path == "c.exe" else 1,
+        on_blocked=lambda file_path, dependency: blocked.append((file_path, dependency)),
+    )
+    results = asyncio.run(scheduler.run(files))
+
+    assert results == [True, True, True, True, True, False, False]
+    assert peak == {"exe": 2, "msi": 1}
+    assert started[0] == "c.exe"
+    assert started.index("y.msi") > started.index("a.exe")
+    assert "after_bad.exe" not in started
+    assert blocked == [("after_bad.exe", "bad.exe")]
@@ -0,0 +1,51 @@
+import asyncio
+import os
+
+from flyinstaller.staging import Stager, StagingCache, external_files
+
+
+def test_external_files_match_the_package():
+    names = ["app.exe", "app.ini", "tool.msi", "tool.mst", "Data1.cab", "readme.xml", "vendor.dll", "setup.exe"]
+    assert external_files("share/app.exe", names) == ["app.ini"]
+    assert external_files("share/tool.msi", names) == ["Data1.cab", "tool.mst"]
+    assert external_files("share/setup.exe", names) == ["Data1.cab", "app.ini", "readme.xml", "tool.mst",
+                                                        "vendor.dll"]
+    # 共享目录中与安装包无关的数据文件不影响预取
+    assert external_files("share/other.exe", ["other.exe", "readme.xml", "vendor.dll", "notes.ini"]) == []
+
+
+def test_stager_skips_only_packages_with_sidecars(tmp_path, monkeypatch):
+    share = tmp_path / "share"
+    share.mkdir()
+    for name in ("a.exe", "b.exe", "tool.msi", "Data1.cab", "readme.ini", "vendor.xml"):
+        (share / name).write_bytes(name.encode() * 100)
+    files = [str(share / name) for name in ("a.exe", "b.exe", "tool.msi")]
+
+    listed = []
+    real_listdir = os.listdir
+
+    def counting_listdir(folder):
+        listed.append(folder)
+        return real_listdir(folder)
+
+    monkeypatch.setattr(os, "listdir", counting_listdir)
+    messages = []
+    stager = Stager(StagingCache(str(tmp_path / "cache")), depth=2, log=messages.append)
+    stager.schedule(files)
+
+    async def run():
+        paths = []
+        for file_path in files:
+            paths.append(await stager.acquire(file_path))
+            stager.release(file_path)
+        stager.close()
+        return paths
+
+    paths = asyncio.run(run())
+    assert paths[0] != files[0] and paths[1] != files[1]
+    assert os.path.dirname(paths[0]).startswith(str(tmp_path / "cache"))
+    assert paths[2] == files[2]
+    assert [message for message in messages if "不预取" in message] == \
+        ["ℹ️ 不预取 tool.msi：安装时可能读取同目录的 Data1.cab，直接从原路径安装"]
+    # 同一批次中每个目录只列一次
+    assert listed.count(str(share)) == 1
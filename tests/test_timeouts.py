@@ -0,0 +1,160 @@
+import asyncio
+import os
+import subprocess
+import sys
+import textwrap
+import time
+
+import pytest
+
+from flyinstaller.engine import InstallEngine
+from flyinstaller.process import AsyncLauncher
+from flyinstaller.proctree import process_table
+from flyinstaller.timeouts import (
+    InstallHung, RuntimeHistory, percentile, runtime_key, MAX_SAMPLES, MAX_TIMEOUT, MIN_TIMEOUT, TIMEOUT_MARGIN,
+)
+
+IDLE_WINDOW = 1.0
+SAMPLE_INTERVAL = 0.1
+
+# 挂起的假安装程序：启动一个同样空闲的孙进程后等待（像卡在隐藏对话框上）
+IDLE_INSTALLER = textwrap.dedent("""
+    import subprocess, sys, time
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    print(child.pid, flush=True)
+    time.sleep(60)
+""")
+# 持续占用 CPU 的假安装程序
+BUSY_INSTALLER = textwrap.dedent("""
+    import time
+    end = time.monotonic() + 2.5
+    while time.monotonic() < end:
+        sum(range(1000))
+""")
+# 几乎不占 CPU、但定期写文件的假安装程序
+WRITING_INSTALLER = textwrap.dedent("""
+    import os, sys, time
+    with open(sys.argv[1], "wb") as f:
+        for _ in range(10):
+            f.write(os.urandom(4096))
+            f.flush()
+            time.sleep(0.25)
+""")
+
+linux_only = pytest.mark.skipif(not os.path.isdir("/proc"), reason="挂起检测测试通过 /proc 采样进程树活动")
+
+
+def launch(cmd, timeout=30, idle_window=IDLE_WINDOW, lines=None):
+    """返回 (launcher 的结果, 耗时秒)；输出行追加到 lines"""
+    launcher = AsyncLauncher(sample_interval=SAMPLE_INTERVAL)
+    on_output = (lambda stream, line: lines.append(line)) if lines is not None else None
+    start = time.perf_counter()
+    result = asyncio.run(launcher(cmd, timeout, on_output=on_output, idle_window=idle_window))
+    return result, time.perf_counter() - start
+
+
+@linux_only
+def test_idle_installer_is_hung(tmp_path):
+    script = tmp_path / "idle.py"
+    script.write_text(IDLE_INSTALLER)
+    lines = []
+    start = time.perf_counter()
+    with pytest.raises(InstallHung) as error:
+        launch([sys.executable, str(script)], lines=lines)
+    elapsed = time.perf_counter() - start
+    assert error.value.idle_window == IDLE_WINDOW
+    assert isinstance(error.value, subprocess.TimeoutExpired)
+    # 空闲窗口 + 启动时的活动 + 若干采样间隔，远早于 30 秒超时
+    assert IDLE_WINDOW <= elapsed < IDLE_WINDOW + 2.0
+    # 挂起时结束整个进程树
+    grandchild = int(lines[0])
+    deadline = time.monotonic() + 2.0
+    while grandchild in process_table() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert grandchild not in process_table()
+
+
+@linux_only
+def test_busy_installers_are_not_hung(tmp_path):
+    busy = tmp_path / "busy.py"
+    busy.write_text(BUSY_INSTALLER)
+    (returncode, _, _), elapsed = launch([sys.executable, str(busy)])
+    assert returncode == 0
+    assert elapsed >= 2.5
+
+    writing = tmp_path / "writing.py"
+    writing.write_text(WRITING_INSTALLER)
+    (returncode, _, _), elapsed = launch([sys.executable, str(writing), str(tmp_path / "data.bin")])
+    assert returncode == 0
+    assert elapsed >= 2.5
+
+
+def test_timeout_without_idle_window(tmp_path):
+    with pytest.raises(subprocess.TimeoutExpired) as error:
+        launch([sys.executable, "-c", "import time; time.sleep(60)"], timeout=0.5, idle_window=None)
+    assert not isinstance(error.value, InstallHung)
+
+
+def test_percentile():
+    assert percentile([5], 0.95) == 5
+    assert percentile([3, 1, 2], 0.5) == 2
+    assert percentile(range(1, 101), 0.95) == 95
+    assert percentile(range(1, 21), 0.95) == 19
+
+
+def test_runtime_history_deadline(tmp_path):
+    package = tmp_path / "app.exe"
+    package.write_bytes(b"MZ" * 100)
+    path = str(tmp_path / "runtime.json")
+    history = RuntimeHistory(path)
+    # 样本不足时使用默认超时
+    history.record(str(package), 100)
+    history.record(str(package), 200)
+    assert history.deadline(str(package), 1800) == 1800
+    history.record(str(package), 300)
+    assert history.deadline(str(package), 1800) == 300 * TIMEOUT_MARGIN
+
+    # 同名同大小的安装包在其他文件夹中共用记录，大小不同时不共用
+    other = tmp_path / "copy"
+    other.mkdir()
+    (other / "app.exe").write_bytes(b"MZ" * 100)
+    assert history.samples(str(other / "app.exe")) == [100, 200, 300]
+    (other / "app.exe").write_bytes(b"MZ" * 101)
+    assert history.deadline(str(other / "app.exe"), 1800) == 1800
+    assert runtime_key(str(package)) == "app.exe|200"
+
+    # 重新加载后保留记录，每个安装包只保留最近 MAX_SAMPLES 个样本
+    history = RuntimeHistory(path)
+    for _ in range(MAX_SAMPLES):
+        history.record(str(package), 1.5)
+    assert RuntimeHistory(path).samples(str(package)) == [1.5] * MAX_SAMPLES
+    # 下限与上限
+    assert history.deadline(str(package), 1800) == MIN_TIMEOUT
+    for _ in range(MAX_SAMPLES):
+        history.record(str(package), 10 * 3600)
+    assert history.deadline(str(package), 1800) == MAX_TIMEOUT
+    assert history.deadline(str(tmp_path / "missing.exe"), 1800) == 1800
+
+
+def test_engine_uses_learned_deadline(tmp_path):
+    package = tmp_path / "app.exe"
+    package.write_bytes(b"MZ" + b"\0" * 62)
+    history = RuntimeHistory(str(tmp_path / "runtime.json"))
+    for seconds in (40, 50, 60):
+        history.record(str(package), seconds)
+    calls = []
+
+    async def launcher(cmd, timeout, new_console=False, on_output=None, idle_window=None):
+        calls.append((timeout, idle_window))
+        if len(calls) == 1:
+            raise InstallHung(cmd, idle_window)
+        return 0, b"", b""
+
+    engine = InstallEngine("D:\\Apps", launcher=launcher, admin_check=lambda: True, fingerprint=False,
+                           history=history, timeout=1800, idle_window=IDLE_WINDOW)
+    assert asyncio.run(engine.install_file(str(package)))
+    # 挂起的尝试按超时处理，换下一个参数
+    assert calls == [(60 * TIMEOUT_MARGIN, IDLE_WINDOW), (60 * TIMEOUT_MARGIN, IDLE_WINDOW)]
+    assert engine.outcomes[str(package)].attempts == 2
+    # 只记录成功的尝试
+    assert len(history.samples(str(package))) == 4